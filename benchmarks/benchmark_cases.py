@@ -0,0 +1,230 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pandas as pd
+from scipy.signal import find_peaks
+
+from benchmarks.synthetic_datasets import BenchmarkDataset
+from sc2_combat_detector.decorators import load_observed_replay, save_observed_replay
+from sc2_combat_detector.detector.detect_combat import (
+    combine_signals,
+    get_combat_intervals,
+    get_game_features,
+)
+from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.replay_processing.stream_observations import (
+    observation_consumer,
+)
+from sc2_combat_detector.settings import SUFFIX
+from sc2_combat_simulator.env.raw_unit_features import RawUnitArrayTransform
+from sc2_combat_simulator.env.spawn_compiler import (
+    compile_spawn_commands,
+    compile_unit_value_commands,
+    match_spawned_units,
+)
+from sc2_combat_simulator.scenario_loader import get_all_units
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    # Prepares everything that should not be timed, returns the timed function:
+    setup: Callable[[BenchmarkDataset, Path], Callable[[], Any]]
+
+
+def _get_features_dataframe(dataset: BenchmarkDataset) -> pd.DataFrame:
+    game_feature_dict = get_game_features(proto_obs=dataset.observation_collection)
+    dataframe = pd.DataFrame.from_dict(data=game_feature_dict, orient="index")
+    dataframe = dataframe.reset_index().rename(columns={"index": "gameloop"})
+
+    return dataframe
+
+
+def setup_observation_consumer(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    def run():
+        # Consumer mutates nothing in the input, the same stream can be replayed:
+        for _ in observation_consumer(
+            observations_iterator=iter(dataset.observation_pairs),
+            accept_step_fn=lambda step: True,
+        ):
+            pass
+
+    return run
+
+
+def setup_observation_consumer_in_collection(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    def run():
+        # Observations are built directly in their output interval:
+        observation_collection = obs_collection_pb.GameObservationCollection()
+        observation_interval = observation_collection.observation_intervals.add(
+            start_time=0,
+            end_time=dataset.scale.n_gameloops,
+        )
+        for _ in observation_consumer(
+            observations_iterator=iter(dataset.observation_pairs),
+            accept_step_fn=lambda step: True,
+            new_observation_fn=lambda game_loop: (
+                observation_interval.observations.add()
+            ),
+        ):
+            pass
+
+    return run
+
+
+def setup_save_observed_replay(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    output_filepath = (work_directory / dataset.scale.name).with_suffix(SUFFIX)
+
+    def run():
+        save_observed_replay(
+            replay_observations=dataset.observation_collection,
+            output_filepath=output_filepath,
+        )
+
+    return run
+
+
+def setup_load_observed_replay(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    input_filepath = save_observed_replay(
+        replay_observations=dataset.observation_collection,
+        output_filepath=(work_directory / dataset.scale.name).with_suffix(SUFFIX),
+    )
+
+    def run():
+        load_observed_replay(input_filepath=input_filepath)
+
+    return run
+
+
+def setup_get_game_features(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    def run():
+        get_game_features(proto_obs=dataset.observation_collection)
+
+    return run
+
+
+def setup_combine_signals(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    dataframe = _get_features_dataframe(dataset=dataset)
+
+    def run():
+        combine_signals(dataframe=dataframe)
+
+    return run
+
+
+def setup_find_peaks_get_combat_intervals(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    combined_dataframe = combine_signals(
+        dataframe=_get_features_dataframe(dataset=dataset)
+    )
+
+    def run():
+        # Same parameters as the defaults of detect_combat_intervals:
+        resource_peaks, _ = find_peaks(
+            combined_dataframe["total_resources_killed_delta"],
+            height=500,
+            distance=1100,
+        )
+        get_combat_intervals(
+            resource_peaks=resource_peaks,
+            dataframe=combined_dataframe,
+            damage_start_threshold=100,
+            damage_stop_threshold=100,
+        )
+
+    return run
+
+
+def setup_get_all_units(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    observation_interval = dataset.observation_collection.observation_intervals[0]
+
+    def run():
+        get_all_units(observation_interval=observation_interval)
+
+    return run
+
+
+def setup_compile_scenario_spawn(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    observation_interval = dataset.observation_collection.observation_intervals[0]
+    player_units_map_state = get_all_units(observation_interval=observation_interval)[0]
+    # The source units stand in for the units observed after the spawn:
+    observed_units = list(player_units_map_state.player1_units) + list(
+        player_units_map_state.player2_units
+    )
+
+    def run():
+        compile_spawn_commands(player_units_map_state=player_units_map_state)
+        matched_units, _, _ = match_spawned_units(
+            player_units_map_state=player_units_map_state,
+            observed_units=observed_units,
+        )
+        compile_unit_value_commands(matched_units=matched_units)
+
+    return run
+
+
+def setup_raw_unit_arrays(
+    dataset: BenchmarkDataset,
+    work_directory: Path,
+) -> Callable[[], Any]:
+    observation_interval = dataset.observation_collection.observation_intervals[0]
+    observations = [
+        observation.player1 for observation in observation_interval.observations
+    ]
+    transform = RawUnitArrayTransform()
+
+    def run():
+        for observation in observations:
+            transform.transform_obs(obs=observation)
+
+    return run
+
+
+BENCHMARK_CASES: Dict[str, BenchmarkCase] = {
+    case.name: case
+    for case in [
+        BenchmarkCase("observation_consumer", setup_observation_consumer),
+        BenchmarkCase(
+            "observation_consumer_in_collection",
+            setup_observation_consumer_in_collection,
+        ),
+        BenchmarkCase("save_observed_replay", setup_save_observed_replay),
+        BenchmarkCase("load_observed_replay", setup_load_observed_replay),
+        BenchmarkCase("get_game_features", setup_get_game_features),
+        BenchmarkCase("combine_signals", setup_combine_signals),
+        BenchmarkCase(
+            "find_peaks_get_combat_intervals",
+            setup_find_peaks_get_combat_intervals,
+        ),
+        BenchmarkCase("get_all_units", setup_get_all_units),
+        BenchmarkCase("compile_scenario_spawn", setup_compile_scenario_spawn),
+        BenchmarkCase("raw_unit_arrays", setup_raw_unit_arrays),
+    ]
+}
@@ -0,0 +1,219 @@
+import gc
+import json
+import logging
+import platform
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import click
+import psutil
+from google.protobuf.internal import api_implementation
+
+from benchmarks.benchmark_cases import BENCHMARK_CASES, BenchmarkCase
+from benchmarks.synthetic_datasets import BenchmarkScale, generate_dataset
+from sc2_combat_detector.settings import LOGGING_FORMAT
+
+DEFAULT_SCALES = "500x10,1000x20,2000x40"
+
+
+class PeakRSSSampler:
+    """Samples the resident set size of the current process in a background thread."""
+
+    def __init__(self, interval_seconds: float = 0.005) -> None:
+        self._interval_seconds = interval_seconds
+        self._process = psutil.Process()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self.baseline_rss = 0
+        self.peak_rss = 0
+
+    def _sample(self) -> None:
+        while not self._stop_event.is_set():
+            self.peak_rss = max(self.peak_rss, self._process.memory_info().rss)
+            time.sleep(self._interval_seconds)
+
+    def __enter__(self):
+        self.baseline_rss = self._process.memory_info().rss
+        self.peak_rss = self.baseline_rss
+        self._thread.start()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self._stop_event.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self._process.memory_info().rss)
+
+
+def time_function(function: Callable[[], Any], repeats: int) -> List[float]:
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def measure_peak_memory(function: Callable[[], Any]) -> Dict[str, int]:
+    """
+    Runs the function once more to measure its memory usage. This is separate
+    from the timed runs because tracing allocations slows down the execution.
+
+    Parameters
+    ----------
+    function : Callable[[], Any]
+        Function to be measured.
+
+    Returns
+    -------
+    Dict[str, int]
+        Returns the peak of traced Python allocations and the peak increase
+        of the resident set size, this includes native protobuf allocations.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    with PeakRSSSampler() as rss_sampler:
+        function()
+    _, peak_python_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "peak_python_memory_bytes": peak_python_memory,
+        "peak_rss_increase_bytes": rss_sampler.peak_rss - rss_sampler.baseline_rss,
+    }
+
+
+def run_benchmark_case(
+    case: BenchmarkCase,
+    dataset,
+    work_directory: Path,
+    repeats: int,
+) -> Dict[str, Any]:
+    function = case.setup(dataset, work_directory)
+    times = time_function(function=function, repeats=repeats)
+    memory = measure_peak_memory(function=function)
+
+    result = {
+        "case": case.name,
+        "scale": dataset.scale.name,
+        "n_gameloops": dataset.scale.n_gameloops,
+        "n_units": dataset.scale.n_units,
+        "repeats": repeats,
+        "times_seconds": times,
+        "min_seconds": min(times),
+        "median_seconds": statistics.median(times),
+        "mean_seconds": statistics.mean(times),
+        **memory,
+    }
+
+    return result
+
+
+def get_metadata(seed: int) -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": psutil.cpu_count(),
+        "protobuf_implementation": api_implementation.Type(),
+        "seed": seed,
+    }
+
+
+@click.command(
+    help="Runs the benchmark suite for the detector, storage and stream hot paths on synthetic datasets."
+)
+@click.option(
+    "--output_file",
+    type=click.Path(
+        dir_okay=False,
+        file_okay=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    default=Path("./benchmark_results.json"),
+    help="Path to the JSON file where the benchmark results will be written.",
+)
+@click.option(
+    "--scales",
+    type=str,
+    default=DEFAULT_SCALES,
+    help=f"Comma separated list of dataset scales given as gameloops x units per player. Default is {DEFAULT_SCALES}.",
+)
+@click.option(
+    "--cases",
+    type=str,
+    default=",".join(BENCHMARK_CASES.keys()),
+    help="Comma separated list of benchmark cases to run. Default is all of the cases.",
+)
+@click.option(
+    "--repeats",
+    type=int,
+    default=5,
+    help="Number of timed runs of each case. Default is 5.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=0,
+    help="Seed for the synthetic datasets. Default is 0.",
+)
+def main(
+    output_file: Path,
+    scales: str,
+    cases: str,
+    repeats: int,
+    seed: int,
+):
+    logging.basicConfig(level=logging.INFO, format=LOGGING_FORMAT)
+
+    benchmark_scales = [
+        BenchmarkScale.from_string(scale) for scale in scales.split(",")
+    ]
+    benchmark_cases = [BENCHMARK_CASES[case_name] for case_name in cases.split(",")]
+
+    results = []
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        work_directory = Path(temporary_directory)
+        for scale in benchmark_scales:
+            logging.info(f"Generating synthetic dataset for scale {scale.name}")
+            dataset = generate_dataset(scale=scale, seed=seed)
+
+            for case in benchmark_cases:
+                result = run_benchmark_case(
+                    case=case,
+                    dataset=dataset,
+                    work_directory=work_directory,
+                    repeats=repeats,
+                )
+                logging.info(
+                    f"{case.name} [{scale.name}]: median {result['median_seconds']:.4f}s, "
+                    f"peak RSS increase {result['peak_rss_increase_bytes']} bytes"
+                )
+                results.append(result)
+
+            del dataset
+
+    benchmark_output = {
+        "metadata": get_metadata(seed=seed),
+        "results": results,
+    }
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with output_file.open("w") as out_f:
+        json.dump(benchmark_output, out_f, indent=2)
+
+    logging.info(f"Wrote benchmark results to: {str(output_file)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+from s2clientprotocol import sc2api_pb2 as sc2api_pb
+
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
+from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.replay_processing.stream_observations import (
+    observation_consumer,
+)
+from sc2_combat_detector.replay_processing.synthetic_observation_stream import (
+    SyntheticReplayObservationStream,
+)
+
+
+@dataclass
+class BenchmarkScale:
+    n_gameloops: int
+    n_units: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.n_gameloops}x{self.n_units}"
+
+    @staticmethod
+    def from_string(scale: str) -> "BenchmarkScale":
+        """
+        Parses the scale from a string such as "2000x50".
+
+        Parameters
+        ----------
+        scale : str
+            Number of gameloops and number of units per player separated by "x".
+
+        Returns
+        -------
+        BenchmarkScale
+            Returns the parsed benchmark scale.
+        """
+
+        n_gameloops, n_units = scale.lower().split("x")
+        return BenchmarkScale(n_gameloops=int(n_gameloops), n_units=int(n_units))
+
+
+@dataclass
+class BenchmarkDataset:
+    scale: BenchmarkScale
+    observation_pairs: List[List[sc2api_pb.ResponseObservation]]
+    observation_collection: obs_collection_pb.GameObservationCollection
+
+
+def get_synthetic_stream_args(
+    scale: BenchmarkScale,
+    seed: int,
+) -> SyntheticStreamArgs:
+    """
+    Acquires the synthetic stream configuration for a given benchmark scale.
+    Fights are placed relative to the game length so that every scale contains
+    the same share of combat.
+
+    Parameters
+    ----------
+    scale : BenchmarkScale
+        Scale of the dataset.
+    seed : int
+        Seed of the synthetic stream, the same seed yields the same dataset.
+
+    Returns
+    -------
+    SyntheticStreamArgs
+        Returns the synthetic stream configuration.
+    """
+
+    n_gameloops = scale.n_gameloops
+    fight_duration = max(1, n_gameloops // 20)
+    fight_intervals = [
+        (n_gameloops // 4, n_gameloops // 4 + fight_duration),
+        (3 * n_gameloops // 4, 3 * n_gameloops // 4 + fight_duration),
+    ]
+
+    synthetic_stream_args = SyntheticStreamArgs(
+        game_length=n_gameloops,
+        n_units=scale.n_units,
+        fight_intervals=fight_intervals,
+        seed=seed,
+        map_hash=f"benchmark_{scale.name}",
+    )
+
+    return synthetic_stream_args
+
+
+def generate_observation_pairs(
+    scale: BenchmarkScale,
+    seed: int = 0,
+) -> List[List[sc2api_pb.ResponseObservation]]:
+    """
+    Generates the observations for both of the players on each of the gameloops,
+    as they would be returned by the replay observation stream.
+
+    Parameters
+    ----------
+    scale : BenchmarkScale
+        Scale of the dataset.
+    seed : int, optional
+        Seed of the synthetic stream, by default 0
+
+    Returns
+    -------
+    List[List[sc2api_pb.ResponseObservation]]
+        Returns the materialized observation stream.
+    """
+
+    interface = sc2api_pb.InterfaceOptions(raw=True, score=True)
+    synthetic_stream_args = get_synthetic_stream_args(scale=scale, seed=seed)
+
+    with SyntheticReplayObservationStream(
+        interface_options=interface,
+        synthetic_stream_args=synthetic_stream_args,
+        replay_path=Path(f"{synthetic_stream_args.map_hash}.SC2Replay"),
+        step_mul=1,
+        disable_fog=True,
+        add_opponent_observations=True,
+    ) as replay_observation_stream:
+        replay_observation_stream.start_replay_from_data(
+            replay_data=None,
+            player_id=1,
+            opponent_id=2,
+        )
+        observation_pairs = list(replay_observation_stream.observations())
+
+    return observation_pairs
+
+
+def build_observation_collection(
+    scale: BenchmarkScale,
+    observation_pairs: List[List[sc2api_pb.ResponseObservation]],
+) -> obs_collection_pb.GameObservationCollection:
+    """
+    Builds a collection with a single interval spanning the entire game,
+    this is the same layout as the one produced by the first observation pass.
+
+    Parameters
+    ----------
+    scale : BenchmarkScale
+        Scale of the dataset.
+    observation_pairs : List[List[sc2api_pb.ResponseObservation]]
+        Materialized observation stream.
+
+    Returns
+    -------
+    obs_collection_pb.GameObservationCollection
+        Returns the collection of all of the observations.
+    """
+
+    observation_collection = obs_collection_pb.GameObservationCollection(
+        replay_path=f"benchmark_{scale.name}.SC2Replay",
+        map_hash=f"benchmark_{scale.name}",
+        game_version="5.0.14",
+    )
+    observation_interval = observation_collection.observation_intervals.add(
+        start_time=0,
+        end_time=scale.n_gameloops,
+    )
+
+    # Observations are built in place, the same way as in observe_replay:
+    for _ in observation_consumer(
+        observations_iterator=iter(observation_pairs),
+        accept_step_fn=lambda step: True,
+        new_observation_fn=lambda game_loop: observation_interval.observations.add(),
+    ):
+        pass
+
+    return observation_collection
+
+
+def generate_dataset(scale: BenchmarkScale, seed: int = 0) -> BenchmarkDataset:
+    observation_pairs = generate_observation_pairs(scale=scale, seed=seed)
+    observation_collection = build_observation_collection(
+        scale=scale,
+        observation_pairs=observation_pairs,
+    )
+
+    return BenchmarkDataset(
+        scale=scale,
+        observation_pairs=observation_pairs,
+        observation_collection=observation_collection,
+    )
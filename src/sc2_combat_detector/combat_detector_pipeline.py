@@ -1,9 +1,21 @@
 from pathlib import Path
 from sc2_combat_detector.detector.detect_combat import multithreading_detect_combat
+from sc2_combat_detector.detector.detection_backend import DetectionBackend
+from sc2_combat_detector.detector.tracker_events import (
+    multithreading_detect_combat_from_tracker_events,
+)
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
+from sc2_combat_detector.replay_processing.concurrency_controller import (
+    GIGABYTE,
+    AdaptiveConcurrencyController,
+)
 from sc2_combat_detector.replay_processing.observe_replays import (
     observe_replays_subfolders,
     re_observe_replay_get_combat_snapshots,
 )
+from sc2_combat_detector.replay_processing.worker_mode import WorkerMode
 
 
 def combat_detector_pipeline(
@@ -13,21 +25,65 @@ def combat_detector_pipeline(
     observe_combat: bool,
     n_threads: int,
     debug_mode: bool,
+    synthetic_stream_args: SyntheticStreamArgs | None = None,
+    single_perspective: bool = False,
+    detection_backend: DetectionBackend = DetectionBackend.ENGINE,
+    adaptive_concurrency: bool = False,
+    memory_budget_gb: float | None = None,
+    worker_mode: WorkerMode = WorkerMode.THREAD,
+    merge_distance_gameloop: int = 0,
+    pre_padding_gameloop: int = 0,
+    post_padding_gameloop: int = 0,
 ):
-    # The observation function does not return anything just because all of the
-    # replay observations for a major dataset won't fit into memory.
-    # Instead the drive cache should be read sequentially:
-    observe_replays_subfolders(
-        replaypack_directory=replaypack_directory,
-        output_directory=output_directory,
-        n_threads=n_threads,
-    )
+    # With the adaptive concurrency n_threads is the upper limit of the engines,
+    # the same controller carries its memory estimate over both observation passes:
+    concurrency_controller = None
+    if adaptive_concurrency:
+        concurrency_controller = AdaptiveConcurrencyController(
+            max_workers=n_threads,
+            memory_budget_bytes=(
+                int(memory_budget_gb * GIGABYTE)
+                if memory_budget_gb is not None
+                else None
+            ),
+        )
 
-    # The input directory for combat detector is the output directory for the
-    # observation gathering function:
-    detected_combats = multithreading_detect_combat(
-        input_directory=output_directory,
-    )
+    if detection_backend == DetectionBackend.TRACKER_EVENTS:
+        if synthetic_stream_args is not None:
+            raise ValueError(
+                "Tracker events detection requires real replays, it cannot be used with the synthetic stream!"
+            )
+
+        # Candidate intervals are detected without launching the game engine,
+        # only the combat re-observation requires the engine:
+        detected_combats = multithreading_detect_combat_from_tracker_events(
+            replaypack_directory=replaypack_directory,
+            merge_distance_gameloop=merge_distance_gameloop,
+            pre_padding_gameloop=pre_padding_gameloop,
+            post_padding_gameloop=post_padding_gameloop,
+        )
+    else:
+        # The observation function does not return anything just because all of the
+        # replay observations for a major dataset won't fit into memory.
+        # Instead the drive cache should be read sequentially:
+        observe_replays_subfolders(
+            replaypack_directory=replaypack_directory,
+            output_directory=output_directory,
+            n_threads=n_threads,
+            synthetic_stream_args=synthetic_stream_args,
+            single_perspective=single_perspective,
+            concurrency_controller=concurrency_controller,
+            worker_mode=worker_mode,
+        )
+
+        # The input directory for combat detector is the output directory for the
+        # observation gathering function:
+        detected_combats = multithreading_detect_combat(
+            input_directory=output_directory,
+            merge_distance_gameloop=merge_distance_gameloop,
+            pre_padding_gameloop=pre_padding_gameloop,
+            post_padding_gameloop=post_padding_gameloop,
+        )
     if not detected_combats or not observe_combat:
         return
 
@@ -35,5 +91,10 @@ def combat_detector_pipeline(
         replaypack_directory=replaypack_directory,
         combat_output_directory=combat_output_directory,
         detected_combats=detected_combats,
+        n_threads=n_threads,
         debug_mode=debug_mode,
+        synthetic_stream_args=synthetic_stream_args,
+        single_perspective=single_perspective,
+        concurrency_controller=concurrency_controller,
+        worker_mode=worker_mode,
     )
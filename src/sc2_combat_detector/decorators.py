@@ -1,3 +1,6 @@
+import dataclasses
+import os
+import shutil
 from pathlib import Path
 from sc2_combat_detector.function_arguments.cache_observe_replay_args import (
     CacheObserveReplayArgs,
@@ -7,7 +10,36 @@ from sc2_combat_detector.proto import observation_collection_pb2 as obs_collecti
 
 import logging
 
-from sc2_combat_detector.settings import SUFFIX
+from sc2_combat_detector.settings import CHECKPOINT_SUFFIX, SUFFIX
+
+
+def write_atomically(data: bytes, output_filepath: Path) -> Path:
+    """
+    Writes the data to a temporary file and moves it into place. A crash during
+    the write never leaves a partially written file under the output path.
+
+    Parameters
+    ----------
+    data : bytes
+        Data to be written.
+    output_filepath : Path
+        Path of the file that will be written.
+
+    Returns
+    -------
+    Path
+        Returns the path of the written file.
+    """
+
+    temporary_filepath = output_filepath.with_name(output_filepath.name + ".tmp")
+    with temporary_filepath.open("wb") as out_f:
+        out_f.write(data)
+        out_f.flush()
+        os.fsync(out_f.fileno())
+
+    os.replace(temporary_filepath, output_filepath)
+
+    return output_filepath
 
 
 def save_observed_replay(
@@ -15,10 +47,9 @@ def save_observed_replay(
     output_filepath: Path,
 ) -> Path:
     bin_str_obs = replay_observations.SerializeToString()
-    with output_filepath.open("wb") as out_f:
-        out_f.write(bin_str_obs)
-
-    return output_filepath
+    # Existing files are treated as finished by the cache, the file cannot
+    # be left half-written:
+    return write_atomically(data=bin_str_obs, output_filepath=output_filepath)
 
 
 def load_observed_replay(
@@ -32,6 +63,40 @@ def load_observed_replay(
     return observations
 
 
+def get_interval_checkpoint_filepath(
+    checkpoint_directory: Path,
+    observation_interval: obs_collection_pb.ObservationInterval,
+    suffix: str = SUFFIX,
+) -> Path:
+    interval_name = (
+        f"{observation_interval.start_time}_{observation_interval.end_time}{suffix}"
+    )
+    return checkpoint_directory / interval_name
+
+
+def save_interval_checkpoint(
+    observation_interval: obs_collection_pb.ObservationInterval,
+    checkpoint_filepath: Path,
+) -> Path:
+    checkpoint_filepath.parent.mkdir(parents=True, exist_ok=True)
+    bin_str_interval = observation_interval.SerializeToString()
+    return write_atomically(data=bin_str_interval, output_filepath=checkpoint_filepath)
+
+
+def load_interval_checkpoint(
+    checkpoint_filepath: Path,
+) -> obs_collection_pb.ObservationInterval | None:
+    if not checkpoint_filepath.exists():
+        return None
+
+    observation_interval = obs_collection_pb.ObservationInterval()
+    with checkpoint_filepath.open("rb") as in_f:
+        raw_data = in_f.read()
+        observation_interval.ParseFromString(raw_data)
+
+    return observation_interval
+
+
 def drive_observation_cache(force: bool = False):
     """Caches the return value of a function based on its arguments."""
 
@@ -72,17 +137,39 @@ def drive_observation_cache(force: bool = False):
                 logging.info(
                     f"Output observation file directory did not exist, creating: {str(output_dir_clone_structure)}"
                 )
-                output_dir_clone_structure.mkdir(parents=True)
+                # Concurrent workers may create the same directory:
+                output_dir_clone_structure.mkdir(parents=True, exist_ok=True)
+
+            # Completed combat intervals are checkpointed next to the output file,
+            # so that an interrupted re-observation can be resumed:
+            checkpoint_directory = None
+            if observe_replay_args.combats_to_observe is not None:
+                checkpoint_directory = (
+                    output_dir_clone_structure / replay_stem
+                ).with_suffix(CHECKPOINT_SUFFIX)
+                if force and checkpoint_directory.exists():
+                    shutil.rmtree(checkpoint_directory)
+
+                observe_replay_args = dataclasses.replace(
+                    observe_replay_args,
+                    checkpoint_directory=checkpoint_directory,
+                )
 
             # This is kind of a closed interface the wrapper must be used on a function that takes
             # the replay_path, otherwise this breaks.
             observations = func(observe_replay_args=observe_replay_args)
+            if observations is None:
+                # Observation failed, the checkpoints are kept to resume later:
+                return observations
 
             _ = save_observed_replay(
                 replay_observations=observations,
                 output_filepath=already_processed_observations_file,
             )
 
+            if checkpoint_directory is not None and checkpoint_directory.exists():
+                shutil.rmtree(checkpoint_directory)
+
             return observations
 
         return wrapper
@@ -11,6 +11,7 @@ from s2clientprotocol.sc2api_pb2 import ResponseObservation
 from scipy.signal import find_peaks
 
 from sc2_combat_detector.decorators import load_observed_replay
+from sc2_combat_detector.detector.interval_normalization import normalize_intervals
 from sc2_combat_detector.function_arguments.file_detect_combat_args import (
     FileDetectCombatArgs,
 )
@@ -67,6 +68,47 @@ def get_relevant_features(player_obs: ResponseObservation) -> PlayerFeatures:
     return player_features
 
 
+def get_opponent_features(player_obs: ResponseObservation) -> PlayerFeatures:
+    """
+    Selector function that derives the features of the opponent from the
+    observation of a single player. This is used when the replay was observed
+    from a single perspective. What the opponent has killed is what the player
+    has lost, and the damage dealt by the opponent is the damage taken by the player.
+
+    Parameters
+    ----------
+    player_obs : ResponseObservation
+        Response observation of the observing player as defiend by the s2clientprotocol.
+
+    Returns
+    -------
+    PlayerFeatures
+        Returns opponent features relevant for further processing.
+    """
+
+    gameloop = player_obs.game_loop
+
+    lost_minerals_army = player_obs.score.score_details.lost_minerals.army
+    lost_vespene_army = player_obs.score.score_details.lost_vespene.army
+
+    damage_taken_selector = player_obs.score.score_details.total_damage_taken
+
+    damage_taken_life = damage_taken_selector.life
+    damage_taken_energy = damage_taken_selector.energy
+    damage_taken_shields = damage_taken_selector.shields
+
+    total_damage_taken = damage_taken_life + damage_taken_energy + damage_taken_shields
+
+    opponent_features = PlayerFeatures(
+        gameloop=gameloop,
+        killed_minerals_army=lost_minerals_army,
+        killed_vespene_army=lost_vespene_army,
+        total_damage_dealt=total_damage_taken,
+    )
+
+    return opponent_features
+
+
 def add_features_to_dict(
     dict_to_fill: Dict[str, Any],
     feature_dict: Dict[str, Any],
@@ -136,8 +178,12 @@ def get_game_features(
             player1_observation = observation.player1.observation
             player1_features = get_relevant_features(player_obs=player1_observation)
 
-            player2_observation = observation.player2.observation
-            player2_features = get_relevant_features(player_obs=player2_observation)
+            if observation.HasField("player2"):
+                player2_observation = observation.player2.observation
+                player2_features = get_relevant_features(player_obs=player2_observation)
+            else:
+                # Observed from a single perspective:
+                player2_features = get_opponent_features(player_obs=player1_observation)
 
             if player1_features.gameloop != player2_features.gameloop:
                 raise ValueError(
@@ -364,6 +410,9 @@ def detect_combat_intervals(
     min_distance_gameloop: int = 1100,
     damage_start_threshold: int = 100,
     damage_stop_threshold: int = 100,
+    merge_distance_gameloop: int = 0,
+    pre_padding_gameloop: int = 0,
+    post_padding_gameloop: int = 0,
     plot: bool = True,
     plot_dir: Path = PLOT_DIR,
     plot_filename: str = "detection.pdf",
@@ -383,6 +432,12 @@ def detect_combat_intervals(
         The minimum signal threshold that needs to be broken upwards to state that the fight started.
     damage_stop_threshold : int
         The minimum signal threshold that needs to be broken downwards to state that the fight stopped.
+    merge_distance_gameloop : int
+        Maximum gap in gameloops between two detected intervals that are merged together.
+    pre_padding_gameloop : int
+        Number of gameloops added before each of the detected intervals.
+    post_padding_gameloop : int
+        Number of gameloops added after each of the detected intervals.
 
     Returns
     -------
@@ -393,6 +448,64 @@ def detect_combat_intervals(
     dataframe = pd.DataFrame.from_dict(data=game_feature_dict, orient="index")
     dataframe = dataframe.reset_index().rename(columns={"index": "gameloop"})
 
+    fight_intervals = detect_combat_intervals_in_dataframe(
+        dataframe=dataframe,
+        min_peak_height=min_peak_height,
+        min_distance_gameloop=min_distance_gameloop,
+        damage_start_threshold=damage_start_threshold,
+        damage_stop_threshold=damage_stop_threshold,
+        merge_distance_gameloop=merge_distance_gameloop,
+        pre_padding_gameloop=pre_padding_gameloop,
+        post_padding_gameloop=post_padding_gameloop,
+        plot=plot,
+        plot_dir=plot_dir,
+        plot_filename=plot_filename,
+    )
+
+    return fight_intervals
+
+
+def detect_combat_intervals_in_dataframe(
+    dataframe: pd.DataFrame,
+    min_peak_height: int = 500,
+    min_distance_gameloop: int = 1100,
+    damage_start_threshold: int = 100,
+    damage_stop_threshold: int = 100,
+    merge_distance_gameloop: int = 0,
+    pre_padding_gameloop: int = 0,
+    post_padding_gameloop: int = 0,
+    plot: bool = True,
+    plot_dir: Path = PLOT_DIR,
+    plot_filename: str = "detection.pdf",
+) -> List[obs_collection_pb.ObservationInterval]:
+    """
+    Detects combat in a dataframe of features, with one row per observed gameloop.
+
+    Parameters
+    ----------
+    dataframe : pd.DataFrame
+        Dataframe with the "gameloop" column and the prefixed player features.
+    min_peak_height : int
+        The minimum height of the peak of the signal change to detect the combat.
+    min_distance : int
+        The minimum gap in gameloops between peaks that is required to find another combat.
+    damage_start_threshold : int
+        The minimum signal threshold that needs to be broken upwards to state that the fight started.
+    damage_stop_threshold : int
+        The minimum signal threshold that needs to be broken downwards to state that the fight stopped.
+    merge_distance_gameloop : int
+        Maximum gap in gameloops between two detected intervals that are merged together.
+    pre_padding_gameloop : int
+        Number of gameloops added before each of the detected intervals.
+    post_padding_gameloop : int
+        Number of gameloops added after each of the detected intervals.
+
+    Returns
+    -------
+    List[Tuple[int, int]]
+        Returns a list of tuples that define intervals of (start_combat, end_combat).
+    """
+
     combined_dataframe = combine_signals(dataframe=dataframe)
 
     resource_peaks, _ = find_peaks(
@@ -407,6 +520,15 @@ def detect_combat_intervals(
         damage_start_threshold=damage_start_threshold,
         damage_stop_threshold=damage_stop_threshold,
     )
+    # Backtracking windows of the neighbouring peaks can overlap, the intervals
+    # are normalized so that no gameloop is observed twice:
+    fight_intervals = normalize_intervals(
+        intervals=fight_intervals,
+        merge_distance=merge_distance_gameloop,
+        pre_padding=pre_padding_gameloop,
+        post_padding=post_padding_gameloop,
+        max_gameloop=int(combined_dataframe["gameloop"].max()),
+    )
 
     if plot:
         plot_features(
@@ -451,6 +573,9 @@ def detect_combat(detect_combat_args: FileDetectCombatArgs) -> FileDetectCombatR
     plot_filename = detect_combat_args.filepath.stem + ".pdf"
     combat_intervals = detect_combat_intervals(
         game_feature_dict=game_feature_dict,
+        merge_distance_gameloop=detect_combat_args.merge_distance_gameloop,
+        pre_padding_gameloop=detect_combat_args.pre_padding_gameloop,
+        post_padding_gameloop=detect_combat_args.post_padding_gameloop,
         plot_filename=plot_filename,
     )
 
@@ -467,6 +592,9 @@ def detect_combat(detect_combat_args: FileDetectCombatArgs) -> FileDetectCombatR
 def multithreading_detect_combat(
     input_directory: Path,
     n_threads: int = 12,
+    merge_distance_gameloop: int = 0,
+    pre_padding_gameloop: int = 0,
+    post_padding_gameloop: int = 0,
 ) -> List[FileDetectCombatResult]:
     """
     Runs combat detection in multiple threads.
@@ -477,6 +605,12 @@ def multithreading_detect_combat(
         Directory holding observation files.
     n_threads : int
         Number of threads to spawn for combat detection.
+    merge_distance_gameloop : int
+        Maximum gap in gameloops between two detected intervals that are merged together.
+    pre_padding_gameloop : int
+        Number of gameloops added before each of the detected intervals.
+    post_padding_gameloop : int
+        Number of gameloops added after each of the detected intervals.
 
     Returns
     -------
@@ -491,7 +625,12 @@ def multithreading_detect_combat(
 
     all_detect_combat_args = []
     for file in files_to_process:
-        detect_combat_args = FileDetectCombatArgs(filepath=file)
+        detect_combat_args = FileDetectCombatArgs(
+            filepath=file,
+            merge_distance_gameloop=merge_distance_gameloop,
+            pre_padding_gameloop=pre_padding_gameloop,
+            post_padding_gameloop=post_padding_gameloop,
+        )
         all_detect_combat_args.append(detect_combat_args)
 
     # TODO: Plot separately:
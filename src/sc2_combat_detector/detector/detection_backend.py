@@ -0,0 +1,10 @@
+import enum
+
+
+class DetectionBackend(str, enum.Enum):
+    """Sources of the signals used for the first pass combat detection."""
+
+    # Runs the game engine over the entire replay to acquire the score:
+    ENGINE = "ENGINE"
+    # Reads the tracker events stored in the replay, no game engine is required:
+    TRACKER_EVENTS = "TRACKER_EVENTS"
@@ -0,0 +1,71 @@
+from typing import Iterable, List
+
+from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
+
+
+def normalize_intervals(
+    intervals: Iterable[obs_collection_pb.ObservationInterval],
+    merge_distance: int = 0,
+    pre_padding: int = 0,
+    post_padding: int = 0,
+    max_gameloop: int | None = None,
+) -> List[obs_collection_pb.ObservationInterval]:
+    """
+    Normalizes the combat intervals so that each gameloop belongs to at most one
+    interval. The intervals are padded, sorted, and the intervals that overlap
+    or are separated by a small gap are merged together.
+
+    Parameters
+    ----------
+    intervals : Iterable[obs_collection_pb.ObservationInterval]
+        Intervals to be normalized, only the start and end times are used.
+    merge_distance : int, optional
+        Maximum gap in gameloops between two intervals that are merged together,
+        by default 0 which merges only the overlapping and touching intervals.
+    pre_padding : int, optional
+        Number of gameloops added before each of the intervals, by default 0
+    post_padding : int, optional
+        Number of gameloops added after each of the intervals, by default 0
+    max_gameloop : int | None, optional
+        Last gameloop of the game, padded intervals will not exceed it,
+        by default None
+
+    Returns
+    -------
+    List[obs_collection_pb.ObservationInterval]
+        Returns a sorted list of non-overlapping intervals
+        without any of the observations.
+    """
+
+    padded_intervals = []
+    for interval in intervals:
+        start_time = max(0, interval.start_time - pre_padding)
+        end_time = interval.end_time + post_padding
+        if max_gameloop is not None:
+            end_time = min(max_gameloop, end_time)
+
+        padded_intervals.append((start_time, end_time))
+
+    padded_intervals.sort()
+
+    merged_intervals = []
+    for start_time, end_time in padded_intervals:
+        if merged_intervals and start_time - merged_intervals[-1][1] <= merge_distance:
+            previous_start_time, previous_end_time = merged_intervals[-1]
+            merged_intervals[-1] = (
+                previous_start_time,
+                max(previous_end_time, end_time),
+            )
+            continue
+
+        merged_intervals.append((start_time, end_time))
+
+    normalized_intervals = [
+        obs_collection_pb.ObservationInterval(
+            start_time=start_time,
+            end_time=end_time,
+        )
+        for start_time, end_time in merged_intervals
+    ]
+
+    return normalized_intervals
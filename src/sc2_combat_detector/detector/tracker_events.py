@@ -0,0 +1,260 @@
+from functools import partial
+from multiprocessing.pool import ThreadPool
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+import sc2reader
+from sc2reader.events.tracker import PlayerStatsEvent, UnitDiedEvent
+from sc2reader.resources import Replay
+
+from sc2_combat_detector.detector.detect_combat import (
+    detect_combat_intervals_in_dataframe,
+)
+from sc2_combat_detector.function_results.file_detect_combat_result import (
+    FileDetectCombatResult,
+)
+
+# Same columns as the ones acquired from the observations by get_game_features:
+FEATURE_COLUMNS = [
+    "player1_killed_minerals_army",
+    "player1_killed_vespene_army",
+    "player1_total_damage_dealt",
+    "player2_killed_minerals_army",
+    "player2_killed_vespene_army",
+    "player2_total_damage_dealt",
+]
+
+# Killed army resources reported by the PlayerStatsEvent:
+KILLED_ARMY_COLUMNS = [
+    "player1_killed_minerals_army",
+    "player1_killed_vespene_army",
+    "player2_killed_minerals_army",
+    "player2_killed_vespene_army",
+]
+
+# The damage dealt is replaced by the resources of the killed units, which grow
+# only when a unit dies, not with every hit. The thresholds for the engine
+# signal would end the intervals on the first pause between the deaths, so the
+# interval lasts while units worth more than the cheapest army unit (a zergling)
+# die within the delta window of combine_signals:
+TRACKER_DAMAGE_START_THRESHOLD = 25
+TRACKER_DAMAGE_STOP_THRESHOLD = 25
+
+
+def load_replay_tracker_events(replay_path: Path) -> Replay:
+    # Load level 3 reads the tracker events without the game events,
+    # this is enough for the context engine to link units to the events:
+    replay = sc2reader.load_replay(str(replay_path), load_level=3)
+
+    return replay
+
+
+def get_tracker_event_features(replay: Replay) -> pd.DataFrame:
+    """
+    Acquires the combat detection features from the replay tracker events,
+    without running the game engine.
+
+    Killed army resources are read from the PlayerStatsEvent which is reported
+    every 160 gameloops. The values are interpolated linearly between the
+    reports, so that their change over a number of gameloops is on the same
+    scale as the one observed with the game engine on every gameloop, for which
+    the min_peak_height of the detection is tuned. Tracker events do not contain
+    the damage dealt, the cumulative resource value of the units killed by
+    a player is used instead. It is read from the UnitDiedEvent at the exact
+    gameloop of each death.
+
+    Parameters
+    ----------
+    replay : Replay
+        Replay loaded with the tracker events.
+
+    Returns
+    -------
+    pd.DataFrame
+        Returns a dataframe with the same feature columns as the one acquired
+        from the observations, with one row for each gameloop of the game.
+
+    Raises
+    ------
+    ValueError
+        Raises an error when the replay does not have exactly two players.
+    """
+
+    player_ids = sorted(player.pid for player in replay.players)
+    if len(player_ids) != 2:
+        raise ValueError("We only support replays with two active players!")
+
+    player_prefixes = {
+        player_id: f"player{index + 1}" for index, player_id in enumerate(player_ids)
+    }
+
+    resources_killed = {player_id: 0 for player_id in player_ids}
+    # All of the signals start from zero, the records reported later
+    # on the first gameloop replace these:
+    feature_records = [(0, column, 0) for column in FEATURE_COLUMNS]
+    for event in replay.tracker_events:
+        if isinstance(event, PlayerStatsEvent):
+            prefix = player_prefixes.get(event.pid)
+            if prefix is None:
+                continue
+
+            feature_records.append(
+                (
+                    event.frame,
+                    f"{prefix}_killed_minerals_army",
+                    event.minerals_killed_army,
+                )
+            )
+            feature_records.append(
+                (
+                    event.frame,
+                    f"{prefix}_killed_vespene_army",
+                    event.vespene_killed_army,
+                )
+            )
+        elif isinstance(event, UnitDiedEvent):
+            killing_player_id = event.killing_player_id
+            prefix = player_prefixes.get(killing_player_id)
+            if prefix is None or event.unit is None:
+                continue
+
+            # Units killed by their own player are not a sign of combat:
+            unit_owner = event.unit.owner
+            if unit_owner is not None and unit_owner.pid == killing_player_id:
+                continue
+
+            resources_killed[killing_player_id] += (
+                event.unit.minerals + event.unit.vespene
+            )
+            feature_records.append(
+                (
+                    event.frame,
+                    f"{prefix}_total_damage_dealt",
+                    resources_killed[killing_player_id],
+                )
+            )
+
+    records_dataframe = pd.DataFrame(
+        data=feature_records,
+        columns=["gameloop", "feature", "value"],
+    )
+    # Signals are cumulative, the last value reported on a gameloop is kept.
+    # Killed army is interpolated between the reports, the deaths are exact
+    # and carried forward until the next death:
+    dataframe = records_dataframe.pivot_table(
+        index="gameloop",
+        columns="feature",
+        values="value",
+        aggfunc="last",
+    )
+    dataframe = dataframe.reindex(
+        index=range(0, replay.frames + 1),
+        columns=FEATURE_COLUMNS,
+    )
+    dataframe[KILLED_ARMY_COLUMNS] = dataframe[KILLED_ARMY_COLUMNS].interpolate(
+        limit_area="inside"
+    )
+    dataframe = dataframe.ffill().fillna(0)
+    dataframe.columns.name = None
+    dataframe = dataframe.rename_axis("gameloop").reset_index()
+
+    return dataframe
+
+
+def detect_combat_from_tracker_events(
+    replay_path: Path,
+    merge_distance_gameloop: int = 0,
+    pre_padding_gameloop: int = 0,
+    post_padding_gameloop: int = 0,
+) -> FileDetectCombatResult:
+    """
+    Reads the tracker events of a replay and runs the combat detection algorithm,
+    with the damage thresholds adjusted to the resources of the killed units,
+    see TRACKER_DAMAGE_START_THRESHOLD.
+
+    Parameters
+    ----------
+    replay_path : Path
+        Path to the replay.
+    merge_distance_gameloop : int
+        Maximum gap in gameloops between two detected intervals that are merged together.
+    pre_padding_gameloop : int
+        Number of gameloops added before each of the detected intervals.
+    post_padding_gameloop : int
+        Number of gameloops added after each of the detected intervals.
+
+    Returns
+    -------
+    FileDetectCombatResult
+        Returns a type representing the result of combat detection, please refer to this class definition.
+    """
+
+    replay = load_replay_tracker_events(replay_path=replay_path)
+    dataframe = get_tracker_event_features(replay=replay)
+
+    plot_filename = replay_path.stem + ".pdf"
+    combat_intervals = detect_combat_intervals_in_dataframe(
+        dataframe=dataframe,
+        damage_start_threshold=TRACKER_DAMAGE_START_THRESHOLD,
+        damage_stop_threshold=TRACKER_DAMAGE_STOP_THRESHOLD,
+        merge_distance_gameloop=merge_distance_gameloop,
+        pre_padding_gameloop=pre_padding_gameloop,
+        post_padding_gameloop=post_padding_gameloop,
+        plot_filename=plot_filename,
+    )
+
+    result = FileDetectCombatResult(
+        replay_filepath=replay_path.resolve(),
+        combat_intervals=combat_intervals,
+    )
+
+    return result
+
+
+def multithreading_detect_combat_from_tracker_events(
+    replaypack_directory: Path,
+    merge_distance_gameloop: int = 0,
+    pre_padding_gameloop: int = 0,
+    post_padding_gameloop: int = 0,
+) -> List[FileDetectCombatResult]:
+    """
+    Runs combat detection on the tracker events of all of the replays
+    found in the replaypack directory.
+
+    Parameters
+    ----------
+    replaypack_directory : Path
+        Directory where StarCraft 2 replaypacks are stored.
+    merge_distance_gameloop : int
+        Maximum gap in gameloops between two detected intervals that are merged together.
+    pre_padding_gameloop : int
+        Number of gameloops added before each of the detected intervals.
+    post_padding_gameloop : int
+        Number of gameloops added after each of the detected intervals.
+
+    Returns
+    -------
+    List[FileDetectCombatResult]
+        Returns a list of detected results for further simulation and processing.
+        Please refer to the class definition for more information.
+    """
+
+    replays_to_process = list(replaypack_directory.rglob("*.SC2Replay"))
+    if not replays_to_process:
+        return []
+
+    # ThreadPool cannot do plots because it is not thread safe,
+    # see multithreading_detect_combat:
+    with ThreadPool(processes=1) as thread_pool:
+        combat_interval_results = thread_pool.map(
+            partial(
+                detect_combat_from_tracker_events,
+                merge_distance_gameloop=merge_distance_gameloop,
+                pre_padding_gameloop=pre_padding_gameloop,
+                post_padding_gameloop=post_padding_gameloop,
+            ),
+            replays_to_process,
+        )
+
+    return combat_interval_results
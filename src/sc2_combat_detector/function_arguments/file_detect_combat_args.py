@@ -5,3 +5,7 @@ from pathlib import Path
 @dataclass
 class FileDetectCombatArgs:
     filepath: Path
+    # Normalization of the detected intervals, see normalize_intervals:
+    merge_distance_gameloop: int = 0
+    pre_padding_gameloop: int = 0
+    post_padding_gameloop: int = 0
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass
+class ObservationProjection:
+    """
+    Declares which parts of the ResponseObservation are kept when an observation
+    is captured. Fields that are not requested are never copied into the
+    observation collection. The gameloop, player_common and player_result are
+    always kept, these are required to process the observations further.
+
+    Attributes
+    ----------
+    score : bool
+        Keeps the score of the player, this is used by the combat detection.
+    raw_units : bool
+        Keeps the raw units, these are used to recreate the combat scenarios.
+    map_state : bool
+        Keeps the raw map state (visibility and creep).
+    raw_other : bool
+        Keeps the remaining raw data, i.e. player raw data, events, effects and radar.
+    actions : bool
+        Keeps the actions and action errors reported in the observation,
+        and the actions that are forced when the observation is replayed.
+    feature_layers : bool
+        Keeps the feature layer data.
+    render : bool
+        Keeps the rendered RGB data.
+    ui : bool
+        Keeps the UI data and the available abilities.
+    alerts_and_chat : bool
+        Keeps the alerts and chat messages.
+    """
+
+    score: bool = True
+    raw_units: bool = True
+    map_state: bool = True
+    raw_other: bool = True
+    actions: bool = True
+    feature_layers: bool = True
+    render: bool = True
+    ui: bool = True
+    alerts_and_chat: bool = True
+
+    @property
+    def is_full(self) -> bool:
+        return all(
+            (
+                self.score,
+                self.raw_units,
+                self.map_state,
+                self.raw_other,
+                self.actions,
+                self.feature_layers,
+                self.render,
+                self.ui,
+                self.alerts_and_chat,
+            )
+        )
+
+    @staticmethod
+    def full() -> ObservationProjection:
+        return ObservationProjection()
+
+    @staticmethod
+    def score_only() -> ObservationProjection:
+        return ObservationProjection(
+            score=True,
+            raw_units=False,
+            map_state=False,
+            raw_other=False,
+            actions=False,
+            feature_layers=False,
+            render=False,
+            ui=False,
+            alerts_and_chat=False,
+        )
+
+    @staticmethod
+    def combat_snapshot() -> ObservationProjection:
+        # Score is kept so that the detection can be ran on the combat snapshots:
+        return ObservationProjection(
+            score=True,
+            raw_units=True,
+            map_state=True,
+            raw_other=False,
+            actions=True,
+            feature_layers=False,
+            render=False,
+            ui=False,
+            alerts_and_chat=False,
+        )
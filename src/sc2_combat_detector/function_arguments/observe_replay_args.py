@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List
 
-
+from sc2_combat_detector.function_arguments.observation_projection import (
+    ObservationProjection,
+)
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
 from sc2_combat_detector.function_results.file_detect_combat_result import (
     FileDetectCombatResult,
 )
@@ -24,10 +29,19 @@ class ObserveReplayArgs:
     rgb_screen_size: str = "640,480"
     rgb_minimap_size: str = "16"
     debug_mode: bool = False
+    synthetic_stream_args: SyntheticStreamArgs | None = None
+    single_perspective: bool = False
+    # Set by the drive cache, completed intervals are saved and resumed from here:
+    checkpoint_directory: Path | None = None
+    projection: ObservationProjection = field(
+        default_factory=ObservationProjection.full
+    )
 
     @staticmethod
     def get_initial_processing_args(
         replay_path: Path,
+        synthetic_stream_args: SyntheticStreamArgs | None = None,
+        single_perspective: bool = False,
     ) -> ObserveReplayArgs:
         return ObserveReplayArgs(
             replay_path=replay_path,
@@ -41,6 +55,10 @@ class ObserveReplayArgs:
             no_skips=False,
             combats_to_observe=None,
             debug_mode=False,
+            synthetic_stream_args=synthetic_stream_args,
+            single_perspective=single_perspective,
+            # Combat detection only uses the score:
+            projection=ObservationProjection.score_only(),
         )
 
     @staticmethod
@@ -48,6 +66,8 @@ class ObserveReplayArgs:
         replay_path: Path,
         combats_to_observe: List[obs_collection_pb.ObservationInterval],
         debug_mode: bool = False,
+        synthetic_stream_args: SyntheticStreamArgs | None = None,
+        single_perspective: bool = False,
     ) -> ObserveReplayArgs:
         return ObserveReplayArgs(
             replay_path=replay_path,
@@ -61,4 +81,7 @@ class ObserveReplayArgs:
             no_skips=True,
             combats_to_observe=combats_to_observe,
             debug_mode=debug_mode,
+            synthetic_stream_args=synthetic_stream_args,
+            single_perspective=single_perspective,
+            projection=ObservationProjection.combat_snapshot(),
         )
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+
+@dataclass
+class SyntheticStreamArgs:
+    """
+    Configuration of the synthetic observation stream. The synthetic stream stands
+    in for the game engine, it allows to run the entire pipeline without
+    a StarCraft 2 installation.
+    """
+
+    game_length: int = 20160  # 15 minutes at 22.4 gameloops per second
+    n_units: int = 40
+    n_fights: int = 3
+    fight_duration: int = 330
+    fight_intervals: List[Tuple[int, int]] | None = None
+    kill_rate: float = 12.0
+    damage_rate: float = 8.0
+    action_interval: int = 8
+    map_size: int = 128
+    seed: int = 0
+    map_hash: str = "synthetic"
+    game_version: str = "5.0.14"
+
+    def get_fight_intervals(self) -> List[Tuple[int, int]]:
+        """
+        Acquires the intervals in which the synthetic players are fighting.
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            Returns the explicitly configured fight intervals, or the intervals
+            evenly spread across the game if none were configured.
+        """
+
+        if self.fight_intervals is not None:
+            return sorted(self.fight_intervals)
+
+        spacing = self.game_length // (self.n_fights + 1)
+        fight_intervals = []
+        for fight_index in range(1, self.n_fights + 1):
+            fight_start = max(0, spacing * fight_index - self.fight_duration // 2)
+            fight_end = min(self.game_length, fight_start + self.fight_duration)
+            fight_intervals.append((fight_start, fight_end))
+
+        return fight_intervals
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
 
@@ -11,6 +11,23 @@ class FileDetectCombatResult:
     combat_intervals: List[obs_collection_pb.ObservationInterval]
     filepath: Path | None = None
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # The generated proto classes cannot be pickled by reference,
+        # the intervals are sent to the worker processes serialized:
+        state = self.__dict__.copy()
+        state["combat_intervals"] = [
+            combat_interval.SerializeToString()
+            for combat_interval in self.combat_intervals
+        ]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state["combat_intervals"] = [
+            obs_collection_pb.ObservationInterval.FromString(serialized_interval)
+            for serialized_interval in state["combat_intervals"]
+        ]
+        self.__dict__.update(state)
+
     def get_gameloops_to_observe(self) -> Tuple[List[int], List[int]]:
         """
         Transforms a list of interval tuples into a list of all of the gameloops
@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class ReplayObservationStatus:
+    replay_path: Path
+    success: bool
+    elapsed_seconds: float
+    error: str | None = None
@@ -5,6 +5,11 @@ from pathlib import Path
 import click
 
 from sc2_combat_detector.combat_detector_pipeline import combat_detector_pipeline
+from sc2_combat_detector.detector.detection_backend import DetectionBackend
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
+from sc2_combat_detector.replay_processing.worker_mode import WorkerMode
 from sc2_combat_detector.settings import LOGGING_FORMAT
 
 
@@ -69,12 +74,66 @@ class LogLevel(str, enum.Enum):
     default=2,
     help="Number of threads to use for running StarCraft 2 instances in parallel. Default is 4.",
 )
+@click.option(
+    "--worker_mode",
+    type=click.Choice(list(WorkerMode), case_sensitive=False),
+    default=WorkerMode.THREAD,
+    help="Execution mode of the workers running StarCraft 2 instances. THREAD drives the instances from threads of the main process, PROCESS runs n_threads worker processes that parse and save the observations on their own, avoiding the contention on the GIL. Default is THREAD.",
+)
+@click.option(
+    "--adaptive_concurrency/--no_adaptive_concurrency",
+    is_flag=True,
+    default=False,
+    help="If set, the number of StarCraft 2 instances running in parallel is adjusted to the memory and throughput, starting from one and never exceeding n_threads.",
+)
+@click.option(
+    "--memory_budget_gb",
+    type=float,
+    default=None,
+    help="Memory in GiB that the StarCraft 2 instances may use together with adaptive_concurrency. Default is 80% of the memory available at the start.",
+)
 @click.option(
     "--debug/--no_debug",
     is_flag=True,
     default=False,
     help="If set, the debug mode will be enabled. This forces the proto messages to be trimmed to only one observation per interval.",
 )
+@click.option(
+    "--synthetic_stream/--no_synthetic_stream",
+    is_flag=True,
+    default=False,
+    help="If set, the replays are observed with a synthetic observation stream instead of the game engine. Used to exercise the pipeline without a StarCraft 2 installation.",
+)
+@click.option(
+    "--single_perspective/--no_single_perspective",
+    is_flag=True,
+    default=False,
+    help="If set, the replays are observed only from the perspective of the first player with the fog of war disabled. The data of the second player is derived from this perspective, which halves the observation cost and storage.",
+)
+@click.option(
+    "--detection_backend",
+    type=click.Choice(list(DetectionBackend), case_sensitive=False),
+    default=DetectionBackend.ENGINE,
+    help="Source of the signals for the first pass combat detection. ENGINE observes the entire replay with the game engine, TRACKER_EVENTS reads the tracker events stored in the replay without launching the game. Default is ENGINE.",
+)
+@click.option(
+    "--merge_distance_gameloop",
+    type=int,
+    default=0,
+    help="Maximum gap in gameloops between two detected combat intervals that are merged into one. Default is 0, which merges only the overlapping and touching intervals.",
+)
+@click.option(
+    "--pre_padding_gameloop",
+    type=int,
+    default=0,
+    help="Number of gameloops added before each of the detected combat intervals, clamped at the start of the game. Default is 0.",
+)
+@click.option(
+    "--post_padding_gameloop",
+    type=int,
+    default=0,
+    help="Number of gameloops added after each of the detected combat intervals, clamped at the end of the game. Default is 0.",
+)
 @click.option(
     "--log",
     type=click.Choice(list(LogLevel), case_sensitive=False),
@@ -87,7 +146,16 @@ def main(
     combat_output_directory: Path,
     observe_combat: bool,
     n_threads: int,
+    adaptive_concurrency: bool,
+    memory_budget_gb: float | None,
+    worker_mode: WorkerMode,
     debug: bool,
+    synthetic_stream: bool,
+    single_perspective: bool,
+    detection_backend: DetectionBackend,
+    merge_distance_gameloop: int,
+    pre_padding_gameloop: int,
+    post_padding_gameloop: int,
     log: LogLevel,
 ):
     # Run PySC2 parser and then load the data and perform combat detection:
@@ -115,6 +183,15 @@ def main(
         observe_combat=observe_combat,
         n_threads=n_threads,
         debug_mode=debug,
+        synthetic_stream_args=SyntheticStreamArgs() if synthetic_stream else None,
+        single_perspective=single_perspective,
+        detection_backend=DetectionBackend(detection_backend),
+        adaptive_concurrency=adaptive_concurrency,
+        memory_budget_gb=memory_budget_gb,
+        worker_mode=WorkerMode(worker_mode),
+        merge_distance_gameloop=merge_distance_gameloop,
+        pre_padding_gameloop=pre_padding_gameloop,
+        post_padding_gameloop=post_padding_gameloop,
     )
 
 
@@ -12,19 +12,22 @@ _sym_db = _symbol_database.Default()
 
 
 from s2clientprotocol import sc2api_pb2 as s2clientprotocol_dot_sc2api__pb2
+from s2clientprotocol import raw_pb2 as s2clientprotocol_dot_raw__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1cobservation_collection.proto\x12\x11SC2CombatDetector\x1a\x1ds2clientprotocol/sc2api.proto\"\x9f\x01\n\x19GameObservationCollection\x12\x13\n\x0breplay_path\x18\x01 \x02(\t\x12\x10\n\x08map_hash\x18\x02 \x02(\t\x12\x14\n\x0cgame_version\x18\x03 \x02(\t\x12\x45\n\x15observation_intervals\x18\x04 \x03(\x0b\x32&.SC2CombatDetector.ObservationInterval\"q\n\x13ObservationInterval\x12\x12\n\nstart_time\x18\x01 \x02(\x05\x12\x10\n\x08\x65nd_time\x18\x02 \x02(\x05\x12\x34\n\x0cobservations\x18\x03 \x03(\x0b\x32\x1e.SC2CombatDetector.Observation\"\xdd\x01\n\x0bObservation\x12\x11\n\tgame_loop\x18\x01 \x02(\x05\x12\x34\n\x07player1\x18\x02 \x01(\x0b\x32#.SC2APIProtocol.ResponseObservation\x12\x34\n\x07player2\x18\x03 \x01(\x0b\x32#.SC2APIProtocol.ResponseObservation\x12\x33\n\x0c\x66orce_action\x18\x04 \x01(\x0b\x32\x1d.SC2APIProtocol.RequestAction\x12\x1a\n\x12\x66orce_action_delay\x18\x05 \x01(\x05')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1cobservation_collection.proto\x12\x11SC2CombatDetector\x1a\x1ds2clientprotocol/sc2api.proto\x1a\x1as2clientprotocol/raw.proto\"\x9f\x01\n\x19GameObservationCollection\x12\x13\n\x0breplay_path\x18\x01 \x02(\t\x12\x10\n\x08map_hash\x18\x02 \x02(\t\x12\x14\n\x0cgame_version\x18\x03 \x02(\t\x12\x45\n\x15observation_intervals\x18\x04 \x03(\x0b\x32&.SC2CombatDetector.ObservationInterval\"q\n\x13ObservationInterval\x12\x12\n\nstart_time\x18\x01 \x02(\x05\x12\x10\n\x08\x65nd_time\x18\x02 \x02(\x05\x12\x34\n\x0cobservations\x18\x03 \x03(\x0b\x32\x1e.SC2CombatDetector.Observation\"\xdd\x01\n\x0bObservation\x12\x11\n\tgame_loop\x18\x01 \x02(\x05\x12\x34\n\x07player1\x18\x02 \x01(\x0b\x32#.SC2APIProtocol.ResponseObservation\x12\x34\n\x07player2\x18\x03 \x01(\x0b\x32#.SC2APIProtocol.ResponseObservation\x12\x33\n\x0c\x66orce_action\x18\x04 \x01(\x0b\x32\x1d.SC2APIProtocol.RequestAction\x12\x1a\n\x12\x66orce_action_delay\x18\x05 \x01(\x05\"\x89\x02\n\x14\x43ombatScenarioRecord\x12\x13\n\x0breplay_path\x18\x01 \x02(\t\x12\x10\n\x08map_hash\x18\x02 \x02(\t\x12\x14\n\x0cgame_version\x18\x03 \x02(\t\x12\x12\n\nstart_time\x18\x04 \x02(\x05\x12\x10\n\x08\x65nd_time\x18\x05 \x02(\x05\x12+\n\rplayer1_units\x18\x06 \x03(\x0b\x32\x14.SC2APIProtocol.Unit\x12+\n\rplayer2_units\x18\x07 \x03(\x0b\x32\x14.SC2APIProtocol.Unit\x12\x19\n\x11player1_food_used\x18\x08 \x01(\x05\x12\x19\n\x11player2_food_used\x18\t \x01(\x05')
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'observation_collection_pb2', globals())
 if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
-  _GAMEOBSERVATIONCOLLECTION._serialized_start=83
-  _GAMEOBSERVATIONCOLLECTION._serialized_end=242
-  _OBSERVATIONINTERVAL._serialized_start=244
-  _OBSERVATIONINTERVAL._serialized_end=357
-  _OBSERVATION._serialized_start=360
-  _OBSERVATION._serialized_end=581
+  _GAMEOBSERVATIONCOLLECTION._serialized_start=111
+  _GAMEOBSERVATIONCOLLECTION._serialized_end=270
+  _OBSERVATIONINTERVAL._serialized_start=272
+  _OBSERVATIONINTERVAL._serialized_end=385
+  _OBSERVATION._serialized_start=388
+  _OBSERVATION._serialized_end=609
+  _COMBATSCENARIORECORD._serialized_start=612
+  _COMBATSCENARIORECORD._serialized_end=877
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,279 @@
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from multiprocessing.pool import Pool, ThreadPool
+from typing import Callable, Iterable, List, TypeVar
+
+import psutil
+
+ArgumentType = TypeVar("ArgumentType")
+ResultType = TypeVar("ResultType")
+
+GIGABYTE = 1024**3
+
+# Executables of the game engine start with this name on all of the platforms,
+# e.g. SC2_x64, SC2_x64.exe or SC2:
+ENGINE_PROCESS_PREFIX = "SC2"
+
+
+class AdaptiveConcurrencyController:
+    """
+    Decides how many game engines may run at once. New tasks are admitted only
+    while the projected memory of the running engines fits within the budget,
+    and the limit on the concurrent tasks follows the AIMD scheme: it grows by
+    one after each window of completed tasks that did not lower the throughput,
+    and is halved when the memory runs short or the throughput dropped.
+
+    The memory of the engines is measured as the resident set size of the game
+    engine processes among the descendants of this process, recognized by the
+    name of their executable. The Python workers of the pool are not counted.
+    The estimate for a new task is the highest memory per running task
+    observed so far.
+
+    Parameters
+    ----------
+    max_workers : int
+        Upper limit on the number of the concurrent tasks.
+    memory_budget_bytes : int | None, optional
+        Memory that the game engines may use together, None uses 80%
+        of the memory available at the start, by default None
+    min_available_bytes : int, optional
+        Memory that must remain available to the system,
+        below it the limit is decreased, by default 1 GiB
+    initial_workers : int, optional
+        Number of the concurrent tasks at the start, by default 1
+    throughput_tolerance : float, optional
+        Relative drop of the throughput between two windows that is
+        still treated as an improvement, by default 0.1
+    poll_interval : float, optional
+        Seconds between the memory checks while waiting to admit
+        a task, by default 1.0
+    engine_process_prefix : str, optional
+        Prefix of the names of the game engine processes,
+        by default ENGINE_PROCESS_PREFIX
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        memory_budget_bytes: int | None = None,
+        min_available_bytes: int = GIGABYTE,
+        initial_workers: int = 1,
+        throughput_tolerance: float = 0.1,
+        poll_interval: float = 1.0,
+        engine_process_prefix: str = ENGINE_PROCESS_PREFIX,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+
+        if memory_budget_bytes is None:
+            memory_budget_bytes = int(psutil.virtual_memory().available * 0.8)
+
+        self.max_workers = max_workers
+        self.memory_budget_bytes = memory_budget_bytes
+        self.min_available_bytes = min_available_bytes
+        self.throughput_tolerance = throughput_tolerance
+        self.poll_interval = poll_interval
+        self.engine_process_prefix = engine_process_prefix
+
+        self.limit = max(1, min(initial_workers, max_workers))
+        self.running = 0
+        self.task_memory_estimate = 0
+
+        self._process = psutil.Process()
+        self._condition = threading.Condition()
+        self._window_start = time.monotonic()
+        self._window_completed = 0
+        self._last_throughput: float | None = None
+        self._pressure_handled = False
+
+    def _get_engines_memory(self) -> int:
+        memory = 0
+        for child in self._process.children(recursive=True):
+            try:
+                if not child.name().startswith(self.engine_process_prefix):
+                    continue
+                memory += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        return memory
+
+    def _set_limit(self, limit: int, reason: str) -> None:
+        limit = max(1, min(limit, self.max_workers))
+        if limit != self.limit:
+            logging.info(
+                f"Changing concurrent engines from {self.limit} to {limit}: {reason}"
+            )
+        self.limit = limit
+
+        # The throughput of the new limit is measured only on the tasks
+        # started after the change:
+        self._window_start = time.monotonic()
+        self._window_completed = 0
+
+    def _check_memory(self) -> bool:
+        """
+        Samples the memory, updates the per task estimate and halves the limit
+        under memory pressure. Must be called with the condition held.
+
+        Returns
+        -------
+        bool
+            Returns True if another task fits into the memory budget.
+        """
+
+        engines_memory = self._get_engines_memory()
+        if self.running:
+            self.task_memory_estimate = max(
+                self.task_memory_estimate,
+                engines_memory // self.running,
+            )
+
+        available_memory = psutil.virtual_memory().available
+        if (
+            available_memory < self.min_available_bytes
+            or engines_memory > self.memory_budget_bytes
+        ):
+            # The running engines cannot be shrunk, the limit is halved
+            # only once until one of them finishes:
+            if not self._pressure_handled:
+                self._pressure_handled = True
+                self._last_throughput = None
+                self._set_limit(
+                    limit=min(self.limit, self.running) // 2,
+                    reason=f"{engines_memory / GIGABYTE:.2f} GiB used by the engines, {available_memory / GIGABYTE:.2f} GiB available",
+                )
+            return False
+
+        projected_memory = engines_memory + self.task_memory_estimate
+        return (
+            projected_memory <= self.memory_budget_bytes
+            and available_memory - self.task_memory_estimate >= self.min_available_bytes
+        )
+
+    def acquire(self) -> float:
+        """
+        Blocks until a new task can be started.
+
+        Returns
+        -------
+        float
+            Returns the start time of the task, to be passed to release.
+        """
+
+        with self._condition:
+            while True:
+                # Nothing is running, the task is always admitted so that
+                # the processing cannot stall:
+                if self.running == 0:
+                    break
+                # The memory is sampled on every poll, also when the limit is
+                # reached, to follow the engines that grow while running:
+                fits_memory = self._check_memory()
+                if self.running < self.limit and fits_memory:
+                    break
+                self._condition.wait(timeout=self.poll_interval)
+
+            self.running += 1
+
+            return time.monotonic()
+
+    def release(self, start_time: float) -> None:
+        """
+        Marks a task as finished, and adjusts the limit once per window of
+        completed tasks started under the current limit, where the size of
+        the window is the current limit.
+
+        Parameters
+        ----------
+        start_time : float
+            Start time of the task returned by acquire.
+        """
+
+        with self._condition:
+            self._check_memory()
+            self.running -= 1
+            self._pressure_handled = False
+            if start_time >= self._window_start:
+                self._window_completed += 1
+
+            if self._window_completed >= self.limit:
+                throughput = self._window_completed / max(
+                    time.monotonic() - self._window_start, 1e-9
+                )
+                if (
+                    self._last_throughput is not None
+                    and throughput
+                    < self._last_throughput * (1.0 - self.throughput_tolerance)
+                ):
+                    self._set_limit(
+                        limit=self.limit // 2,
+                        reason=f"throughput dropped from {self._last_throughput:.3f} to {throughput:.3f} tasks/s",
+                    )
+                else:
+                    self._set_limit(
+                        limit=self.limit + 1,
+                        reason=f"throughput {throughput:.3f} tasks/s",
+                    )
+                self._last_throughput = throughput
+
+            self._condition.notify_all()
+
+
+def map_with_concurrency_controller(
+    function: Callable[[ArgumentType], ResultType],
+    arguments: Iterable[ArgumentType],
+    controller: AdaptiveConcurrencyController,
+    pool: Pool | None = None,
+) -> List[ResultType]:
+    """
+    Equivalent of Pool.map, but each task is started only when
+    the controller admits it.
+
+    Parameters
+    ----------
+    function : Callable[[ArgumentType], ResultType]
+        Function starting a game engine, called once per argument.
+    arguments : Iterable[ArgumentType]
+        Arguments of the tasks.
+    controller : AdaptiveConcurrencyController
+        Controller deciding when the next task is started.
+    pool : Pool | None, optional
+        Pool running the tasks, with at least controller.max_workers workers,
+        it is not closed. None runs the tasks in a new ThreadPool, by default None
+
+    Returns
+    -------
+    List[ResultType]
+        Returns the results in the order of the arguments.
+    """
+
+    def get_release_callback(start_time: float) -> Callable[[object], None]:
+        return lambda _: controller.release(start_time=start_time)
+
+    pool_context = (
+        ThreadPool(processes=controller.max_workers)
+        if pool is None
+        else nullcontext(pool)
+    )
+    with pool_context as task_pool:
+        async_results = []
+        for argument in arguments:
+            release_callback = get_release_callback(start_time=controller.acquire())
+            async_results.append(
+                task_pool.apply_async(
+                    function,
+                    (argument,),
+                    callback=release_callback,
+                    error_callback=release_callback,
+                )
+            )
+
+        # All of the tasks are waited for before an error is raised, the pool
+        # would be terminated with the slots of the running tasks still held:
+        for async_result in async_results:
+            async_result.wait()
+
+        return [async_result.get() for async_result in async_results]
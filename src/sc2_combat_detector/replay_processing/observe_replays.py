@@ -1,14 +1,26 @@
+import dataclasses
 import logging
+import multiprocessing
+import time
 from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from typing import List
+from typing import Iterable, List
 
-from sc2_combat_detector.decorators import drive_observation_cache
+from sc2_combat_detector.decorators import (
+    drive_observation_cache,
+    get_interval_checkpoint_filepath,
+    load_interval_checkpoint,
+    save_interval_checkpoint,
+)
 from sc2_combat_detector.detector.detect_combat import FileDetectCombatResult
+from sc2_combat_detector.detector.interval_normalization import normalize_intervals
 from sc2_combat_detector.function_arguments.cache_observe_replay_args import (
     CacheObserveReplayArgs,
 )
 from sc2_combat_detector.function_arguments.observe_replay_args import ObserveReplayArgs
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
 from sc2_combat_detector.function_arguments.thread_observe_replay_args import (
     ThreadObserveReplayArgs,
 )
@@ -16,7 +28,15 @@ from sc2_combat_detector.function_arguments.thread_observe_replay_args import (
 from sc2_combat_detector.function_results.get_replay_map_hash_result import (
     GetReplayMapHashResult,
 )
+from sc2_combat_detector.function_results.replay_observation_status import (
+    ReplayObservationStatus,
+)
 from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.replay_processing.concurrency_controller import (
+    AdaptiveConcurrencyController,
+    map_with_concurrency_controller,
+)
+from sc2_combat_detector.replay_processing.worker_mode import WorkerMode
 from sc2_combat_detector.replay_processing.stream_observations import (
     run_observation_stream,
 )
@@ -114,7 +134,7 @@ def gameloop_within_interval(
 
 
 def verify_observation_lengths(
-    all_observations: obs_collection_pb.GameObservationCollection,
+    observation_intervals: Iterable[obs_collection_pb.ObservationInterval],
     gameloops_to_observe: List[int],
 ) -> None:
     """
@@ -123,18 +143,17 @@ def verify_observation_lengths(
 
     Parameters
     ----------
-    all_observations : obs_collection_pb.GameObservationCollection
-        Collection of multiple intervals of observations.
-        Can be thought of as a nested list, please refer to the proto definition.
+    observation_intervals : Iterable[obs_collection_pb.ObservationInterval]
+        Intervals which were observed for the requested gameloops.
     gameloops_to_observe : List[int]
         List of the requested gameloops to be observed.
     """
 
     sum_of_lens = 0
-    for observation_interval in all_observations.observation_intervals:
+    for observation_interval in observation_intervals:
         sum_of_lens += len(observation_interval.observations)
 
-    if len(gameloops_to_observe) != sum_of_lens * 2:
+    if len(gameloops_to_observe) != sum_of_lens:
         logging.warning(
             f"Something is wrong, requested observations for {len(gameloops_to_observe)} and received {sum_of_lens} observations!"
         )
@@ -162,13 +181,16 @@ def observe_replay(
         Collection os observations as a proto message type.
     """
 
-    # This will return an empty list if there were no registered combats to observe:
     gameloops_to_observe = None
-    start_times = None
     entire_game_observation_interval = None
     if observe_replay_args.combats_to_observe:
-        start_times, gameloops_to_observe = (
-            observe_replay_args.combats_to_observe.get_gameloops_to_observe()
+        # The plan is built from normalized intervals so that no gameloop is
+        # requested twice, and the bisect below can find the interval:
+        combats_to_observe = dataclasses.replace(
+            observe_replay_args.combats_to_observe,
+            combat_intervals=normalize_intervals(
+                intervals=observe_replay_args.combats_to_observe.combat_intervals
+            ),
         )
     else:
         # Special case, no combat detection is required so the interval spans the entire game:
@@ -184,32 +206,129 @@ def observe_replay(
             replay_filepath=observe_replay_args.replay_path,
             combat_intervals=[entire_game_observation_interval],
         )
+        combats_to_observe = observe_replay_args.combats_to_observe
+
+    combat_intervals_list = combats_to_observe.combat_intervals
 
-        start_times = [entire_game_observation_interval.start_time]
+    synthetic_stream_args = observe_replay_args.synthetic_stream_args
+    if synthetic_stream_args is not None:
+        # There is no replay to be parsed for the synthetic stream,
+        # the map information comes from its configuration:
+        map_information = GetReplayMapHashResult(
+            map_hash=synthetic_stream_args.map_hash,
+            game_version=synthetic_stream_args.game_version,
+        )
+    else:
+        try:
+            map_information = get_replay_map_information(
+                replay_path=observe_replay_args.replay_path,
+            )
+        except Exception as e:
+            logging.error(
+                f"Failed to get map information for replay {str(observe_replay_args.replay_path)}: {e}"
+            )
+            return
+    all_observations = obs_collection_pb.GameObservationCollection()
+    all_observations.replay_path = str(observe_replay_args.replay_path)
+    all_observations.map_hash = map_information.map_hash
+    all_observations.game_version = map_information.game_version
+
+    # Intervals are initialized in the output collection before observing,
+    # so that each observation can be built directly in its interval
+    # without being copied into the collection afterwards:
+    for combat_interval in combat_intervals_list:
+        all_observations.observation_intervals.add(
+            start_time=combat_interval.start_time,
+            end_time=combat_interval.end_time,
+        )
+    observation_intervals = all_observations.observation_intervals
+
+    # Intervals completed before an interruption are restored from the checkpoints,
+    # only the intervals that are still missing are observed:
+    checkpoint_directory = observe_replay_args.checkpoint_directory
+    checkpoint_filepaths = []
+    pending_indices = []
+    for index, observation_interval in enumerate(observation_intervals):
+        if checkpoint_directory is None:
+            checkpoint_filepaths.append(None)
+            pending_indices.append(index)
+            continue
+
+        checkpoint_filepath = get_interval_checkpoint_filepath(
+            checkpoint_directory=checkpoint_directory,
+            observation_interval=observation_interval,
+        )
+        checkpoint_filepaths.append(checkpoint_filepath)
+
+        restored_interval = load_interval_checkpoint(
+            checkpoint_filepath=checkpoint_filepath
+        )
+        if restored_interval is None:
+            pending_indices.append(index)
+            continue
+
+        observation_interval.CopyFrom(restored_interval)
+
+    if len(pending_indices) < len(observation_intervals):
+        logging.info(
+            f"Restored {len(observation_intervals) - len(pending_indices)} intervals from checkpoints for replay {str(observe_replay_args.replay_path)}"
+        )
+
+    pending_intervals = [combat_intervals_list[index] for index in pending_indices]
+    start_times = [
+        pending_interval.start_time for pending_interval in pending_intervals
+    ]
+
+    # This will return an empty list if there were no registered combats to observe:
+    if entire_game_observation_interval is None:
+        if not pending_intervals:
+            # Every interval is already observed, the engine is not needed:
+            return all_observations
+
+        _, gameloops_to_observe = dataclasses.replace(
+            combats_to_observe,
+            combat_intervals=pending_intervals,
+        ).get_gameloops_to_observe()
 
     # Debug mode means that we only want to get one observation per interval,
     # only the first observation will be saved, and consequently recreated via
     # the sc2_combat_simulator.
-    combat_intervals_list = observe_replay_args.combats_to_observe.combat_intervals
     if observe_replay_args.debug_mode:
         gameloops_to_observe = debug_gameloops_to_observe(
-            combat_intervals_list=combat_intervals_list
+            combat_intervals_list=pending_intervals
         )
 
-    try:
-        map_information = get_replay_map_information(
-            replay_path=observe_replay_args.replay_path,
-        )
-    except Exception as e:
-        logging.error(
-            f"Failed to get map information for replay {str(observe_replay_args.replay_path)}: {e}"
-        )
-        return
-    all_observations = obs_collection_pb.GameObservationCollection()
-    all_observations.replay_path = str(observe_replay_args.replay_path)
-    all_observations.map_hash = map_information.map_hash
-    all_observations.game_version = map_information.game_version
+    def get_interval_index(game_loop: int) -> int | None:
+        # Getting the index of the interval via bisect assumes that the
+        # intervals list is sorted and non-overlapping:
+        pending_index = bisect.bisect_right(start_times, game_loop) - 1
+        if pending_index < 0:
+            return None
+
+        # If gameloop of the observation is equal or higher than the start time
+        # and the gameloop is less or equal the end time of the interval,
+        # the observation belongs to the interval:
+        index = pending_indices[pending_index]
+        observation_interval = observation_intervals[index]
+        if not gameloop_within_interval(
+            start_time=observation_interval.start_time,
+            end_time=observation_interval.end_time,
+            game_loop=game_loop,
+        ):
+            return None
+
+        return index
 
+    def new_observation(game_loop: int) -> obs_collection_pb.Observation:
+        index = get_interval_index(game_loop=game_loop)
+        if index is None:
+            # Observations outside of the intervals are not kept:
+            return obs_collection_pb.Observation()
+
+        return observation_intervals[index].observations.add()
+
+    obs_gameloop = 0
+    next_checkpoint = 0
     try:
         for observation in run_observation_stream(
             replay_path=observe_replay_args.replay_path,
@@ -222,26 +341,32 @@ def observe_replay(
             rgb_screen_size=observe_replay_args.rgb_screen_size,
             no_skips=observe_replay_args.no_skips,
             gameloops_to_observe=gameloops_to_observe,
+            synthetic_stream_args=synthetic_stream_args,
+            new_observation_fn=new_observation,
+            projection=observe_replay_args.projection,
+            single_perspective=observe_replay_args.single_perspective,
         ):
             obs_gameloop = observation.game_loop
-            # Getting the index of the interval via bisect assumes that the
-            # intervals list is sorted and non-overlapping:
-            index = bisect.bisect_right(start_times, obs_gameloop) - 1
-            curr_interval_start_time = combat_intervals_list[index].start_time
-            curr_interval_end_time = combat_intervals_list[index].end_time
-
-            # If gameloop of the observation is equal or higher than the start time
-            # and the gameloop is less or equal the end time of the interval,
-            # you can keep appending the observations to the currently initialized interval.
-            if index >= 0 and gameloop_within_interval(
-                start_time=curr_interval_start_time,
-                end_time=curr_interval_end_time,
-                game_loop=obs_gameloop,
-            ):
-                observation_interval = combat_intervals_list[index]
-                if observe_replay_args.debug_mode:
-                    observation_interval.end_time = obs_gameloop
-                observation_interval.observations.append(observation)
+            if observe_replay_args.debug_mode:
+                index = get_interval_index(game_loop=obs_gameloop)
+                if index is not None:
+                    observation_intervals[index].end_time = obs_gameloop
+
+            if checkpoint_directory is None:
+                continue
+
+            # Observations are yielded in order, once the end time has passed
+            # the interval is complete and can be flushed to drive:
+            while next_checkpoint < len(pending_indices):
+                index = pending_indices[next_checkpoint]
+                if obs_gameloop < observation_intervals[index].end_time:
+                    break
+
+                save_interval_checkpoint(
+                    observation_interval=observation_intervals[index],
+                    checkpoint_filepath=checkpoint_filepaths[index],
+                )
+                next_checkpoint += 1
     except Exception as e:
         logging.error(
             f"Failed to observe replay {str(observe_replay_args.replay_path)}: {e}"
@@ -249,21 +374,17 @@ def observe_replay(
         return
 
     # This is a special case for getting the final gameloop if no combat intervals are requested:
-    # TODO fill in the gameloop of interval end:
     if entire_game_observation_interval:
-        entire_game_observation_interval.end_time = obs_gameloop
+        observation_intervals[0].end_time = obs_gameloop
 
-    for filled_combat_interval in combat_intervals_list:
-        all_observations.observation_intervals.append(filled_combat_interval)
-
-    # This is only multiplied by two because for one gameloop we get the
-    # observations for both of the players:
     # REVIEW: It seems that one observation is missing from the original
     # REVIEW: requested gameloops to observe, this is not a major issue,
     # REVIEW: but rather a weird inconvenience, this ought to be fixed:
     if gameloops_to_observe and not observe_replay_args.debug_mode:
         verify_observation_lengths(
-            all_observations=all_observations,
+            observation_intervals=[
+                observation_intervals[index] for index in pending_indices
+            ],
             gameloops_to_observe=gameloops_to_observe,
         )
 
@@ -310,11 +431,114 @@ def run_replay_observation(
     return thread_observe_replay_args
 
 
+def process_replay_observation(
+    thread_observe_replay_args: ThreadObserveReplayArgs,
+) -> ReplayObservationStatus:
+    """
+    Observes a replay in a worker process. The observations are parsed and saved
+    by the worker itself, only a small status record is sent back to the main
+    process.
+
+    Parameters
+    ----------
+    thread_observe_replay_args : ThreadObserveReplayArgs
+        Arguments required to start replay observation.
+
+    Returns
+    -------
+    ReplayObservationStatus
+        Returns the status of the observation, errors are reported
+        in the status instead of stopping the other workers.
+    """
+
+    replay_path = thread_observe_replay_args.observe_replay_args.replay_path
+    start_time = time.perf_counter()
+    try:
+        run_replay_observation(thread_observe_replay_args=thread_observe_replay_args)
+    except Exception as e:
+        logging.exception(f"Failed to observe replay {str(replay_path)}")
+        return ReplayObservationStatus(
+            replay_path=replay_path,
+            success=False,
+            elapsed_seconds=time.perf_counter() - start_time,
+            error=repr(e),
+        )
+
+    return ReplayObservationStatus(
+        replay_path=replay_path,
+        success=True,
+        elapsed_seconds=time.perf_counter() - start_time,
+    )
+
+
+def run_observation_processes(
+    args_list: List[ThreadObserveReplayArgs],
+    n_processes: int,
+    concurrency_controller: AdaptiveConcurrencyController | None = None,
+) -> List[ReplayObservationStatus]:
+    """
+    Observes the replays with a pool of worker processes, each of the workers
+    owns its game engine and writes its outputs to drive as they are finished.
+
+    Parameters
+    ----------
+    args_list : List[ThreadObserveReplayArgs]
+        Arguments of the replays to observe.
+    n_processes : int
+        Number of the worker processes.
+    concurrency_controller : AdaptiveConcurrencyController | None, optional
+        If set, the number of the concurrent game engines is adjusted by the
+        controller, up to its max_workers, by default None
+
+    Returns
+    -------
+    List[ReplayObservationStatus]
+        Returns the statuses of the observed replays.
+    """
+
+    if not args_list:
+        return []
+
+    if concurrency_controller is not None:
+        n_processes = concurrency_controller.max_workers
+
+    # Each of the workers launches its own game, spawn avoids forking
+    # the state of the parent process:
+    context = multiprocessing.get_context("spawn")
+    statuses: List[ReplayObservationStatus] = []
+    with context.Pool(processes=min(n_processes, len(args_list))) as pool:
+        if concurrency_controller is not None:
+            statuses = map_with_concurrency_controller(
+                function=process_replay_observation,
+                arguments=args_list,
+                controller=concurrency_controller,
+                pool=pool,
+            )
+        else:
+            for status in pool.imap_unordered(process_replay_observation, args_list):
+                statuses.append(status)
+                logging.info(
+                    f"Observed {len(statuses)}/{len(args_list)} replays, {str(status.replay_path)} took {status.elapsed_seconds:.1f}s"
+                )
+
+    failed_statuses = [status for status in statuses if not status.success]
+    if failed_statuses:
+        logging.error(
+            f"Failed to observe {len(failed_statuses)}/{len(statuses)} replays: {[str(status.replay_path) for status in failed_statuses]}"
+        )
+
+    return statuses
+
+
 def observe_replays_subfolders(
     replaypack_directory: Path,
     output_directory: Path,
     n_threads: int = 6,
     force_processing: bool = False,
+    synthetic_stream_args: SyntheticStreamArgs | None = None,
+    single_perspective: bool = False,
+    concurrency_controller: AdaptiveConcurrencyController | None = None,
+    worker_mode: WorkerMode = WorkerMode.THREAD,
 ):
     """
     Runs replay observation on multiple subdirectories (subfolders). Returns all
@@ -336,6 +560,18 @@ def observe_replays_subfolders(
     force_processing : bool, optional
         Specifies if the algorithm should force the re-processing of replays or
         load the pre-processed results from the cache if available, by default False
+    synthetic_stream_args : SyntheticStreamArgs | None, optional
+        If set, the replays are observed with the synthetic stream instead of
+        the game engine, by default None
+    single_perspective : bool, optional
+        If set, the replays are observed only from the perspective of the first
+        player, the data of the second player is derived from it, by default False
+    concurrency_controller : AdaptiveConcurrencyController | None, optional
+        If set, the number of the concurrent game engines is adjusted by the
+        controller instead of being fixed to n_threads, by default None
+    worker_mode : WorkerMode, optional
+        Runs the game engines from threads of the main process, or from
+        n_threads worker processes, by default WorkerMode.THREAD
     """
 
     # Run over all subfolders, parse all of the replays.
@@ -366,7 +602,9 @@ def observe_replays_subfolders(
                 force_processing=force_processing,
             )
             observe_replay_args = ObserveReplayArgs.get_initial_processing_args(
-                replay_path=replay
+                replay_path=replay,
+                synthetic_stream_args=synthetic_stream_args,
+                single_perspective=single_perspective,
             )
             thread_observe_replay_args = ThreadObserveReplayArgs(
                 cache_processing_args=cache_processing_args,
@@ -376,6 +614,22 @@ def observe_replays_subfolders(
             args_list.append(thread_observe_replay_args)
 
     # Run the parsing agents one per directory, these agents should save the output to be read later:
+    if worker_mode == WorkerMode.PROCESS:
+        _ = run_observation_processes(
+            args_list=args_list,
+            n_processes=n_threads,
+            concurrency_controller=concurrency_controller,
+        )
+        return
+
+    if concurrency_controller is not None:
+        _ = map_with_concurrency_controller(
+            function=run_replay_observation,
+            arguments=args_list,
+            controller=concurrency_controller,
+        )
+        return
+
     with ThreadPool(processes=n_threads) as pool:
         _ = pool.map(run_replay_observation, args_list)
 
@@ -387,6 +641,10 @@ def re_observe_replay_get_combat_snapshots(
     force_processing: bool = False,
     n_threads: int = 6,
     debug_mode: bool = False,
+    synthetic_stream_args: SyntheticStreamArgs | None = None,
+    single_perspective: bool = False,
+    concurrency_controller: AdaptiveConcurrencyController | None = None,
+    worker_mode: WorkerMode = WorkerMode.THREAD,
 ):
     """
     Issues re-observation tasks based on the detected interesting intervals.
@@ -404,6 +662,20 @@ def re_observe_replay_get_combat_snapshots(
         Specifies if the cache should be forced to re-create, by default False
     n_threads : int, optional
         Number of threads to spawn for re-simulation, by default 6
+    debug_mode : bool, optional
+        If set, only one observation per interval is acquired, by default False
+    synthetic_stream_args : SyntheticStreamArgs | None, optional
+        If set, the replays are re-observed with the synthetic stream instead of
+        the game engine, by default None
+    single_perspective : bool, optional
+        If set, the replays are observed only from the perspective of the first
+        player, the data of the second player is derived from it, by default False
+    concurrency_controller : AdaptiveConcurrencyController | None, optional
+        If set, the number of the concurrent game engines is adjusted by the
+        controller instead of being fixed to n_threads, by default None
+    worker_mode : WorkerMode, optional
+        Runs the game engines from threads of the main process, or from
+        n_threads worker processes, by default WorkerMode.THREAD
     """
 
     all_thread_args = []
@@ -418,6 +690,8 @@ def re_observe_replay_get_combat_snapshots(
             replay_path=detection_result.replay_filepath,
             combats_to_observe=detection_result,
             debug_mode=debug_mode,
+            synthetic_stream_args=synthetic_stream_args,
+            single_perspective=single_perspective,
         )
 
         thread_args = ThreadObserveReplayArgs(
@@ -427,6 +701,21 @@ def re_observe_replay_get_combat_snapshots(
 
         all_thread_args.append(thread_args)
 
+    if worker_mode == WorkerMode.PROCESS:
+        _ = run_observation_processes(
+            args_list=all_thread_args,
+            n_processes=n_threads,
+            concurrency_controller=concurrency_controller,
+        )
+        return all_thread_args
+
+    if concurrency_controller is not None:
+        return map_with_concurrency_controller(
+            function=run_replay_observation,
+            arguments=all_thread_args,
+            controller=concurrency_controller,
+        )
+
     with ThreadPool(processes=n_threads) as thread_pool:
         arguments_used = thread_pool.map(run_replay_observation, all_thread_args)
 
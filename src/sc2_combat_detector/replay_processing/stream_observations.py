@@ -9,80 +9,212 @@ from s2clientprotocol import common_pb2
 from s2clientprotocol import sc2api_pb2 as sc2api_pb
 
 from pysc2_evolved import run_configs
+from sc2_combat_detector.function_arguments.observation_projection import (
+    ObservationProjection,
+)
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
 from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.replay_processing.synthetic_observation_stream import (
+    SyntheticReplayObservationStream,
+)
 
 import collections
 
 
-# TODO: Get the type of actions function argument:
-def _unconverted_observation(
-    observation: Sequence[sc2api_pb.ResponseObservation],
-    actions,
-) -> obs_collection_pb.Observation:
+def _detached_observation(game_loop: int) -> obs_collection_pb.Observation:
     """
-    Initializes an unconverted observation for further processing.
+    Default factory for the observation messages, creates a message that does not
+    belong to any collection.
 
     Parameters
     ----------
-    observation : Sequence[sc2api_pb.ResponseObservation]
-        Sequence of response observations as returned from the replay observation stream.
-    actions : Sequence[sc2api_pb.Action]
-        Sequence of actions to issue the requests for.
+    game_loop : int
+        Gameloop of the observation that will be built.
 
     Returns
     -------
     obs_collection_pb.Observation
-        Returns an observation for further processing.
+        Returns an empty observation message.
     """
 
-    player1_obs = observation[0]
-    player2_obs = observation[1]
+    return obs_collection_pb.Observation()
 
-    if player1_obs.observation.game_loop != player2_obs.observation.game_loop:
-        raise ValueError("Got desynchronized observations! Gameloops don't match!")
 
-    force_action = sc2api_pb.RequestAction(actions=actions)
-    game_loop = player1_obs.observation.game_loop
-    unconverted_observation = obs_collection_pb.Observation(
-        game_loop=game_loop,
-        player1=player1_obs,
-        player2=player2_obs,
-        force_action=force_action,
-        force_action_delay=0,
+def _copy_message_fields(
+    source,
+    target,
+    field_names: Iterable[str],
+) -> None:
+    for field_name in field_names:
+        if source.HasField(field_name):
+            getattr(target, field_name).CopyFrom(getattr(source, field_name))
+
+
+def copy_projected_response(
+    source: sc2api_pb.ResponseObservation,
+    target: sc2api_pb.ResponseObservation,
+    projection: ObservationProjection,
+) -> None:
+    """
+    Copies only the fields requested by the projection from the response
+    observation. Unrequested fields are never copied, so pruning the observation
+    does not cost anything on top of the copy that is made anyway.
+
+    Parameters
+    ----------
+    source : sc2api_pb.ResponseObservation
+        Response observation as returned from the replay observation stream.
+    target : sc2api_pb.ResponseObservation
+        Empty response observation that will be filled in.
+    projection : ObservationProjection
+        Projection declaring which of the fields should be kept.
+    """
+
+    if projection.is_full:
+        target.CopyFrom(source)
+        return
+
+    target.player_result.extend(source.player_result)
+    if projection.actions:
+        target.actions.extend(source.actions)
+        target.action_errors.extend(source.action_errors)
+    if projection.alerts_and_chat:
+        target.chat.extend(source.chat)
+
+    source_obs = source.observation
+    target_obs = target.observation
+    target_obs.game_loop = source_obs.game_loop
+    _copy_message_fields(
+        source=source_obs,
+        target=target_obs,
+        field_names=["player_common"],
     )
+    if projection.score:
+        _copy_message_fields(
+            source=source_obs,
+            target=target_obs,
+            field_names=["score"],
+        )
+    if projection.feature_layers:
+        _copy_message_fields(
+            source=source_obs,
+            target=target_obs,
+            field_names=["feature_layer_data"],
+        )
+    if projection.render:
+        _copy_message_fields(
+            source=source_obs,
+            target=target_obs,
+            field_names=["render_data"],
+        )
+    if projection.ui:
+        _copy_message_fields(
+            source=source_obs,
+            target=target_obs,
+            field_names=["ui_data"],
+        )
+        target_obs.abilities.extend(source_obs.abilities)
+    if projection.alerts_and_chat:
+        target_obs.alerts.extend(source_obs.alerts)
+
+    if not source_obs.HasField("raw_data"):
+        return
+
+    source_raw = source_obs.raw_data
+    target_raw = target_obs.raw_data
+    if projection.raw_units:
+        target_raw.units.extend(source_raw.units)
+    if projection.map_state:
+        _copy_message_fields(
+            source=source_raw,
+            target=target_raw,
+            field_names=["map_state"],
+        )
+    if projection.raw_other:
+        _copy_message_fields(
+            source=source_raw,
+            target=target_raw,
+            field_names=["player", "event"],
+        )
+        target_raw.effects.extend(source_raw.effects)
+        target_raw.radar.extend(source_raw.radar)
 
-    return unconverted_observation
 
+def _as_perspective_sequence(
+    observation: sc2api_pb.ResponseObservation
+    | Sequence[sc2api_pb.ResponseObservation],
+) -> Sequence[sc2api_pb.ResponseObservation]:
+    # Replay observation stream yields a bare response for a single perspective:
+    if isinstance(observation, sc2api_pb.ResponseObservation):
+        return (observation,)
+
+    return observation
 
-def _convert_observation(
-    player_observation: obs_collection_pb.Observation,
-    force_action_delay: int,
+
+# TODO: Get the type of actions function argument:
+def _unconverted_observation(
+    observation: Sequence[sc2api_pb.ResponseObservation],
+    actions,
+    new_observation_fn: Callable[[int], obs_collection_pb.Observation],
+    projection: ObservationProjection,
 ) -> obs_collection_pb.Observation:
     """
-    Converts the original observation into another type if required.
+    Initializes an unconverted observation for further processing.
+    The observation message is built only once, the response observations are
+    copied directly into the message that was returned by new_observation_fn.
+    Only the fields requested by the projection are copied. If the replay was
+    observed from a single perspective, player2 is left unset.
 
     Parameters
     ----------
-    player_observation : obs_collection_pb.Observation
-        Original player observation.
-    force_action_delay : int
-        _description_
+    observation : Sequence[sc2api_pb.ResponseObservation]
+        Sequence of response observations as returned from the replay observation stream.
+        Contains one response for single perspective observations, otherwise two.
+    actions : Sequence[sc2api_pb.Action]
+        Sequence of actions to issue the requests for.
+    new_observation_fn : Callable[[int], obs_collection_pb.Observation]
+        Function returning the message that will be filled in for a given gameloop.
+        This can be a message that already lives in its output collection.
+    projection : ObservationProjection
+        Projection declaring which of the fields of the response observations are kept.
 
     Returns
     -------
     obs_collection_pb.Observation
-        Observation with changed type, in case of this function it stays the same.
+        Returns an observation for further processing.
     """
 
-    converted_observation = obs_collection_pb.Observation(
-        game_loop=player_observation.game_loop,
-        player1=player_observation.player1,
-        player2=player_observation.player2,
-        force_action=player_observation.force_action,
-        force_action_delay=force_action_delay,
+    player1_obs = observation[0]
+    player2_obs = observation[1] if len(observation) > 1 else None
+
+    if (
+        player2_obs is not None
+        and player1_obs.observation.game_loop != player2_obs.observation.game_loop
+    ):
+        raise ValueError("Got desynchronized observations! Gameloops don't match!")
+
+    game_loop = player1_obs.observation.game_loop
+    unconverted_observation = new_observation_fn(game_loop)
+    unconverted_observation.game_loop = game_loop
+    copy_projected_response(
+        source=player1_obs,
+        target=unconverted_observation.player1,
+        projection=projection,
     )
+    if player2_obs is not None:
+        copy_projected_response(
+            source=player2_obs,
+            target=unconverted_observation.player2,
+            projection=projection,
+        )
+    if projection.actions:
+        unconverted_observation.force_action.actions.extend(actions)
+    # Filled in place as soon as the next observation is known:
+    unconverted_observation.force_action_delay = 0
 
-    return converted_observation
+    return unconverted_observation
 
 
 # Current step sequence will yield observations right before
@@ -230,6 +362,12 @@ def run_observation_stream(
     rgb_minimap_size: str,
     no_skips: bool,
     gameloops_to_observe: List[int],
+    synthetic_stream_args: SyntheticStreamArgs | None = None,
+    new_observation_fn: Callable[
+        [int], obs_collection_pb.Observation
+    ] = _detached_observation,
+    projection: ObservationProjection | None = None,
+    single_perspective: bool = False,
 ):
     try:
         interface = game_interface_setup(
@@ -242,29 +380,54 @@ def run_observation_stream(
             rgb_minimap_size=rgb_minimap_size,
         )
 
-        run_config = run_configs.get()
-        replay_data = run_config.replay_data(replay_path=str(replay_path))
+        if synthetic_stream_args is not None:
+            # Synthetic stream stands in for the game engine, there is no replay
+            # to be read, the players are always 1 and 2:
+            replay_data = None
+            player_one_id = 1
+            player_two_id = 2
+            replay_observation_stream = SyntheticReplayObservationStream(
+                interface_options=interface,
+                synthetic_stream_args=synthetic_stream_args,
+                replay_path=replay_path,
+                step_mul=1,
+                disable_fog=True,
+                add_opponent_observations=not single_perspective,
+            )
+            get_action_skips = replay_observation_stream.raw_action_skips
+        else:
+            run_config = run_configs.get()
+            replay_data = run_config.replay_data(replay_path=str(replay_path))
+
+            # Read the replay first to get the player IDs before the game engine
+            # is initiated, this will save some time later:
+            replay_file = sc2_replay.SC2Replay(replay_data=replay_data)
+            # Read the player IDs first so the replay can be started from some perspective:
+            user_id_to_player_info = sc2_replay_utils.get_active_players(
+                replay=replay_file
+            )
+            player_id_to_player_info = sc2_replay_utils.get_player_ids(
+                user_id_to_object_mapping=user_id_to_player_info
+            )
+            player_ids: List[int] = list(player_id_to_player_info.keys())
+            if len(player_ids) != 2:
+                raise ValueError("We only support replays with two active players!")
+            player_one_id = player_ids[0]
+            player_two_id = player_ids[1]
+
+            replay_observation_stream = ReplayObservationStream(
+                interface_options=interface,
+                step_mul=1,
+                # With fog disabled the first player observes all of the units,
+                # the second perspective is only needed for its own score:
+                disable_fog=True,
+                add_opponent_observations=not single_perspective,
+            )
+
+            def get_action_skips():
+                return sc2_replay_utils.raw_action_skips(replay=replay_file)
 
-        # Read the replay first to get the player IDs before the game engine
-        # is initiated, this will save some time later:
-        replay_file = sc2_replay.SC2Replay(replay_data=replay_data)
-        # Read the player IDs first so the replay can be started from some perspective:
-        user_id_to_player_info = sc2_replay_utils.get_active_players(replay=replay_file)
-        player_id_to_player_info = sc2_replay_utils.get_player_ids(
-            user_id_to_object_mapping=user_id_to_player_info
-        )
-        player_ids: List[int] = list(player_id_to_player_info.keys())
-        if len(player_ids) != 2:
-            raise ValueError("We only support replays with two active players!")
-        player_one_id = player_ids[0]
-        player_two_id = player_ids[1]
-
-        with ReplayObservationStream(
-            interface_options=interface,
-            step_mul=1,
-            disable_fog=True,
-            add_opponent_observations=True,
-        ) as replay_observation_stream:
+        with replay_observation_stream:
             # This decides if the observations should only be acquired for
             # when the players make their actions:
             def _accept_step_fn(step):
@@ -284,7 +447,7 @@ def run_observation_stream(
             if not no_skips:
                 # Get the loops to which the controller should skip to get only the
                 # relevant observations around the player making actions:
-                action_skips = sc2_replay_utils.raw_action_skips(replay=replay_file)
+                action_skips = get_action_skips()
                 player_action_skips = action_skips[player_one_id]
                 step_sequence = get_step_sequence(action_skips=player_action_skips)
 
@@ -306,6 +469,8 @@ def run_observation_stream(
             yield from observation_consumer(
                 observations_iterator=observations_iterator,
                 accept_step_fn=accept_step_function,
+                new_observation_fn=new_observation_fn,
+                projection=projection,
             )
     except Exception as e:
         logging.error(
@@ -318,6 +483,10 @@ def run_observation_stream(
 def observation_consumer(
     observations_iterator: Iterable,
     accept_step_fn: Callable[[Any], bool],
+    new_observation_fn: Callable[
+        [int], obs_collection_pb.Observation
+    ] = _detached_observation,
+    projection: ObservationProjection | None = None,
 ):
     """
     Consumes an observation iterator, and yields a converted representation.
@@ -325,12 +494,19 @@ def observation_consumer(
     Parameters
     ----------
     observations_iterator : Iterable
-        Observations iterator as returned from replay observations stream.
+        Observations iterator as returned from replay observation stream.
         This can either be one observation, or multiple observations if two players
         are recorded.
     accept_step_fn : Callable[[Any], bool]
         Function deciding if the given step should be accepted and observed.
         Please refer to the example implementations as used in code.
+    new_observation_fn : Callable[[int], obs_collection_pb.Observation], optional
+        Function returning the message that will be filled in for a given gameloop.
+        Returning a message that was added to the output collection avoids
+        copying the observation once more, by default _detached_observation
+    projection : ObservationProjection | None, optional
+        Projection declaring which of the fields of the response observations
+        are kept, by default None which keeps all of the fields.
 
     Yields
     ------
@@ -338,6 +514,14 @@ def observation_consumer(
         Returns an observation as defined by the proto message.
     """
 
+    if projection is None:
+        projection = ObservationProjection.full()
+
+    observations_iterator = (
+        _as_perspective_sequence(observation=observation)
+        for observation in observations_iterator
+    )
+
     current_observation = next(observations_iterator)
     current_step = current_observation[0].observation.game_loop
     assert current_step == 0
@@ -361,6 +545,8 @@ def observation_consumer(
         unconverted_observation = _unconverted_observation(
             observation=current_observation,
             actions=actions,
+            new_observation_fn=new_observation_fn,
+            projection=projection,
         )
         player_obs_queue.append(unconverted_observation)
 
@@ -370,10 +556,7 @@ def observation_consumer(
             player_obs = player_obs_queue.popleft()
             player_obs_next = player_obs_queue[0]
 
-            force_action_delay = (
-                player_obs_next.player1.observation.game_loop
-                - player_obs.player1.observation.game_loop
-            )
+            force_action_delay = player_obs_next.game_loop - player_obs.game_loop
 
             player_obs.force_action_delay = force_action_delay
 
@@ -382,23 +565,22 @@ def observation_consumer(
         current_step = step
         current_observation = next_observation
 
-        # Always use last observation, it contains the player result.
-        actions = current_observation[0].actions
-        unconverted_observation = _unconverted_observation(
-            observation=current_observation,
-            actions=actions,
-        )
-        player_obs_queue.append(unconverted_observation)
+    # Always use last observation, it contains the player result.
+    actions = current_observation[0].actions
+    unconverted_observation = _unconverted_observation(
+        observation=current_observation,
+        actions=actions,
+        new_observation_fn=new_observation_fn,
+        projection=projection,
+    )
+    player_obs_queue.append(unconverted_observation)
 
     previous_delay = 1
     while player_obs_queue:
         player_obs = player_obs_queue.popleft()
         if len(player_obs_queue) >= 1:
             player_obs_next = player_obs_queue[0]
-            force_action_delay = (
-                player_obs_next.player1.observation.game_loop
-                - player_obs.player1.observation.game_loop
-            )
+            force_action_delay = player_obs_next.game_loop - player_obs.game_loop
         else:
             # Use previous force action delay, this is only done in the last step.
             # Preserve for reproducibility. In theory the actual delay value
@@ -406,10 +588,7 @@ def observation_consumer(
             # the last step are never taken.
             force_action_delay = previous_delay
 
-        converted_observation = _convert_observation(
-            player_observation=player_obs,
-            force_action_delay=force_action_delay,
-        )
+        player_obs.force_action_delay = force_action_delay
         previous_delay = force_action_delay
 
-        yield converted_observation
+        yield player_obs
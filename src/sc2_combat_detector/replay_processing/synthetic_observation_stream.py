@@ -0,0 +1,393 @@
+import bisect
+import logging
+import random
+import zlib
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from s2clientprotocol import common_pb2
+from s2clientprotocol import raw_pb2 as sc2raw_pb
+from s2clientprotocol import sc2api_pb2 as sc2api_pb
+from s2clientprotocol import score_pb2
+
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
+
+# Protoss Zealot and Stalker, these make up the synthetic armies:
+SYNTHETIC_UNIT_TYPES = ((73, 100.0, 50.0), (74, 80.0, 80.0))
+# Raw ability used for the synthetic player actions (Attack):
+SYNTHETIC_ABILITY_ID = 23
+# Share of the killed resources that is attributed to minerals:
+MINERAL_SHARE = 2 / 3
+# Player two is slightly weaker so that the score curves are not symmetric:
+PLAYER_STRENGTH = {1: 1.0, 2: 0.75}
+
+
+class SyntheticReplayObservationStream:
+    """
+    Stand-in for the ReplayObservationStream which does not require the game engine.
+    It mimics the interface that is used by run_observation_stream and yields
+    synthetic ResponseObservation messages with score curves containing fights
+    that were injected as configured by SyntheticStreamArgs.
+
+    How to use the class:
+
+    with SyntheticReplayObservationStream(interface, synthetic_stream_args) as stream:
+        stream.start_replay_from_data(replay_data, player_id, opponent_id)
+
+        for observation in stream.observations():
+            # Do something with each observation.
+    """
+
+    def __init__(
+        self,
+        interface_options: sc2api_pb.InterfaceOptions,
+        synthetic_stream_args: SyntheticStreamArgs,
+        replay_path: Path | None = None,
+        step_mul: int = 1,
+        disable_fog: bool = False,
+        add_opponent_observations: bool = False,
+    ) -> None:
+        """
+        Constructs the synthetic replay stream object.
+
+        Parameters
+        ----------
+        interface_options : sc2api_pb.InterfaceOptions
+            Interface format to use, raw data is only generated if it was requested.
+        synthetic_stream_args : SyntheticStreamArgs
+            Configuration of the generated game, please refer to the class definition.
+        replay_path : Path | None, optional
+            Path of the replay that is being stood in for, it is used to vary
+            the generated unit placement between replays, by default None
+        step_mul : int, optional
+            Number of skipped observations in between steps, by default 1
+        disable_fog : bool, optional
+            Kept for interface compatibility, the synthetic stream has no fog of war,
+            by default False
+        add_opponent_observations : bool, optional
+            If True yields the observations of both of the players, by default False
+        """
+
+        if not interface_options:
+            raise ValueError("Please specify interface_options")
+
+        self._interface = interface_options
+        self._synthetic_stream_args = synthetic_stream_args
+        self._step_mul = step_mul
+        self._disable_fog = disable_fog
+        self._add_opponent_observations = add_opponent_observations
+
+        seed = synthetic_stream_args.seed
+        if replay_path is not None:
+            seed ^= zlib.crc32(replay_path.name.encode())
+        self._random = random.Random(seed)
+
+        self._fight_intervals = synthetic_stream_args.get_fight_intervals()
+        self._action_skips = self._init_action_skips()
+        self._unit_templates = self._init_unit_templates()
+        self._map_state = self._init_map_state()
+        self._player_ids: List[int] = []
+
+    def _init_action_skips(self) -> Dict[int, List[int]]:
+        action_interval = max(1, self._synthetic_stream_args.action_interval)
+        game_length = self._synthetic_stream_args.game_length
+
+        action_skips = {}
+        for player_id in (1, 2):
+            # Players act with an offset so that their actions do not overlap:
+            first_action = action_interval + (player_id - 1) * (action_interval // 2)
+            action_skips[player_id] = list(
+                range(first_action, game_length, action_interval)
+            )
+
+        return action_skips
+
+    def _init_unit_templates(
+        self,
+    ) -> Dict[int, List[Tuple[int, int, float, float, float, float]]]:
+        map_size = self._synthetic_stream_args.map_size
+
+        unit_templates = {}
+        for player_id in (1, 2):
+            army_center_x = map_size * (0.4 if player_id == 1 else 0.6)
+            army_center_y = map_size * 0.5
+
+            templates = []
+            for unit_index in range(self._synthetic_stream_args.n_units):
+                tag = (player_id << 32) + unit_index + 1
+                unit_type, health_max, shield_max = SYNTHETIC_UNIT_TYPES[
+                    unit_index % len(SYNTHETIC_UNIT_TYPES)
+                ]
+                x = army_center_x + self._random.uniform(-8.0, 8.0)
+                y = army_center_y + self._random.uniform(-8.0, 8.0)
+                templates.append((tag, unit_type, x, y, health_max, shield_max))
+
+            unit_templates[player_id] = templates
+
+        return unit_templates
+
+    def _init_map_state(self) -> sc2raw_pb.MapState:
+        map_size = self._synthetic_stream_args.map_size
+        size = common_pb2.Size2DI(x=map_size, y=map_size)
+
+        map_state = sc2raw_pb.MapState(
+            # Everything is visible, the stream has no fog of war:
+            visibility=common_pb2.ImageData(
+                bits_per_pixel=8,
+                size=size,
+                data=bytes([2]) * (map_size * map_size),
+            ),
+            creep=common_pb2.ImageData(
+                bits_per_pixel=1,
+                size=size,
+                data=bytes((map_size * map_size) // 8),
+            ),
+        )
+
+        return map_state
+
+    def start_replay_from_data(
+        self,
+        replay_data: bytes | None,
+        player_id: int,
+        opponent_id: int,
+    ) -> None:
+        """Starts the stream of synthetic observations, replay data is ignored."""
+
+        if self._add_opponent_observations:
+            self._player_ids = [player_id, opponent_id]
+        else:
+            self._player_ids = [player_id]
+
+        logging.info(
+            f"Starting synthetic replay stream for players: {self._player_ids}"
+        )
+
+    def raw_action_skips(self) -> Dict[int, List[int]]:
+        """
+        Synthetic counterpart of sc2_replay_utils.raw_action_skips.
+
+        Returns
+        -------
+        Dict[int, List[int]]
+            Returns the gameloops where the actions were taken keyed by the player ID.
+        """
+
+        return {
+            player_id: list(action_skips)
+            for player_id, action_skips in self._action_skips.items()
+        }
+
+    def _fight_gameloops(self, game_loop: int) -> int:
+        fight_gameloops = 0
+        for fight_start, fight_end in self._fight_intervals:
+            fight_gameloops += min(
+                max(game_loop - fight_start, 0), fight_end - fight_start
+            )
+
+        return fight_gameloops
+
+    def _health_fraction(self, game_loop: int) -> float:
+        for fight_start, fight_end in self._fight_intervals:
+            if fight_start <= game_loop < fight_end:
+                fight_progress = (game_loop - fight_start) / (fight_end - fight_start)
+                return 1.0 - 0.5 * fight_progress
+
+        # Outside of the fights the armies are fully healed and reinforced:
+        return 1.0
+
+    def _fill_score(
+        self,
+        score: score_pb2.Score,
+        player_id: int,
+        game_loop: int,
+    ) -> None:
+        opponent_id = 3 - player_id
+        fight_gameloops = self._fight_gameloops(game_loop=game_loop)
+        kill_rate = self._synthetic_stream_args.kill_rate
+        damage_rate = self._synthetic_stream_args.damage_rate
+
+        killed = kill_rate * fight_gameloops * PLAYER_STRENGTH[player_id]
+        lost = kill_rate * fight_gameloops * PLAYER_STRENGTH[opponent_id]
+        damage_dealt = damage_rate * fight_gameloops * PLAYER_STRENGTH[player_id]
+        damage_taken = damage_rate * fight_gameloops * PLAYER_STRENGTH[opponent_id]
+
+        score.score_type = score_pb2.Score.Melee
+        score.score = int(killed)
+
+        score_details = score.score_details
+        score_details.killed_value_units = killed
+        score_details.killed_minerals.army = killed * MINERAL_SHARE
+        score_details.killed_vespene.army = killed * (1 - MINERAL_SHARE)
+        score_details.lost_minerals.army = lost * MINERAL_SHARE
+        score_details.lost_vespene.army = lost * (1 - MINERAL_SHARE)
+        score_details.total_damage_dealt.life = damage_dealt / 2
+        score_details.total_damage_dealt.shields = damage_dealt / 2
+        score_details.total_damage_taken.life = damage_taken / 2
+        score_details.total_damage_taken.shields = damage_taken / 2
+
+    def _fill_raw_data(
+        self,
+        raw_data: sc2raw_pb.ObservationRaw,
+        player_id: int,
+        game_loop: int,
+    ) -> None:
+        health_fraction = self._health_fraction(game_loop=game_loop)
+
+        for owner, templates in self._unit_templates.items():
+            alliance = (
+                sc2raw_pb.Alliance.Self
+                if owner == player_id
+                else sc2raw_pb.Alliance.Enemy
+            )
+            for tag, unit_type, x, y, health_max, shield_max in templates:
+                raw_data.units.add(
+                    display_type=sc2raw_pb.DisplayType.Visible,
+                    alliance=alliance,
+                    tag=tag,
+                    unit_type=unit_type,
+                    owner=owner,
+                    pos=common_pb2.Point(x=x, y=y, z=10.0),
+                    radius=0.5,
+                    build_progress=1.0,
+                    is_active=True,
+                    health=health_max * health_fraction,
+                    health_max=health_max,
+                    shield=shield_max * health_fraction,
+                    shield_max=shield_max,
+                )
+
+        raw_data.map_state.CopyFrom(self._map_state)
+
+    def _add_actions(
+        self,
+        response_observation: sc2api_pb.ResponseObservation,
+        player_id: int,
+        previous_game_loop: int,
+        game_loop: int,
+    ) -> None:
+        # Replays report the actions on the observations after they were taken:
+        action_skips = self._action_skips[player_id]
+        first_index = bisect.bisect_left(action_skips, previous_game_loop)
+        last_index = bisect.bisect_left(action_skips, game_loop)
+
+        unit_tag = self._unit_templates[player_id][0][0]
+        for action_game_loop in action_skips[first_index:last_index]:
+            action = response_observation.actions.add(game_loop=action_game_loop)
+            unit_command = action.action_raw.unit_command
+            unit_command.ability_id = SYNTHETIC_ABILITY_ID
+            unit_command.unit_tags.append(unit_tag)
+            unit_command.target_world_space_pos.x = (
+                self._synthetic_stream_args.map_size / 2
+            )
+            unit_command.target_world_space_pos.y = (
+                self._synthetic_stream_args.map_size / 2
+            )
+
+    def _observe(
+        self,
+        player_id: int,
+        previous_game_loop: int,
+        game_loop: int,
+    ) -> sc2api_pb.ResponseObservation:
+        n_units = self._synthetic_stream_args.n_units
+
+        response_observation = sc2api_pb.ResponseObservation()
+        observation = response_observation.observation
+        observation.game_loop = game_loop
+
+        player_common = observation.player_common
+        player_common.player_id = player_id
+        player_common.food_used = 2 * n_units
+        player_common.food_army = 2 * n_units
+        player_common.food_cap = 200
+        player_common.army_count = n_units
+
+        self._fill_score(
+            score=observation.score,
+            player_id=player_id,
+            game_loop=game_loop,
+        )
+        if self._interface.raw:
+            self._fill_raw_data(
+                raw_data=observation.raw_data,
+                player_id=player_id,
+                game_loop=game_loop,
+            )
+
+        self._add_actions(
+            response_observation=response_observation,
+            player_id=player_id,
+            previous_game_loop=previous_game_loop,
+            game_loop=game_loop,
+        )
+
+        if game_loop >= self._synthetic_stream_args.game_length:
+            for result_player_id in (1, 2):
+                response_observation.player_result.add(
+                    player_id=result_player_id,
+                    result=sc2api_pb.Victory
+                    if result_player_id == 1
+                    else sc2api_pb.Defeat,
+                )
+
+        return response_observation
+
+    def observations(self, step_sequence: Sequence[int] | None = None):
+        """
+        Yields a ResponseObservation proto for each step. If using the opponent's
+        observations, this will yield a list of observations, one for each player.
+
+        Parameters
+        ----------
+        step_sequence : Sequence[int] | None, optional
+            A list of integers, the step sizes to apply to the stream, by default None
+        """
+
+        packet_count = 0
+        previous_game_loop = 0
+        game_loop = 0
+        while True:
+            obs = [
+                self._observe(
+                    player_id=player_id,
+                    previous_game_loop=previous_game_loop,
+                    game_loop=game_loop,
+                )
+                for player_id in self._player_ids
+            ]
+            packet_count += 1
+            if len(obs) == 1:
+                yield obs[0]
+            else:
+                yield obs
+
+            if obs[0].player_result or (
+                step_sequence and packet_count > len(step_sequence)
+            ):
+                # End of game.
+                break
+
+            if step_sequence and packet_count <= len(step_sequence):
+                step_mul = step_sequence[packet_count - 1]
+            else:
+                step_mul = self._step_mul
+
+            previous_game_loop = game_loop
+            game_loop = min(
+                game_loop + step_mul, self._synthetic_stream_args.game_length
+            )
+
+    def close(self) -> None:
+        self._player_ids = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_value:
+            logging.error(f"[{exception_type}]: {exception_value}")
+
+        self.close()
@@ -0,0 +1,11 @@
+import enum
+
+
+class WorkerMode(str, enum.Enum):
+    """Execution modes of the workers driving the game engines."""
+
+    # All of the workers share the interpreter of the main process:
+    THREAD = "THREAD"
+    # Each worker is a separate process, parsing and saving the observations
+    # without competing for the GIL of the main process:
+    PROCESS = "PROCESS"
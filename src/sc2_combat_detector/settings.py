@@ -5,6 +5,8 @@ LOGGING_FORMAT = "[%(asctime)s][%(process)d/%(thread)d][%(levelname)s][%(filenam
 
 # Suffix for cache files, this is used in multiple places:
 SUFFIX = ".binpb"
+# Suffix for the directories holding the intervals of a partially observed replay:
+CHECKPOINT_SUFFIX = ".checkpoint"
 
 PLOT_DIR = Path("./plots").resolve()
 if not PLOT_DIR.exists():
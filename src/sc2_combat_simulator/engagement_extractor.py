@@ -0,0 +1,178 @@
+import logging
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+
+class SpatialGrid:
+    """
+    Uniform grid over the map positions, answering whether any of the indexed
+    points lies within a radius of a query point. With the cell size equal to
+    the radius, only the 3x3 neighbourhood of the query cell is checked.
+
+    Parameters
+    ----------
+    radius : float
+        Radius of the queries, also used as the cell size.
+    """
+
+    def __init__(self, radius: float) -> None:
+        if radius <= 0:
+            raise ValueError(f"The radius must be positive, got {radius}")
+
+        self._radius = radius
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float]]] = defaultdict(
+            list
+        )
+        self.n_points = 0
+
+    def _get_cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self._radius), math.floor(y / self._radius)
+
+    def add_point(self, x: float, y: float) -> None:
+        self._cells[self._get_cell(x=x, y=y)].append((x, y))
+        self.n_points += 1
+
+    def has_point_within(self, x: float, y: float) -> bool:
+        cell_x, cell_y = self._get_cell(x=x, y=y)
+        squared_radius = self._radius * self._radius
+        for neighbour_x in (cell_x - 1, cell_x, cell_x + 1):
+            for neighbour_y in (cell_y - 1, cell_y, cell_y + 1):
+                for point_x, point_y in self._cells.get((neighbour_x, neighbour_y), ()):
+                    dx = point_x - x
+                    dy = point_y - y
+                    if dx * dx + dy * dy <= squared_radius:
+                        return True
+
+        return False
+
+
+def _get_interval_units(
+    observation: obs_collection_pb.Observation,
+) -> Iterable[sc2proto_raw_pb.Unit]:
+    yield from observation.player1.observation.raw_data.units
+    if observation.HasField("player2"):
+        yield from observation.player2.observation.raw_data.units
+
+
+def get_engaged_positions(
+    observation_interval: obs_collection_pb.ObservationInterval,
+) -> List[Tuple[float, float]]:
+    """
+    Acquires the positions of the units taking part in the combat. A unit is
+    engaged when it lost health or shields, died, or its weapon was on cooldown
+    (it just attacked) at any point of the interval. The weapon cooldown is
+    only reported for the units of the observing player.
+
+    Parameters
+    ----------
+    observation_interval : obs_collection_pb.ObservationInterval
+        Observation interval containing the observations of the combat.
+
+    Returns
+    -------
+    List[Tuple[float, float]]
+        Returns the positions of the engaged units, including their positions
+        in the first observation of the interval.
+    """
+
+    first_positions: Dict[int, Tuple[float, float]] = {}
+    last_positions: Dict[int, Tuple[float, float]] = {}
+    last_vitality: Dict[int, float] = {}
+    engaged_tags = set()
+    engaged_positions = []
+
+    for observation_index, observation in enumerate(observation_interval.observations):
+        observed_tags = set()
+        for unit in _get_interval_units(observation=observation):
+            if unit.owner not in (1, 2) or unit.tag in observed_tags:
+                continue
+            observed_tags.add(unit.tag)
+
+            position = (unit.pos.x, unit.pos.y)
+            vitality = unit.health + unit.shield
+            if observation_index == 0:
+                first_positions[unit.tag] = position
+
+            previous_vitality = last_vitality.get(unit.tag)
+            took_damage = previous_vitality is not None and vitality < previous_vitality
+            if took_damage or unit.weapon_cooldown > 0:
+                engaged_tags.add(unit.tag)
+                engaged_positions.append(position)
+
+            last_positions[unit.tag] = position
+            last_vitality[unit.tag] = vitality
+
+        # Units that disappeared during the interval were killed where last seen:
+        if observation_index > 0:
+            for tag in set(last_positions) - observed_tags:
+                engaged_tags.add(tag)
+                engaged_positions.append(last_positions.pop(tag))
+                last_vitality.pop(tag, None)
+
+    engaged_positions.extend(
+        first_positions[tag] for tag in engaged_tags if tag in first_positions
+    )
+
+    return engaged_positions
+
+
+def crop_to_engagement(
+    player_units_map_state: PlayerUnitsMapState,
+    observation_interval: obs_collection_pb.ObservationInterval,
+    engagement_radius: float,
+) -> PlayerUnitsMapState:
+    """
+    Keeps only the units of a scenario that are within a radius of the units
+    engaged in the combat, dropping the units elsewhere on the map,
+    such as the workers and buildings of the bases.
+
+    Parameters
+    ----------
+    player_units_map_state : PlayerUnitsMapState
+        Units of both players at the start of the interval.
+    observation_interval : obs_collection_pb.ObservationInterval
+        Observation interval containing the observations of the combat.
+    engagement_radius : float
+        Maximum distance of a kept unit from an engaged position.
+
+    Returns
+    -------
+    PlayerUnitsMapState
+        Returns the cropped scenario, or the scenario unchanged
+        if no engaged units were found.
+    """
+
+    engaged_positions = get_engaged_positions(observation_interval=observation_interval)
+    if not engaged_positions:
+        logging.warning(
+            f"No engaged units found in interval {observation_interval.start_time}-{observation_interval.end_time}, keeping all of the units."
+        )
+        return player_units_map_state
+
+    spatial_grid = SpatialGrid(radius=engagement_radius)
+    for x, y in engaged_positions:
+        spatial_grid.add_point(x=x, y=y)
+
+    def crop_units(
+        units: Iterable[sc2proto_raw_pb.Unit],
+    ) -> List[sc2proto_raw_pb.Unit]:
+        return [
+            unit
+            for unit in units
+            if spatial_grid.has_point_within(x=unit.pos.x, y=unit.pos.y)
+        ]
+
+    return PlayerUnitsMapState(
+        player1_units=crop_units(units=player_units_map_state.player1_units),
+        player2_units=crop_units(units=player_units_map_state.player2_units),
+        player1_map_state=player_units_map_state.player1_map_state,
+        player2_map_state=player_units_map_state.player2_map_state,
+    )
@@ -0,0 +1,409 @@
+import itertools
+import math
+from typing import Any, Iterable, List, Mapping, Sequence, Set, Tuple
+
+import numpy as np
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+
+from sc2_combat_simulator.function_results.arena_placement import ArenaPlacement
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+# Minimal distance in map cells between the units of an arena and its border,
+# on top of half of the largest weapon or sight range of the units:
+ARENA_MARGIN = 8.0
+
+
+def get_scenario_bounds(
+    player_units_map_state: PlayerUnitsMapState,
+) -> Tuple[float, float, float, float]:
+    """
+    Acquires the bounding box of the units of both players.
+
+    Parameters
+    ----------
+    player_units_map_state : PlayerUnitsMapState
+        Scenario with the units of both players.
+
+    Returns
+    -------
+    Tuple[float, float, float, float]
+        Returns the bounds as (min_x, min_y, max_x, max_y).
+
+    Raises
+    ------
+    ValueError
+        Raises an error when the scenario has no units.
+    """
+
+    units = list(player_units_map_state.player1_units) + list(
+        player_units_map_state.player2_units
+    )
+    if not units:
+        raise ValueError("Cannot place a scenario without any units!")
+
+    xs = [unit.pos.x for unit in units]
+    ys = [unit.pos.y for unit in units]
+
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def translate_units(
+    units: Iterable[sc2proto_raw_pb.Unit],
+    offset_x: float,
+    offset_y: float,
+) -> List[sc2proto_raw_pb.Unit]:
+    translated_units = []
+    for unit in units:
+        translated_unit = sc2proto_raw_pb.Unit()
+        translated_unit.CopyFrom(unit)
+        translated_unit.pos.x += offset_x
+        translated_unit.pos.y += offset_y
+        translated_units.append(translated_unit)
+
+    return translated_units
+
+
+def is_placement_pathable(
+    player_units_map_state: PlayerUnitsMapState,
+    pathing_grid: np.ndarray,
+) -> bool:
+    """
+    Checks if all of the ground units of a translated scenario stand on pathable cells.
+
+    Parameters
+    ----------
+    player_units_map_state : PlayerUnitsMapState
+        Scenario with the translated unit positions.
+    pathing_grid : np.ndarray
+        Pathing grid of the map indexed as [y, x], non-zero cells are pathable.
+
+    Returns
+    -------
+    bool
+        Returns True if none of the ground units would be spawned on unpathable terrain.
+    """
+
+    height, width = pathing_grid.shape
+    units = list(player_units_map_state.player1_units) + list(
+        player_units_map_state.player2_units
+    )
+    for unit in units:
+        if unit.is_flying:
+            continue
+
+        x = int(unit.pos.x)
+        y = int(unit.pos.y)
+        if not (0 <= x < width and 0 <= y < height):
+            return False
+        if not pathing_grid[y, x]:
+            return False
+
+    return True
+
+
+def get_arena_margin(
+    player_units_map_states: Sequence[PlayerUnitsMapState],
+    unit_type_data: Mapping[int, Any],
+    margin: float = ARENA_MARGIN,
+) -> float:
+    """
+    Acquires the distance between the units of an arena and its border, so that
+    the units of neighbouring arenas start out of the weapon and sight ranges
+    of each other.
+
+    Parameters
+    ----------
+    player_units_map_states : Sequence[PlayerUnitsMapState]
+        Scenarios to be placed in the arenas.
+    unit_type_data : Mapping[int, Any]
+        Unit type data of the game keyed by the unit type ids.
+    margin : float, optional
+        Distance kept on top of the ranges, by default ARENA_MARGIN
+
+    Returns
+    -------
+    float
+        Returns the margin plus half of the largest weapon or sight range
+        of the units, units without type data are skipped.
+    """
+
+    largest_range = 0.0
+    for player_units_map_state in player_units_map_states:
+        units = itertools.chain(
+            player_units_map_state.player1_units, player_units_map_state.player2_units
+        )
+        for unit in units:
+            unit_data = unit_type_data.get(unit.unit_type)
+            if unit_data is None:
+                continue
+            unit_ranges = [weapon.range for weapon in unit_data.weapons]
+            largest_range = max(largest_range, unit_data.sight_range, *unit_ranges)
+
+    # The units of two neighbouring arenas are two margins apart:
+    return margin + largest_range / 2
+
+
+def get_free_cells(
+    n_arenas: int,
+    playable_area: Tuple[float, float, float, float],
+    excluded_locations: Sequence[Tuple[float, float]],
+    margin: float,
+) -> List[Tuple[float, float, float, float]]:
+    """
+    Splits the playable area into the smallest grid that has enough cells
+    without any of the excluded locations.
+
+    Parameters
+    ----------
+    n_arenas : int
+        Number of the arenas to be placed.
+    playable_area : Tuple[float, float, float, float]
+        Playable area of the map as (min_x, min_y, max_x, max_y).
+    excluded_locations : Sequence[Tuple[float, float]]
+        Locations (x, y) that must be at least the margin away from the cells.
+    margin : float
+        Minimal distance between the excluded locations and the cells.
+
+    Returns
+    -------
+    List[Tuple[float, float, float, float]]
+        Returns the bounds of the free cells filled row by row,
+        at least n_arenas of them.
+
+    Raises
+    ------
+    ValueError
+        Raises an error when the cells would become too small to hold any units
+        before there are enough free cells.
+    """
+
+    area_min_x, area_min_y, area_max_x, area_max_y = playable_area
+    for n_cells in itertools.count(n_arenas):
+        n_columns = math.ceil(math.sqrt(n_cells))
+        n_rows = math.ceil(n_cells / n_columns)
+        cell_width = (area_max_x - area_min_x) / n_columns
+        cell_height = (area_max_y - area_min_y) / n_rows
+        # Smaller cells cannot hold any units:
+        if cell_width <= 2 * margin or cell_height <= 2 * margin:
+            raise ValueError(
+                f"Cannot place {n_arenas} arenas away from the excluded locations"
+            )
+
+        free_cells = []
+        for row in range(n_rows):
+            for column in range(n_columns):
+                cell_bounds = (
+                    area_min_x + column * cell_width,
+                    area_min_y + row * cell_height,
+                    area_min_x + (column + 1) * cell_width,
+                    area_min_y + (row + 1) * cell_height,
+                )
+                is_excluded = any(
+                    cell_bounds[0] - margin <= x <= cell_bounds[2] + margin
+                    and cell_bounds[1] - margin <= y <= cell_bounds[3] + margin
+                    for x, y in excluded_locations
+                )
+                if not is_excluded:
+                    free_cells.append(cell_bounds)
+
+        if len(free_cells) >= n_arenas:
+            return free_cells
+
+
+def pack_scenarios(
+    player_units_map_states: Sequence[PlayerUnitsMapState],
+    playable_area: Tuple[float, float, float, float],
+    pathing_grid: np.ndarray | None = None,
+    margin: float = ARENA_MARGIN,
+    excluded_locations: Sequence[Tuple[float, float]] = (),
+) -> List[ArenaPlacement]:
+    """
+    Places several scenarios in separate arenas of a single map. The playable
+    area is split into a grid of cells, and each of the scenarios is translated
+    so that the center of its units lands in the center of its own cell.
+    Cells within the margin of an excluded location, such as the start
+    locations of the players, are skipped.
+
+    Parameters
+    ----------
+    player_units_map_states : Sequence[PlayerUnitsMapState]
+        Scenarios observed on the same map and game version.
+    playable_area : Tuple[float, float, float, float]
+        Playable area of the map as (min_x, min_y, max_x, max_y).
+    pathing_grid : np.ndarray | None, optional
+        Pathing grid of the map indexed as [y, x], used to verify that the
+        ground units are not moved onto unpathable terrain, by default None
+    margin : float, optional
+        Minimal distance between the units and the border of their cell,
+        see get_arena_margin, by default ARENA_MARGIN
+    excluded_locations : Sequence[Tuple[float, float]], optional
+        Locations (x, y) that must be at least the margin away from the cells,
+        by default ()
+
+    Returns
+    -------
+    List[ArenaPlacement]
+        Returns one placement per scenario, in the order of the scenarios.
+
+    Raises
+    ------
+    ValueError
+        Raises an error when a scenario does not fit in its cell,
+        or its ground units would be spawned on unpathable terrain.
+    """
+
+    n_arenas = len(player_units_map_states)
+    if n_arenas == 0:
+        return []
+
+    free_cells = get_free_cells(
+        n_arenas=n_arenas,
+        playable_area=playable_area,
+        excluded_locations=excluded_locations,
+        margin=margin,
+    )
+
+    placements = []
+    for index, player_units_map_state in enumerate(player_units_map_states):
+        cell_bounds = free_cells[index]
+        cell_width = cell_bounds[2] - cell_bounds[0]
+        cell_height = cell_bounds[3] - cell_bounds[1]
+        min_x, min_y, max_x, max_y = get_scenario_bounds(
+            player_units_map_state=player_units_map_state
+        )
+        if (
+            max_x - min_x + 2 * margin > cell_width
+            or max_y - min_y + 2 * margin > cell_height
+        ):
+            raise ValueError(
+                f"Scenario {index} does not fit in an arena of {cell_width:.1f}x{cell_height:.1f}"
+            )
+
+        offset_x = (cell_bounds[0] + cell_bounds[2]) / 2 - (min_x + max_x) / 2
+        offset_y = (cell_bounds[1] + cell_bounds[3]) / 2 - (min_y + max_y) / 2
+        translated_state = PlayerUnitsMapState(
+            player1_units=translate_units(
+                units=player_units_map_state.player1_units,
+                offset_x=offset_x,
+                offset_y=offset_y,
+            ),
+            player2_units=translate_units(
+                units=player_units_map_state.player2_units,
+                offset_x=offset_x,
+                offset_y=offset_y,
+            ),
+            player1_map_state=player_units_map_state.player1_map_state,
+            player2_map_state=player_units_map_state.player2_map_state,
+        )
+
+        if pathing_grid is not None and not is_placement_pathable(
+            player_units_map_state=translated_state,
+            pathing_grid=pathing_grid,
+        ):
+            raise ValueError(
+                f"Scenario {index} would place ground units on unpathable terrain"
+            )
+
+        placement = ArenaPlacement(
+            cell_bounds=cell_bounds,
+            offset_x=offset_x,
+            offset_y=offset_y,
+            player_units_map_state=translated_state,
+        )
+        placements.append(placement)
+
+    return placements
+
+
+def combine_placements(placements: Sequence[ArenaPlacement]) -> PlayerUnitsMapState:
+    """
+    Combines the translated scenarios of all of the arenas into a single scenario
+    that can be spawned at once.
+
+    Parameters
+    ----------
+    placements : Sequence[ArenaPlacement]
+        Placements acquired from pack_scenarios.
+
+    Returns
+    -------
+    PlayerUnitsMapState
+        Returns a scenario with the units of all of the arenas.
+    """
+
+    player1_units = []
+    player2_units = []
+    for placement in placements:
+        player1_units.extend(placement.player_units_map_state.player1_units)
+        player2_units.extend(placement.player_units_map_state.player2_units)
+
+    return PlayerUnitsMapState(
+        player1_units=player1_units,
+        player2_units=player2_units,
+        player1_map_state=placements[0].player_units_map_state.player1_map_state,
+        player2_map_state=placements[0].player_units_map_state.player2_map_state,
+    )
+
+
+def get_arena_unit_tags(
+    matched_units: Iterable[Tuple[sc2proto_raw_pb.Unit, sc2proto_raw_pb.Unit]],
+    placements: Sequence[ArenaPlacement],
+) -> List[Set[int]]:
+    """
+    Assigns the spawned units to the arenas of the scenario units they were
+    matched to. The tags stay with their arena when the units leave its cell.
+
+    Parameters
+    ----------
+    matched_units : Iterable[Tuple[sc2proto_raw_pb.Unit, sc2proto_raw_pb.Unit]]
+        Matched (source, spawned) pairs, see spawn_compiler.match_spawned_units.
+    placements : Sequence[ArenaPlacement]
+        Placements of the arenas, the source units are their translated units.
+
+    Returns
+    -------
+    List[Set[int]]
+        Returns the tags of the spawned units for each of the arenas.
+    """
+
+    arena_tags = [set() for _ in placements]
+    for source_unit, spawned_unit in matched_units:
+        for index, placement in enumerate(placements):
+            if placement.contains(x=source_unit.pos.x, y=source_unit.pos.y):
+                arena_tags[index].add(spawned_unit.tag)
+                break
+
+    return arena_tags
+
+
+def split_units_by_arena(
+    units: Iterable[sc2proto_raw_pb.Unit],
+    placements: Sequence[ArenaPlacement],
+) -> List[List[sc2proto_raw_pb.Unit]]:
+    """
+    Assigns the observed units to the arenas by their positions. Units outside
+    of all of the arenas, such as the bases of the players, are dropped.
+
+    Parameters
+    ----------
+    units : Iterable[sc2proto_raw_pb.Unit]
+        Raw units observed in the environment.
+    placements : Sequence[ArenaPlacement]
+        Placements of the arenas.
+
+    Returns
+    -------
+    List[List[sc2proto_raw_pb.Unit]]
+        Returns a list of units for each of the arenas.
+    """
+
+    arena_units = [[] for _ in placements]
+    for unit in units:
+        for index, placement in enumerate(placements):
+            if placement.contains(x=unit.pos.x, y=unit.pos.y):
+                arena_units[index].append(unit)
+                break
+
+    return arena_units
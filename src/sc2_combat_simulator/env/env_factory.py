@@ -0,0 +1,114 @@
+from pathlib import Path
+
+from pysc2_evolved.env import sc2_env
+from pysc2_evolved.env.sc2_env import Agent, Bot
+from sc2_combat_simulator.env.sc2_combat_env import CombatSC2Env
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+from sc2_combat_simulator.register_custom_map import register_custom_map
+from sc2_combat_simulator.settings import (
+    CUSTOM_MAP_DIRECTORY,
+    CUSTOM_MAP_NAME_PREFIX,
+    MAX_IN_PLACE_GAMELOOPS,
+    REPLAY_DIR,
+    STALEMATE_TIMEOUT_GAMELOOPS,
+    STATIC_DATA_CACHE_DIR,
+)
+
+
+def make_combat_env(
+    map_name: str,
+    game_version: str,
+    player_units_map_state: PlayerUnitsMapState,
+    replay_dir: Path = REPLAY_DIR,
+    static_data_cache_dir: Path | None = STATIC_DATA_CACHE_DIR,
+    raw_unit_array_size: int | None = None,
+    instrument_steps: bool = False,
+) -> CombatSC2Env:
+    """
+    Registers the map of the combat and launches an environment
+    with a single agent playing against the built-in bot. The scenarios of the
+    following episodes are spawned into the running game, which is restarted
+    after MAX_IN_PLACE_GAMELOOPS.
+
+    Parameters
+    ----------
+    map_name : str
+        Map hash of the replay in which the combat was observed.
+    game_version : str
+        Game version of the replay in which the combat was observed.
+    player_units_map_state : PlayerUnitsMapState
+        First scenario that will be spawned on reset.
+    replay_dir : Path, optional
+        Directory where the agents' replays will be saved, by default REPLAY_DIR
+    static_data_cache_dir : Path | None, optional
+        Directory where the game info and static data are cached per game version
+        and map, None disables the cache, by default STATIC_DATA_CACHE_DIR
+    raw_unit_array_size : int | None, optional
+        Number of unit slots of the raw unit array observations,
+        None keeps the pysc2 feature observations, by default None
+    instrument_steps : bool, optional
+        Records the latency histograms of the phases of the steps, by default False
+
+    Returns
+    -------
+    CombatSC2Env
+        Returns a running environment, it must be closed by the caller.
+    """
+
+    map_class_name, _ = register_custom_map(
+        map_name=map_name,
+        map_name_prefix=CUSTOM_MAP_NAME_PREFIX,
+        directory=CUSTOM_MAP_DIRECTORY,
+    )
+
+    players = [
+        Agent(race=sc2_env.Race["protoss"], name="NoOpAgent"),
+        Bot(
+            race=sc2_env.Race["protoss"],
+            difficulty=sc2_env.Difficulty["easy"],
+            build=sc2_env.BotBuild["random"],
+        ),
+    ]
+
+    env = CombatSC2Env(
+        map_name=map_class_name,
+        battle_net_map=False,  # Try to get the map from Battle.net (hopefully from cache).
+        players=players,
+        agent_interface_format=sc2_env.parse_agent_interface_format(
+            feature_screen=84,
+            feature_minimap=64,
+            rgb_screen="256",
+            rgb_minimap="128",
+            action_space="raw",
+            use_feature_units=True,
+            use_raw_units=True,
+        ),
+        discount=1.0,
+        discount_zero_after_timeout=False,
+        visualize=False,
+        step_mul=1,
+        realtime=False,
+        save_replay_episodes=0,
+        replay_dir=replay_dir,
+        replay_prefix=None,
+        game_steps_per_episode=0,
+        score_index=-1,
+        score_multiplier=1,
+        random_seed=42,
+        # All of the units must be visible to restore the scenario,
+        # and to detect when the combat is resolved:
+        disable_fog=True,
+        ensure_available_actions=True,
+        version=game_version,
+        player_units_map_state=player_units_map_state,
+        terminate_when_resolved=True,
+        stalemate_timeout_gameloops=STALEMATE_TIMEOUT_GAMELOOPS,
+        static_data_cache_dir=static_data_cache_dir,
+        raw_unit_array_size=raw_unit_array_size,
+        instrument_steps=instrument_steps,
+        max_in_place_game_loop=MAX_IN_PLACE_GAMELOOPS,
+    )
+
+    return env
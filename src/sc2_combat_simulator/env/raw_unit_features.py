@@ -0,0 +1,134 @@
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+from pysc2_evolved.lib import named_array
+from s2clientprotocol import sc2api_pb2 as sc_pb
+
+# Columns of the "raw_units" array, in order:
+RAW_UNIT_FIELDS = (
+    "unit_type",
+    "owner",
+    "x",
+    "y",
+    "health",
+    "shield",
+    "energy",
+    "weapon_cooldown",
+)
+
+# Default number of unit slots, enough for two maxed out armies of zerglings:
+MAX_RAW_UNITS = 512
+
+
+class RawUnitArrayTransform:
+    """
+    Turns the raw units of an observation into fixed-shape NumPy arrays.
+    Raw-action combat agents do not need the screen, minimap and rgb layers
+    built by the pysc2 features, the units are read in a single pass over the
+    observation instead.
+
+    The arrays are preallocated and overwritten by every call to transform_obs,
+    observations that are kept across steps must be copied by the caller.
+
+    Parameters
+    ----------
+    max_units : int, optional
+        Number of unit slots, the units above this limit are dropped,
+        by default MAX_RAW_UNITS
+    """
+
+    def __init__(self, max_units: int = MAX_RAW_UNITS) -> None:
+        self._max_units = max_units
+        self._raw_units = named_array.NamedNumpyArray(
+            np.zeros((max_units, len(RAW_UNIT_FIELDS)), dtype=np.float32),
+            [None, RAW_UNIT_FIELDS],
+        )
+        # Plain view of the same memory, named indexing is slow when filling rows:
+        self._raw_units_buffer = self._raw_units.view(np.ndarray)
+        self._unit_tags = np.zeros(max_units, dtype=np.uint64)
+        self._unit_mask = np.zeros(max_units, dtype=bool)
+        self._game_loop = np.zeros(1, dtype=np.int32)
+        self._score_cumulative = np.zeros(1, dtype=np.int32)
+        self._unit_count = 0
+        self._truncation_logged = False
+
+        self._observation = named_array.NamedDict(
+            raw_units=self._raw_units,
+            unit_tags=self._unit_tags,
+            unit_mask=self._unit_mask,
+            game_loop=self._game_loop,
+            score_cumulative=self._score_cumulative,
+        )
+
+    def observation_spec(self) -> Dict[str, Tuple[int, ...]]:
+        """
+        Returns the shapes of the transformed observation, see transform_obs.
+        """
+
+        return {
+            "raw_units": (self._max_units, len(RAW_UNIT_FIELDS)),
+            "unit_tags": (self._max_units,),
+            "unit_mask": (self._max_units,),
+            "game_loop": (1,),
+            "score_cumulative": (1,),
+        }
+
+    def transform_obs(self, obs: sc_pb.ResponseObservation) -> named_array.NamedDict:
+        """
+        Fills the preallocated arrays with the raw units of an observation.
+
+        Parameters
+        ----------
+        obs : sc_pb.ResponseObservation
+            Observation acquired from the game with the raw interface enabled.
+
+        Returns
+        -------
+        named_array.NamedDict
+            Returns the arrays "raw_units" (one row per unit, see RAW_UNIT_FIELDS),
+            "unit_tags", "unit_mask" marking the filled rows, "game_loop",
+            and "score_cumulative" holding the curriculum score.
+        """
+
+        observation = obs.observation
+        units = observation.raw_data.units
+        if len(units) > self._max_units and not self._truncation_logged:
+            logging.warning(
+                f"Observed {len(units)} units, only the first {self._max_units} are kept."
+            )
+            self._truncation_logged = True
+
+        rows = []
+        tags = []
+        for unit in units[: self._max_units]:
+            rows.append(
+                (
+                    unit.unit_type,
+                    unit.owner,
+                    unit.pos.x,
+                    unit.pos.y,
+                    unit.health,
+                    unit.shield,
+                    unit.energy,
+                    unit.weapon_cooldown,
+                )
+            )
+            tags.append(unit.tag)
+
+        unit_count = len(rows)
+        if unit_count:
+            self._raw_units_buffer[:unit_count] = rows
+            self._unit_tags[:unit_count] = tags
+        # Only the rows filled by the previous observation need to be cleared:
+        if unit_count < self._unit_count:
+            self._raw_units_buffer[unit_count : self._unit_count] = 0
+            self._unit_tags[unit_count : self._unit_count] = 0
+        self._unit_mask[:unit_count] = True
+        self._unit_mask[unit_count:] = False
+        self._unit_count = unit_count
+
+        self._game_loop[0] = observation.game_loop
+        self._score_cumulative[0] = observation.score.score
+
+        return self._observation
@@ -15,14 +15,17 @@
 # pylint: disable=g-complex-comprehension
 
 import collections
+import contextlib
 import copy
 import logging
+import os
 import random
 import time
+from pathlib import Path
 from typing import Sequence
 
 from s2clientprotocol import sc2api_pb2 as sc_pb
-from s2clientprotocol import common_pb2 as sc_common
+from s2clientprotocol import data_pb2 as sc_data
 from s2clientprotocol import debug_pb2 as d_pb
 
 from pysc2_evolved import maps, run_configs
@@ -34,11 +37,19 @@ from pysc2_evolved.lib import (
     portspicker,
     renderer_human,
     run_parallel,
+    static_data,
     stopwatch,
 )
 
 from pysc2_evolved.env.sc2_env import Agent, Bot
 
+from sc2_combat_simulator.env import (
+    arena_packing,
+    raw_unit_features,
+    spawn_compiler,
+    static_data_cache,
+    step_instrumentation,
+)
 from sc2_combat_simulator.function_results.player_units_map_state import (
     PlayerUnitsMapState,
 )
@@ -93,6 +104,9 @@ _DelayedAction = collections.namedtuple("DelayedAction", ["game_loop", "action"]
 
 REALTIME_GAME_LOOP_SECONDS = 1 / 22.4
 MAX_STEP_COUNT = 524000  # The game fails above 2^19=524288 steps.
+# By default scenarios are spawned into the running game until it reaches this
+# game loop, later the game is restarted to leave room for the episodes:
+MAX_IN_PLACE_GAME_LOOP = MAX_STEP_COUNT // 2
 NUM_ACTION_DELAY_BUCKETS = 10
 
 
@@ -128,6 +142,13 @@ class CombatSC2Env(environment.Base):
         ensure_available_actions: bool = True,
         version: str | None = None,
         player_units_map_state: PlayerUnitsMapState,
+        terminate_when_resolved: bool = False,
+        stalemate_timeout_gameloops: int | None = None,
+        static_data_cache_dir: str | Path | None = None,
+        raw_unit_array_size: int | None = None,
+        instrument_steps: bool = False,
+        step_instrumentation_dir: str | Path | None = None,
+        max_in_place_game_loop: int | None = MAX_IN_PLACE_GAME_LOOP,
     ) -> None:
         """Create a SC2 Env.
 
@@ -186,6 +207,30 @@ class CombatSC2Env(environment.Base):
           ensure_available_actions: Whether to throw an exception when an
               unavailable action is passed to step().
           version: The version of SC2 to use, defaults to the latest.
+          player_units_map_state: The scenario that is spawned on every reset.
+          terminate_when_resolved: Whether to end the episode as soon as one of the
+              players has no units left. The player with units left wins.
+          stalemate_timeout_gameloops: End the episode as a tie when no damage was
+              dealt for this many game loops. None means no timeout.
+          static_data_cache_dir: Directory where the game info and the static
+              data are cached per game version and map. Only the first game of a
+              version and map requests them from the game. The cached game info
+              does not contain the start locations, which depend on the random
+              start location of each game. None means no cache.
+          raw_unit_array_size: If set, the agents observe the raw units as
+              padded NumPy arrays with this many unit slots instead of the pysc2
+              feature layers, see `RawUnitArrayTransform`. The arrays are reused
+              between steps. Requires the raw interface.
+          instrument_steps: Whether to record latency histograms of the phases of
+              each step, see `step_latency_summary`. The histograms are logged
+              when the environment is closed.
+          step_instrumentation_dir: Directory where the latency histograms are
+              written as JSON when the environment is closed. Requires
+              instrument_steps.
+          max_in_place_game_loop: Game loop until which the scenarios of the
+              next episodes are spawned into the running game, afterwards the
+              game is restarted, see `reset`. None restarts the game on every
+              reset.
 
         Raises:
           ValueError: if no map is specified.
@@ -256,6 +301,12 @@ class CombatSC2Env(environment.Base):
         self._parallel = run_parallel.RunParallel()  # Needed for multiplayer.
         self._game_info = None
         self._requested_races = None
+        self._spawn_verification = None
+        self._scenario_tags = None
+        self._static_data_cache_dir = (
+            Path(static_data_cache_dir) if static_data_cache_dir else None
+        )
+        self._game_data = None
 
         if agent_interface_format is None:
             raise ValueError("Please specify agent_interface_format.")
@@ -282,6 +333,43 @@ class CombatSC2Env(environment.Base):
         ]
 
         self._player_units_map_state = player_units_map_state
+        self._arena_placements = None
+        self._reset_arena_results()
+
+        self._max_in_place_game_loop = max_in_place_game_loop
+        self._terminate_when_resolved = terminate_when_resolved
+        self._stalemate_timeout_gameloops = stalemate_timeout_gameloops
+        self._structure_unit_types = None
+        if (
+            terminate_when_resolved or stalemate_timeout_gameloops
+        ) and not self._interface_options[0].raw:
+            raise ValueError(
+                "Ending the episode when the combat is resolved requires the raw "
+                "interface, please set use_raw_units in the agent_interface_format."
+            )
+
+        if raw_unit_array_size and not all(
+            interface.raw for interface in self._interface_options
+        ):
+            raise ValueError(
+                "Raw unit array observations require the raw interface, "
+                "please set use_raw_units in the agent_interface_format."
+            )
+        self._raw_unit_transforms = None
+        if raw_unit_array_size:
+            self._raw_unit_transforms = [
+                raw_unit_features.RawUnitArrayTransform(max_units=raw_unit_array_size)
+                for _ in self._interface_options
+            ]
+
+        self._step_instrumentation = None
+        self._step_instrumentation_dir = None
+        if instrument_steps:
+            self._step_instrumentation = step_instrumentation.StepInstrumentation()
+            if step_instrumentation_dir:
+                self._step_instrumentation_dir = Path(step_instrumentation_dir)
+        elif step_instrumentation_dir:
+            raise ValueError("step_instrumentation_dir requires instrument_steps.")
 
         self._launch_game()
         self._create_join()
@@ -293,9 +381,7 @@ class CombatSC2Env(environment.Base):
 
         if visualize:
             self._renderer_human = renderer_human.RendererHuman()
-            self._renderer_human.init(
-                self._controllers[0].game_info(), self._controllers[0].data()
-            )
+            self._renderer_human.init(self._game_info[0], self.static_data())
         else:
             self._renderer_human = None
 
@@ -305,6 +391,7 @@ class CombatSC2Env(environment.Base):
         self._last_score = None
         self._total_steps = 0
         self._episode_steps = 0
+        self._episode_start_game_loop = 0
         self._episode_count = 0
         self._obs = [None] * self._num_agents
         self._agent_obs = [None] * self._num_agents
@@ -386,6 +473,8 @@ class CombatSC2Env(environment.Base):
         """Create the game, and join it."""
         map_inst = random.choice(self._maps)
         self._map_name = map_inst.name
+        self._map_hash = map_inst.filename or map_inst.name
+        self._game_data = None
 
         self._step_mul = max(1, self._default_step_mul or map_inst.step_mul)
         self._score_index = get_default(self._default_score_index, map_inst.score_index)
@@ -460,7 +549,20 @@ class CombatSC2Env(environment.Base):
             (c.join_game, join) for c, join in zip(self._controllers, join_reqs)
         )
 
-        self._game_info = self._parallel.run(c.game_info for c in self._controllers)
+        if self._static_data_cache_dir is None:
+            self._game_info = self._parallel.run(c.game_info for c in self._controllers)
+        else:
+            self._game_info = [
+                static_data_cache.get_game_info(
+                    cache_dir=self._static_data_cache_dir,
+                    game_version=self._run_config.version.game_version,
+                    map_hash=self._map_hash,
+                    join_request=join,
+                    player_setup=create.player_setup,
+                    request_fn=c.game_info,
+                )
+                for c, join in zip(self._controllers, join_reqs)
+            ]
         for g, interface in zip(self._game_info, self._interface_options):
             if g.options.render != interface.render:
                 logging.warning(
@@ -483,45 +585,6 @@ class CombatSC2Env(environment.Base):
             if info.type != sc_pb.Observer
         }
 
-        debug_command = []
-        for unit in self._player_units_map_state.player1_units:
-            # Creating the units for player 1:
-            unit_type = unit.unit_type
-            owner = 1
-            init_pos = unit.pos
-
-            pos_2d = sc_common.Point2D(x=init_pos.x, y=init_pos.y)
-
-            debug_create_unit = d_pb.DebugCreateUnit(
-                unit_type=unit_type,
-                owner=owner,
-                pos=pos_2d,
-                quantity=1,
-            )
-
-            command = d_pb.DebugCommand(create_unit=debug_create_unit)
-            debug_command.append(command)
-
-        for unit in self._player_units_map_state.player2_units:
-            # Creating the units for player 2:
-            unit_type = unit.unit_type
-            owner = 2
-            init_pos = unit.pos
-
-            pos_2d = sc_common.Point2D(x=init_pos.x, y=init_pos.y)
-
-            debug_create_unit = d_pb.DebugCreateUnit(
-                unit_type=unit_type,
-                owner=owner,
-                pos=pos_2d,
-                quantity=1,
-            )
-
-            command = d_pb.DebugCommand(create_unit=debug_create_unit)
-            debug_command.append(command)
-
-        self._controllers[0].debug(debug_command)
-
         # REVIEW: Example spawning of units from SMAC v2
         # if not self.random_start:
         #     if ally:
@@ -561,6 +624,291 @@ class CombatSC2Env(environment.Base):
         #     )
         # self._controller.debug(debug_command)
 
+    def _spawn_player_units(self, ignored_tags=None):
+        """Spawns the units of the currently loaded scenario for both players.
+
+        All of the units are created by a single debug request. With the raw
+        interface the spawned units are matched to the scenario, and their health,
+        shields and energy are restored by a second request. The restored units are
+        then compared against the scenario, see `spawn_verification`.
+
+        The tags of the matched units are kept per arena, only these units are
+        used to decide if the combats are over. The units of the map, such as the starting
+        workers, and the units trained by the bot are never tracked.
+
+        Args:
+          ignored_tags: Tags of the units that existed before the spawn. If None,
+            the units existing before the spawn are observed.
+        """
+        self._scenario_tags = None
+        if not self._interface_options[0].raw:
+            self._spawn_verification = None
+            spawn_commands = spawn_compiler.compile_spawn_commands(
+                player_units_map_state=self._player_units_map_state
+            )
+            if spawn_commands:
+                self._controllers[0].debug(spawn_commands)
+            return
+
+        if ignored_tags is None:
+            ignored_tags = {
+                unit.tag
+                for unit in self._controllers[0].observe().observation.raw_data.units
+            }
+
+        spawn_commands = spawn_compiler.compile_spawn_commands(
+            player_units_map_state=self._player_units_map_state
+        )
+        if not spawn_commands:
+            self._scenario_tags = [set() for _ in self._arena_results]
+            return
+
+        self._controllers[0].debug(spawn_commands)
+
+        # Debug commands are applied on the next game loop:
+        self._parallel.run((c.step, 1) for c in self._controllers)
+        observed_units = self._controllers[0].observe().observation.raw_data.units
+
+        matched_units, _, _ = spawn_compiler.match_spawned_units(
+            player_units_map_state=self._player_units_map_state,
+            observed_units=observed_units,
+            ignored_tags=ignored_tags,
+        )
+        if self._arena_placements is None:
+            self._scenario_tags = [
+                {spawned_unit.tag for _, spawned_unit in matched_units}
+            ]
+        else:
+            self._scenario_tags = arena_packing.get_arena_unit_tags(
+                matched_units=matched_units, placements=self._arena_placements
+            )
+        unit_value_commands = spawn_compiler.compile_unit_value_commands(
+            matched_units=matched_units
+        )
+        if unit_value_commands:
+            self._controllers[0].debug(unit_value_commands)
+            self._parallel.run((c.step, 1) for c in self._controllers)
+            observed_units = self._controllers[0].observe().observation.raw_data.units
+
+        self._spawn_verification = spawn_compiler.verify_spawned_units(
+            player_units_map_state=self._player_units_map_state,
+            observed_units=observed_units,
+            ignored_tags=ignored_tags,
+        )
+        if not self._spawn_verification.is_exact:
+            logging.warning(
+                "Spawned units differ from the scenario: %s", self._spawn_verification
+            )
+
+    @property
+    def spawn_verification(self):
+        """Differences between the last spawned scenario and the environment."""
+        return self._spawn_verification
+
+    def _kill_scenario_units(self):
+        """Kills the surviving units spawned for the loaded scenarios.
+
+        Only the units tracked since the spawn are killed, see
+        `_spawn_player_units`. The units of the bases of the players are left
+        alone, the game would end with the loss of all of the structures.
+
+        Returns:
+          The set of the tags of all of the units observed before the kill, they
+          are ignored when matching the units of the next spawn.
+        """
+        if not self._interface_options[0].raw:
+            raise ValueError(
+                "Killing the units in place requires the raw interface, "
+                "please set use_raw_units in the agent_interface_format."
+            )
+
+        observation = self._controllers[0].observe()
+        observed_units = observation.observation.raw_data.units
+        scenario_tags = set().union(*(self._scenario_tags or []))
+        killed_tags = [unit.tag for unit in observed_units if unit.tag in scenario_tags]
+        if killed_tags:
+            self._controllers[0].debug(
+                d_pb.DebugCommand(kill_unit=d_pb.DebugKillUnit(tag=killed_tags))
+            )
+
+        return {unit.tag for unit in observed_units}
+
+    def load_scenario(
+        self, player_units_map_state: PlayerUnitsMapState, respawn: bool = True
+    ):
+        """Loads a new scenario into the running game.
+
+        The scenario is spawned again on every reset. If it is loaded during an
+        episode, the surviving units of the previous scenario are killed and the
+        new units are spawned in place, without restarting the game. The units
+        of the bases of the players are kept. Only the observed units can be
+        killed, the fog of war should be disabled to remove all of them.
+
+        Args:
+          player_units_map_state: Units of both players that should be placed on
+            the map.
+          respawn: Whether to spawn the scenario in place during an episode. If
+            False, the scenario is only spawned by the next reset, which should
+            follow right away.
+        """
+        self._player_units_map_state = player_units_map_state
+        self._arena_placements = None
+        if respawn:
+            self._respawn_if_running()
+
+    def load_scenarios(self, player_units_map_states, respawn=True):
+        """Loads several independent scenarios into separate arenas of one game.
+
+        The scenarios must come from the same map and game version. The playable
+        area is split into a grid of arenas, and the units of each scenario are
+        translated into their own arena, so that a single game step advances all
+        of them. The results of the arenas are tracked separately, see
+        `arena_results`, and the episode ends when all of them are resolved.
+
+        The arenas are separated by more than the largest weapon or sight range
+        of the units, and the arenas around the start locations of the players
+        are skipped, see `_get_start_locations`.
+
+        Args:
+          player_units_map_states: Scenarios that should be placed on the map.
+          respawn: Whether to spawn the scenarios in place during an episode,
+            see `load_scenario`.
+
+        Raises:
+          ValueError: If a scenario does not fit in its arena, or its ground units
+            would be placed on unpathable terrain.
+        """
+        start_raw = self._game_info[0].start_raw
+        playable_area = (
+            start_raw.playable_area.p0.x,
+            start_raw.playable_area.p0.y,
+            start_raw.playable_area.p1.x,
+            start_raw.playable_area.p1.y,
+        )
+        pathing_grid = None
+        if start_raw.HasField("pathing_grid"):
+            pathing_grid = features.Feature.unpack_layer(start_raw.pathing_grid)
+
+        unit_type_data = {
+            unit_data.unit_id: unit_data for unit_data in self._get_game_data().units
+        }
+        arena_placements = arena_packing.pack_scenarios(
+            player_units_map_states=player_units_map_states,
+            playable_area=playable_area,
+            pathing_grid=pathing_grid,
+            margin=arena_packing.get_arena_margin(
+                player_units_map_states=player_units_map_states,
+                unit_type_data=unit_type_data,
+            ),
+            excluded_locations=self._get_start_locations(),
+        )
+        self._player_units_map_state = arena_packing.combine_placements(
+            placements=arena_placements
+        )
+        self._arena_placements = arena_placements
+        if respawn:
+            self._respawn_if_running()
+
+    def _get_start_locations(self):
+        """Locations of the bases of the players.
+
+        The start locations of the game info are stripped when it is cached, so
+        with the raw interface the structures of the players that were not
+        spawned for a scenario are observed too.
+
+        Returns:
+          A list of (x, y) locations.
+        """
+        start_locations = [
+            (point.x, point.y) for point in self._game_info[0].start_raw.start_locations
+        ]
+        if self._interface_options[0].raw:
+            scenario_tags = set().union(*(self._scenario_tags or []))
+            structure_unit_types = self._get_structure_unit_types()
+            start_locations.extend(
+                (unit.pos.x, unit.pos.y)
+                for unit in self._controllers[0].observe().observation.raw_data.units
+                if unit.owner in (1, 2)
+                and unit.unit_type in structure_unit_types
+                and unit.tag not in scenario_tags
+            )
+
+        return start_locations
+
+    def _reset_arena_results(self):
+        n_arenas = len(self._arena_placements or [None])
+        self._arena_results = [None] * n_arenas
+        self._last_damage_game_loop = [None] * n_arenas
+        self._last_vitality = [None] * n_arenas
+
+    def _respawn_if_running(self):
+        episode_running = (
+            self._episode_count > 0
+            and self._state != environment.StepType.LAST
+            and not self._controllers[0].status_ended
+        )
+        # The units of the previous scenarios are killed while they are tracked:
+        ignored_tags = self._kill_scenario_units() if episode_running else None
+
+        # The arenas of the new scenarios are tracked from scratch:
+        self._reset_arena_results()
+        self._scenario_tags = None
+        if episode_running:
+            self._spawn_player_units(ignored_tags=ignored_tags)
+
+    @property
+    def arena_placements(self):
+        """Placements of the loaded scenarios, or None for a single scenario."""
+        return self._arena_placements
+
+    @property
+    def arena_results(self):
+        """Result of each arena: the winner id, 0 for a tie, or None if ongoing."""
+        return list(self._arena_results)
+
+    def get_scenario_units(self, agent_index=0):
+        """Splits the surviving units spawned for the scenarios between the arenas.
+
+        Only the units matched to the scenarios when they were spawned are
+        returned, see `_spawn_player_units`. The units stay assigned to their
+        arena when they leave its cell.
+
+        Args:
+          agent_index: Index of the agent whose last observation is used.
+
+        Returns:
+          A list with the raw units of each arena, the lists are empty if the
+          units could not be tracked without the raw interface.
+        """
+        units = self._obs[agent_index].observation.raw_data.units
+        if self._scenario_tags is None:
+            return [[] for _ in self._arena_results]
+
+        return [
+            [unit for unit in units if unit.tag in arena_tags]
+            for arena_tags in self._scenario_tags
+        ]
+
+    def get_arena_units(self, agent_index=0):
+        """Splits the raw units observed by an agent between the arenas.
+
+        The units are assigned by their positions, the units outside of all of
+        the arenas, such as the bases of the players, are dropped.
+
+        Args:
+          agent_index: Index of the agent whose last observation is used.
+
+        Returns:
+          A list with the raw units of each arena.
+        """
+        units = self._obs[agent_index].observation.raw_data.units
+        if self._arena_placements is None:
+            return [list(units)]
+
+        return arena_packing.split_units_by_arena(
+            units=units, placements=self._arena_placements
+        )
+
     @property
     def map_name(self):
         return self._map_name
@@ -571,11 +919,32 @@ class CombatSC2Env(environment.Base):
         return self._game_info
 
     def static_data(self):
-        return self._controllers[0].data()
+        return static_data.StaticData(self._get_game_data())
+
+    def _get_game_data(self):
+        """The raw static data of the game, cached per game version and map."""
+        if self._game_data is None:
+            if self._static_data_cache_dir is None:
+                self._game_data = self._controllers[0].data_raw()
+            else:
+                self._game_data = static_data_cache.get_game_data(
+                    cache_dir=self._static_data_cache_dir,
+                    game_version=self._run_config.version.game_version,
+                    map_hash=self._map_hash,
+                    request_fn=self._controllers[0].data_raw,
+                )
+
+        return self._game_data
+
+    def _get_observation_transforms(self):
+        # Actions are always transformed by the pysc2 features:
+        if self._raw_unit_transforms is not None:
+            return self._raw_unit_transforms
+        return self._features
 
     def observation_spec(self):
         """Look at Features for full specs."""
-        return tuple(f.observation_spec() for f in self._features)
+        return tuple(f.observation_spec() for f in self._get_observation_transforms())
 
     def action_spec(self):
         """Look at Features for full specs."""
@@ -597,6 +966,21 @@ class CombatSC2Env(environment.Base):
 
         return self._action_delays
 
+    def _can_swap_in_place(self):
+        """Whether the next episode can be spawned into the running game.
+
+        Swapping the scenario kills the tracked units of the previous scenario,
+        which requires the raw interface. The game is restarted once it has
+        ended, e.g. when the base of a player was destroyed, or when it reached
+        max_in_place_game_loop.
+        """
+        return (
+            self._max_in_place_game_loop is not None
+            and self._interface_options[0].raw
+            and not self._controllers[0].status_ended
+            and self._episode_steps < self._max_in_place_game_loop
+        )
+
     def _restart(self):
         if (
             len(self._players) == 1
@@ -612,11 +996,37 @@ class CombatSC2Env(environment.Base):
 
     @sw.decorate
     def reset(self):
-        """Start a new episode."""
-        self._episode_steps = 0
-        if self._episode_count:
+        """Start a new episode.
+
+        With the raw interface the game keeps running between the episodes.
+        The surviving units of the previous scenario are killed and the loaded
+        scenario is spawned in place, so creating and joining the game and
+        loading the map are paid only once per environment. The units of the
+        bases of the players are kept. The game is restarted only if it has
+        ended, or without the raw interface, see `_can_swap_in_place`.
+
+        The spawn advances the game by 1 game loop to create the units, and by
+        1 more if their health, shields or energy have to be restored. The game
+        loop of the observations is not reset by an in-place swap, the FIRST
+        observation is 1 or 2 game loops after the end of the previous episode,
+        or at game loop 1 or 2 after a restart.
+        """
+        ignored_tags = None
+        if not self._episode_count:
             # No need to restart for the first episode.
+            self._episode_start_game_loop = 0
+        elif self._can_swap_in_place():
+            ignored_tags = self._kill_scenario_units()
+            # Actions delayed in the previous episode target the killed units:
+            for delayed_actions in self._delayed_actions:
+                delayed_actions.clear()
+            self._episode_start_game_loop = self._episode_steps
+        else:
             self._restart()
+            self._episode_start_game_loop = 0
+        self._episode_steps = self._episode_start_game_loop
+
+        self._spawn_player_units(ignored_tags=ignored_tags)
 
         self._episode_count += 1
         races = [Race(r).name for _, r in sorted(self._requested_races.items())]
@@ -629,6 +1039,9 @@ class CombatSC2Env(environment.Base):
         self._metrics.increment_episode()
 
         self._last_score = [0] * self._num_agents
+        self._reset_arena_results()
+        if self._step_instrumentation is not None:
+            self._step_instrumentation.start_episode()
         self._state = environment.StepType.FIRST
         if self._realtime:
             self._last_step_time = time.time()
@@ -654,25 +1067,56 @@ class CombatSC2Env(environment.Base):
         if self._state == environment.StepType.LAST:
             return self.reset()
 
-        skip = not self._ensure_available_actions
-        actions = [
-            [
-                f.transform_action(o.observation, a, skip_available=skip)
-                for a in to_list(acts)
-            ]
-            for f, o, acts in zip(self._features, self._obs, actions)
-        ]
+        with self._measure("step"):
+            skip = not self._ensure_available_actions
+            with self._measure("transform_action"):
+                actions = [
+                    [
+                        f.transform_action(o.observation, a, skip_available=skip)
+                        for a in to_list(acts)
+                    ]
+                    for f, o, acts in zip(self._features, self._obs, actions)
+                ]
+
+            if not self._realtime:
+                with self._measure("apply_action_delays"):
+                    actions = self._apply_action_delays(actions)
+
+            with self._measure("send_actions"):
+                self._parallel.run(
+                    (c.actions, sc_pb.RequestAction(actions=a))
+                    for c, a in zip(self._controllers, actions)
+                )
 
-        if not self._realtime:
-            actions = self._apply_action_delays(actions)
+            self._state = environment.StepType.MID
+            return self._step(step_mul)
 
-        self._parallel.run(
-            (c.actions, sc_pb.RequestAction(actions=a))
-            for c, a in zip(self._controllers, actions)
-        )
+    def _measure(self, phase):
+        if self._step_instrumentation is None:
+            return contextlib.nullcontext()
+        return self._step_instrumentation.measure(phase)
+
+    def step_latency_summary(self, episode=False):
+        """Latency of the phases of the steps, requires instrument_steps.
 
-        self._state = environment.StepType.MID
-        return self._step(step_mul)
+        The phases are: "step" (the whole call), "transform_action",
+        "apply_action_delays", "send_actions", "send_delayed_actions",
+        "step_to" (the game advancing), "observe" (requesting an observation),
+        "transform_obs" (agent observation transform) and "process_observation"
+        (rewards and termination).
+
+        Args:
+          episode: Whether to summarize only the current episode.
+
+        Returns:
+          A dict of `PhaseLatencySummary` keyed by the phase names.
+
+        Raises:
+          ValueError: If the environment was created without instrument_steps.
+        """
+        if self._step_instrumentation is None:
+            raise ValueError("Step latency requires instrument_steps.")
+        return self._step_instrumentation.get_summary(episode=episode)
 
     def _step(self, step_mul=None):
         step_mul = step_mul or self._step_mul
@@ -743,29 +1187,36 @@ class CombatSC2Env(environment.Base):
                     actions.append(delayed_action.action)
                 else:
                     actions.append(None)
-            self._parallel.run((c.act, a) for c, a in zip(self._controllers, actions))
+            with self._measure("send_delayed_actions"):
+                self._parallel.run(
+                    (c.act, a) for c, a in zip(self._controllers, actions)
+                )
 
     def _step_to(self, game_loop, current_game_loop):
         step_mul = game_loop - current_game_loop
         if step_mul < 0:
             raise ValueError("We should never need to step backwards")
         if step_mul > 0:
-            with self._metrics.measure_step_time(step_mul):
+            with self._metrics.measure_step_time(step_mul), self._measure("step_to"):
                 if not self._controllers[0].status_ended:  # May already have ended.
                     self._parallel.run((c.step, step_mul) for c in self._controllers)
 
     def _get_observations(self, target_game_loop):
         # Transform in the thread so it runs while waiting for other observations.
         def parallel_observe(c, f):
-            obs = c.observe(target_game_loop=target_game_loop)
-            agent_obs = f.transform_obs(obs)
+            with self._measure("observe"):
+                obs = c.observe(target_game_loop=target_game_loop)
+            with self._measure("transform_obs"):
+                agent_obs = f.transform_obs(obs)
             return obs, agent_obs
 
         with self._metrics.measure_observation_time():
             self._obs, self._agent_obs = zip(
                 *self._parallel.run(
                     (parallel_observe, c, f)
-                    for c, f in zip(self._controllers, self._features)
+                    for c, f in zip(
+                        self._controllers, self._get_observation_transforms()
+                    )
                 )
             )
 
@@ -807,7 +1258,10 @@ class CombatSC2Env(environment.Base):
 
     def _observe(self, target_game_loop):
         self._get_observations(target_game_loop)
+        with self._measure("process_observation"):
+            return self._process_observations()
 
+    def _process_observations(self):
         # TODO(tewalds): How should we handle more than 2 agents and the case where
         # the episode can end early for some agents?
         outcome = [0] * self._num_agents
@@ -822,10 +1276,22 @@ class CombatSC2Env(environment.Base):
                 for result in o.player_result:
                     if result.player_id == player_id:
                         outcome[i] = possible_results.get(result.result, 0)
+        elif self._terminate_when_resolved or self._stalemate_timeout_gameloops:
+            arena_results = self._get_combat_results()
+            if all(result is not None for result in arena_results):
+                self._state = environment.StepType.LAST
+                discount = 0
+                for i, o in enumerate(self._obs):
+                    player_id = o.observation.player_common.player_id
+                    for combat_result in arena_results:
+                        if combat_result == player_id:
+                            outcome[i] += 1
+                        elif combat_result != 0:
+                            outcome[i] -= 1
 
         if self._score_index >= 0:  # Game score, not win/loss reward.
             cur_score = [_get_score(o, self._score_index) for o in self._agent_obs]
-            if self._episode_steps == 0:  # First reward is always 0.
+            if self._state == environment.StepType.FIRST:  # First reward is always 0.
                 reward = [0] * self._num_agents
             else:
                 reward = [cur - last for cur, last in zip(cur_score, self._last_score)]
@@ -848,7 +1314,10 @@ class CombatSC2Env(environment.Base):
         game_loop = _get_game_loop(self._agent_obs[0])
         self._total_steps += game_loop - self._episode_steps
         self._episode_steps = game_loop
-        if self._episode_steps >= self._episode_length:
+        if (
+            self._episode_steps - self._episode_start_game_loop >= self._episode_length
+            or self._episode_steps >= MAX_STEP_COUNT
+        ):
             self._state = environment.StepType.LAST
             if self._discount_zero_after_timeout:
                 discount = 0.0
@@ -867,7 +1336,7 @@ class CombatSC2Env(environment.Base):
                     "Outcome: %s, reward: %s, score: %s"
                 ),
                 self._episode_count,
-                self._episode_steps,
+                self._episode_steps - self._episode_start_game_loop,
                 outcome,
                 reward,
                 [_get_score(o) for o in self._agent_obs],
@@ -886,6 +1355,97 @@ class CombatSC2Env(environment.Base):
             for r, o in zip(reward, self._agent_obs)
         )
 
+    def _get_structure_unit_types(self):
+        if self._structure_unit_types is None:
+            unit_type_data = self._get_game_data().units
+            self._structure_unit_types = {
+                unit_data.unit_id
+                for unit_data in unit_type_data
+                if sc_data.Attribute.Structure in unit_data.attributes
+            }
+
+        return self._structure_unit_types
+
+    def _get_combat_results(self):
+        """Checks if the combats of the loaded scenarios are over.
+
+        The units are read from the observation of the first agent, the fog of war
+        should be disabled so that all of the enemy units are counted. Only the
+        spawned units of the scenarios that are not structures are counted, see
+        `get_scenario_units`. An arena keeps its result once it is resolved.
+        Without the raw interface the spawned units are not tracked, and the
+        combats are never resolved.
+
+        Returns:
+          A list with the result of each arena: the id of the player that won the
+          combat, 0 for a tie, or None if the combat is still going on.
+        """
+        # The units are spawned by the reset, the first observation is never final:
+        if self._state == environment.StepType.FIRST or self._scenario_tags is None:
+            return list(self._arena_results)
+
+        structure_unit_types = self._get_structure_unit_types()
+        game_loop = self._obs[0].observation.game_loop
+        for index, units in enumerate(self.get_scenario_units()):
+            if self._arena_results[index] is None:
+                self._arena_results[index] = self._get_arena_result(
+                    index=index,
+                    units=[
+                        unit
+                        for unit in units
+                        if unit.unit_type not in structure_unit_types
+                    ],
+                    game_loop=game_loop,
+                )
+
+        return list(self._arena_results)
+
+    def _get_arena_result(self, index, units, game_loop):
+        """Checks if the combat in a single arena is over.
+
+        Args:
+          index: Index of the arena.
+          units: Surviving non-structure units spawned for the scenario of the
+            arena, owned by either of the players.
+          game_loop: Game loop of the observation.
+
+        Returns:
+          The id of the player that won the combat, 0 for a tie, or None if the
+          combat is still going on.
+        """
+        unit_counts = {1: 0, 2: 0}
+        vitality = 0.0
+        for unit in units:
+            if unit.owner not in unit_counts:
+                continue
+            unit_counts[unit.owner] += 1
+            vitality += unit.health + unit.shield
+
+        if self._terminate_when_resolved and not all(unit_counts.values()):
+            if unit_counts[1]:
+                return 1
+            if unit_counts[2]:
+                return 2
+            return 0
+
+        if self._stalemate_timeout_gameloops:
+            # Regeneration increases the vitality, only losses count as damage:
+            last_vitality = self._last_vitality[index]
+            if last_vitality is None or vitality < last_vitality:
+                self._last_damage_game_loop[index] = game_loop
+            self._last_vitality[index] = vitality
+
+            stalled_gameloops = game_loop - self._last_damage_game_loop[index]
+            if stalled_gameloops >= self._stalemate_timeout_gameloops:
+                logging.info(
+                    "Stalemate in arena %s, no damage dealt for %s game loops.",
+                    index,
+                    stalled_gameloops,
+                )
+                return 0
+
+        return None
+
     def send_chat_messages(self, messages, broadcast=True):
         """Useful for logging messages into the replay."""
         self._parallel.run(
@@ -906,8 +1466,30 @@ class CombatSC2Env(environment.Base):
         logging.info("Wrote replay to: %s", replay_path)
         return replay_path
 
+    def _close_step_instrumentation(self):
+        for phase_summary in self._step_instrumentation.get_summary().values():
+            logging.info(
+                "Step phase %s: count %s, mean %.6fs, p50 %.6fs, p99 %.6fs, total %.3fs",
+                phase_summary.phase,
+                phase_summary.count,
+                phase_summary.mean_seconds,
+                phase_summary.p50_seconds,
+                phase_summary.p99_seconds,
+                phase_summary.total_seconds,
+            )
+        if self._step_instrumentation_dir is not None:
+            output_filepath = self._step_instrumentation_dir / (
+                "step_latency_%s_%s_%x.json"
+                % (getattr(self, "_map_name", "env"), os.getpid(), id(self))
+            )
+            self._step_instrumentation.write_json(output_filepath=output_filepath)
+            logging.info("Step latency written to %s", output_filepath)
+        self._step_instrumentation = None
+
     def close(self):
         logging.info("Environment Close")
+        if getattr(self, "_step_instrumentation", None) is not None:
+            self._close_step_instrumentation()
         if hasattr(self, "_metrics") and self._metrics:
             self._metrics.close()
             self._metrics = None
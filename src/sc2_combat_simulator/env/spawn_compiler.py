@@ -0,0 +1,257 @@
+import math
+from collections import Counter, defaultdict
+from typing import AbstractSet, Dict, Iterable, List, Tuple
+
+import s2clientprotocol.common_pb2 as sc_common
+import s2clientprotocol.debug_pb2 as d_pb
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+from sc2_combat_simulator.function_results.spawn_verification_result import (
+    SpawnVerificationResult,
+)
+
+# Owners assigned to the units of the players when the scenario is spawned:
+PLAYER1_OWNER = 1
+PLAYER2_OWNER = 2
+
+# Differences of health, shields and energy below this value are not corrected:
+UNIT_VALUE_TOLERANCE = 0.5
+
+
+def get_units_by_owner(
+    player_units_map_state: PlayerUnitsMapState,
+) -> List[Tuple[int, sc2proto_raw_pb.Unit]]:
+    """
+    Assigns the owners used in the environment to the units of the scenario.
+
+    Parameters
+    ----------
+    player_units_map_state : PlayerUnitsMapState
+        Scenario with the units of both players.
+
+    Returns
+    -------
+    List[Tuple[int, sc2proto_raw_pb.Unit]]
+        Returns a list of (owner, unit) pairs.
+    """
+
+    units_by_owner = [
+        (PLAYER1_OWNER, unit) for unit in player_units_map_state.player1_units
+    ]
+    units_by_owner.extend(
+        (PLAYER2_OWNER, unit) for unit in player_units_map_state.player2_units
+    )
+
+    return units_by_owner
+
+
+def compile_spawn_commands(
+    player_units_map_state: PlayerUnitsMapState,
+) -> List[d_pb.DebugCommand]:
+    """
+    Compiles the scenario into the debug commands creating its units.
+    Units with the same type, owner and position are created by a single command.
+
+    Parameters
+    ----------
+    player_units_map_state : PlayerUnitsMapState
+        Scenario with the units of both players.
+
+    Returns
+    -------
+    List[d_pb.DebugCommand]
+        Returns the commands, they are meant to be sent in a single request.
+    """
+
+    # Counter keeps the insertion order, the units are created in the scenario order:
+    unit_groups = Counter(
+        (unit.unit_type, owner, unit.pos.x, unit.pos.y)
+        for owner, unit in get_units_by_owner(player_units_map_state)
+    )
+
+    debug_commands = []
+    for (unit_type, owner, x, y), quantity in unit_groups.items():
+        debug_create_unit = d_pb.DebugCreateUnit(
+            unit_type=unit_type,
+            owner=owner,
+            pos=sc_common.Point2D(x=x, y=y),
+            quantity=quantity,
+        )
+        debug_commands.append(d_pb.DebugCommand(create_unit=debug_create_unit))
+
+    return debug_commands
+
+
+def match_spawned_units(
+    player_units_map_state: PlayerUnitsMapState,
+    observed_units: Iterable[sc2proto_raw_pb.Unit],
+    ignored_tags: AbstractSet[int] = frozenset(),
+) -> Tuple[
+    List[Tuple[sc2proto_raw_pb.Unit, sc2proto_raw_pb.Unit]],
+    int,
+    int,
+]:
+    """
+    Matches the units of the scenario to the units observed after spawning them.
+    Units of the same type and owner are matched greedily by their distance,
+    because the engine pushes apart the units created on the same position.
+
+    Parameters
+    ----------
+    player_units_map_state : PlayerUnitsMapState
+        Scenario with the units of both players.
+    observed_units : Iterable[sc2proto_raw_pb.Unit]
+        Raw units observed in the environment after the spawn.
+    ignored_tags : AbstractSet[int], optional
+        Tags of the units that existed before the spawn, by default frozenset()
+
+    Returns
+    -------
+    Tuple[List[Tuple[sc2proto_raw_pb.Unit, sc2proto_raw_pb.Unit]], int, int]
+        Returns the matched (source, spawned) pairs, the number of the source units
+        that were not found, and the number of the spawned units left unmatched.
+    """
+
+    spawned_groups: Dict[Tuple[int, int], List[sc2proto_raw_pb.Unit]] = defaultdict(
+        list
+    )
+    for unit in observed_units:
+        if unit.owner not in (PLAYER1_OWNER, PLAYER2_OWNER):
+            continue
+        if unit.tag in ignored_tags:
+            continue
+        spawned_groups[(unit.owner, unit.unit_type)].append(unit)
+
+    matched_units = []
+    missing_units = 0
+    for owner, source_unit in get_units_by_owner(player_units_map_state):
+        candidates = spawned_groups.get((owner, source_unit.unit_type))
+        if not candidates:
+            missing_units += 1
+            continue
+
+        closest_index = min(
+            range(len(candidates)),
+            key=lambda index: _distance(source_unit, candidates[index]),
+        )
+        matched_units.append((source_unit, candidates.pop(closest_index)))
+
+    unexpected_units = sum(len(candidates) for candidates in spawned_groups.values())
+
+    return matched_units, missing_units, unexpected_units
+
+
+def compile_unit_value_commands(
+    matched_units: Iterable[Tuple[sc2proto_raw_pb.Unit, sc2proto_raw_pb.Unit]],
+) -> List[d_pb.DebugCommand]:
+    """
+    Compiles the debug commands restoring the health, shields and energy
+    of the spawned units to the values of the matched source units.
+
+    Parameters
+    ----------
+    matched_units : Iterable[Tuple[sc2proto_raw_pb.Unit, sc2proto_raw_pb.Unit]]
+        Matched (source, spawned) pairs, see match_spawned_units.
+
+    Returns
+    -------
+    List[d_pb.DebugCommand]
+        Returns the commands for the values that differ, they are meant to be sent
+        in a single request.
+    """
+
+    debug_commands = []
+    for source_unit, spawned_unit in matched_units:
+        for unit_value, source_value, spawned_value in _get_unit_values(
+            source_unit=source_unit,
+            spawned_unit=spawned_unit,
+        ):
+            if abs(source_value - spawned_value) <= UNIT_VALUE_TOLERANCE:
+                continue
+
+            debug_set_unit_value = d_pb.DebugSetUnitValue(
+                unit_value=unit_value,
+                value=source_value,
+                unit_tag=spawned_unit.tag,
+            )
+            debug_commands.append(d_pb.DebugCommand(unit_value=debug_set_unit_value))
+
+    return debug_commands
+
+
+def verify_spawned_units(
+    player_units_map_state: PlayerUnitsMapState,
+    observed_units: Iterable[sc2proto_raw_pb.Unit],
+    ignored_tags: AbstractSet[int] = frozenset(),
+) -> SpawnVerificationResult:
+    """
+    Compares the units observed in the environment against the source scenario.
+
+    Parameters
+    ----------
+    player_units_map_state : PlayerUnitsMapState
+        Scenario with the units of both players.
+    observed_units : Iterable[sc2proto_raw_pb.Unit]
+        Raw units observed in the environment after the scenario was restored.
+    ignored_tags : AbstractSet[int], optional
+        Tags of the units that existed before the spawn, by default frozenset()
+
+    Returns
+    -------
+    SpawnVerificationResult
+        Returns the differences between the scenario and the environment,
+        please refer to the class definition.
+    """
+
+    matched_units, missing_units, unexpected_units = match_spawned_units(
+        player_units_map_state=player_units_map_state,
+        observed_units=observed_units,
+        ignored_tags=ignored_tags,
+    )
+
+    mismatched_values = len(compile_unit_value_commands(matched_units=matched_units))
+    max_position_error = max(
+        (_distance(source, spawned) for source, spawned in matched_units),
+        default=0.0,
+    )
+
+    return SpawnVerificationResult(
+        matched_units=len(matched_units),
+        missing_units=missing_units,
+        unexpected_units=unexpected_units,
+        mismatched_values=mismatched_values,
+        max_position_error=max_position_error,
+    )
+
+
+def _distance(
+    source_unit: sc2proto_raw_pb.Unit,
+    spawned_unit: sc2proto_raw_pb.Unit,
+) -> float:
+    return math.hypot(
+        source_unit.pos.x - spawned_unit.pos.x,
+        source_unit.pos.y - spawned_unit.pos.y,
+    )
+
+
+def _get_unit_values(
+    source_unit: sc2proto_raw_pb.Unit,
+    spawned_unit: sc2proto_raw_pb.Unit,
+) -> List[Tuple[int, float, float]]:
+    unit_values = [
+        (d_pb.DebugSetUnitValue.Life, source_unit.health, spawned_unit.health),
+    ]
+    # Units without shields or energy report the maximum of zero:
+    if spawned_unit.shield_max > 0:
+        unit_values.append(
+            (d_pb.DebugSetUnitValue.Shields, source_unit.shield, spawned_unit.shield)
+        )
+    if spawned_unit.energy_max > 0:
+        unit_values.append(
+            (d_pb.DebugSetUnitValue.Energy, source_unit.energy, spawned_unit.energy)
+        )
+
+    return unit_values
@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Sequence, Tuple, TypeVar
+
+from google.protobuf.message import Message
+from s2clientprotocol import sc2api_pb2 as sc_pb
+
+from sc2_combat_detector.decorators import write_atomically
+
+GAME_DATA_FILENAME = "game_data.pb"
+
+ResponseType = TypeVar("ResponseType", bound=Message)
+
+# Parsed responses shared by all of the environments of the process:
+_RESPONSE_MEMORY: Dict[Tuple[str, str], Message] = {}
+_RESPONSE_MEMORY_LOCK = threading.Lock()
+
+
+def get_cache_directory(cache_dir: Path, game_version: str, map_hash: str) -> Path:
+    """
+    Acquires the directory holding the cached responses of a game version and map.
+
+    Parameters
+    ----------
+    cache_dir : Path
+        Root directory of the cache.
+    game_version : str
+        Game version, e.g. "4.10.0".
+    map_hash : str
+        Map hash of the replay, used as the filename of the map.
+
+    Returns
+    -------
+    Path
+        Returns the directory of the (game_version, map_hash) pair.
+    """
+
+    return cache_dir / game_version / map_hash
+
+
+def get_game_info_filename(
+    join_request: sc_pb.RequestJoinGame,
+    player_setup: Sequence[sc_pb.PlayerSetup],
+) -> str:
+    """
+    Names the cached game info after the setup of the game. The game info echoes
+    the interface options and the races requested by the players, so the
+    responses are cached separately for each of the setups.
+
+    Parameters
+    ----------
+    join_request : sc_pb.RequestJoinGame
+        Request with which the player joined the game.
+    player_setup : Sequence[sc_pb.PlayerSetup]
+        Players of the created game.
+
+    Returns
+    -------
+    str
+        Returns the filename of the cached game info.
+    """
+
+    setup_hash = hashlib.sha1()
+    setup_hash.update(join_request.options.SerializeToString(deterministic=True))
+    setup_hash.update(str(join_request.race).encode())
+    for setup in player_setup:
+        setup_hash.update(setup.SerializeToString(deterministic=True))
+
+    return f"game_info_{setup_hash.hexdigest()[:16]}.pb"
+
+
+def strip_start_locations(game_info: sc_pb.ResponseGameInfo) -> None:
+    """
+    Removes the possible start locations of the opponents from the game info.
+    They depend on the start location randomly assigned to the player in each
+    game, so a cached game info would report the ones of the game that was
+    cached first.
+
+    Parameters
+    ----------
+    game_info : sc_pb.ResponseGameInfo
+        Game info of a player, modified in place.
+    """
+
+    if game_info.HasField("start_raw"):
+        game_info.start_raw.ClearField("start_locations")
+
+
+def get_or_request_response(
+    cache_filepath: Path,
+    response_type: type[ResponseType],
+    request_fn: Callable[[], ResponseType],
+    sanitize_fn: Callable[[ResponseType], None] | None = None,
+) -> ResponseType:
+    """
+    Returns a cached response, requesting it from the game only if it was not
+    cached in memory or on disk yet.
+
+    Parameters
+    ----------
+    cache_filepath : Path
+        Path of the serialized response.
+    response_type : type[ResponseType]
+        Protobuf message type of the response.
+    request_fn : Callable[[], ResponseType]
+        Function requesting the response from the game.
+    sanitize_fn : Callable[[ResponseType], None] | None, optional
+        Function removing the fields that differ between the games from
+        the response in place, applied before the response is cached and
+        to the responses read from the disk, by default None
+
+    Returns
+    -------
+    ResponseType
+        Returns the response, the returned message is shared and must not be modified.
+    """
+
+    memory_key = (str(cache_filepath), response_type.DESCRIPTOR.full_name)
+    with _RESPONSE_MEMORY_LOCK:
+        response = _RESPONSE_MEMORY.get(memory_key)
+    if response is not None:
+        return response
+
+    if cache_filepath.exists():
+        try:
+            response = response_type.FromString(cache_filepath.read_bytes())
+        except Exception as e:
+            logging.warning(f"Discarding corrupted cache file {cache_filepath}: {e}")
+            response = None
+
+    if response is None:
+        response = request_fn()
+        if sanitize_fn is not None:
+            sanitize_fn(response)
+        # Environments in other processes may be writing the same response,
+        # failing to cache it only costs another round trip later:
+        try:
+            cache_filepath.parent.mkdir(parents=True, exist_ok=True)
+            write_atomically(
+                data=response.SerializeToString(),
+                output_filepath=cache_filepath,
+            )
+        except OSError as e:
+            logging.warning(f"Could not cache the response in {cache_filepath}: {e}")
+    elif sanitize_fn is not None:
+        # Files cached before a field was sanitized are sanitized on the load:
+        sanitize_fn(response)
+
+    with _RESPONSE_MEMORY_LOCK:
+        response = _RESPONSE_MEMORY.setdefault(memory_key, response)
+
+    return response
+
+
+def get_game_info(
+    cache_dir: Path,
+    game_version: str,
+    map_hash: str,
+    join_request: sc_pb.RequestJoinGame,
+    player_setup: Sequence[sc_pb.PlayerSetup],
+    request_fn: Callable[[], sc_pb.ResponseGameInfo],
+) -> sc_pb.ResponseGameInfo:
+    """
+    Acquires the game info of a player, see get_or_request_response.
+    The start locations are stripped, see strip_start_locations.
+
+    Parameters
+    ----------
+    cache_dir : Path
+        Root directory of the cache.
+    game_version : str
+        Game version of the running game.
+    map_hash : str
+        Map hash of the running game.
+    join_request : sc_pb.RequestJoinGame
+        Request with which the player joined the game.
+    player_setup : Sequence[sc_pb.PlayerSetup]
+        Players of the created game.
+    request_fn : Callable[[], sc_pb.ResponseGameInfo]
+        Function requesting the game info from the controller of the player.
+
+    Returns
+    -------
+    sc_pb.ResponseGameInfo
+        Returns the game info of the player.
+    """
+
+    cache_filepath = get_cache_directory(
+        cache_dir=cache_dir,
+        game_version=game_version,
+        map_hash=map_hash,
+    ) / get_game_info_filename(join_request=join_request, player_setup=player_setup)
+
+    return get_or_request_response(
+        cache_filepath=cache_filepath,
+        response_type=sc_pb.ResponseGameInfo,
+        request_fn=request_fn,
+        sanitize_fn=strip_start_locations,
+    )
+
+
+def get_game_data(
+    cache_dir: Path,
+    game_version: str,
+    map_hash: str,
+    request_fn: Callable[[], sc_pb.ResponseData],
+) -> sc_pb.ResponseData:
+    """
+    Acquires the static data of the game, see get_or_request_response.
+
+    Parameters
+    ----------
+    cache_dir : Path
+        Root directory of the cache.
+    game_version : str
+        Game version of the running game.
+    map_hash : str
+        Map hash of the running game, custom maps can modify the game data.
+    request_fn : Callable[[], sc_pb.ResponseData]
+        Function requesting the raw static data from a controller.
+
+    Returns
+    -------
+    sc_pb.ResponseData
+        Returns the raw static data of the game.
+    """
+
+    cache_filepath = (
+        get_cache_directory(
+            cache_dir=cache_dir,
+            game_version=game_version,
+            map_hash=map_hash,
+        )
+        / GAME_DATA_FILENAME
+    )
+
+    return get_or_request_response(
+        cache_filepath=cache_filepath,
+        response_type=sc_pb.ResponseData,
+        request_fn=request_fn,
+    )
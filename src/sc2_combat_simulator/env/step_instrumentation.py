@@ -0,0 +1,158 @@
+import contextlib
+import json
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterator
+
+import numpy as np
+
+from sc2_combat_simulator.function_results.phase_latency_summary import (
+    PhaseLatencySummary,
+)
+
+# Ten buckets per decade between 1 microsecond and 10 seconds:
+LATENCY_BUCKET_EDGES_SECONDS = np.logspace(-6, 1, 71)
+
+
+class _PhaseHistogram:
+    def __init__(self, bucket_edges: np.ndarray) -> None:
+        self.counts = np.zeros(len(bucket_edges) + 1, dtype=np.int64)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, bucket_index: int, seconds: float) -> None:
+        self.counts[bucket_index] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+class StepInstrumentation:
+    """
+    Records latency histograms of the phases of the environment steps, such as
+    the action transformation, stepping the game, observing, and the
+    observation transformation. The histograms are kept for the lifetime of the
+    environment and for the current episode.
+
+    Parameters
+    ----------
+    bucket_edges : np.ndarray, optional
+        Increasing edges of the histogram buckets in seconds,
+        by default LATENCY_BUCKET_EDGES_SECONDS
+    """
+
+    def __init__(
+        self,
+        bucket_edges: np.ndarray = LATENCY_BUCKET_EDGES_SECONDS,
+    ) -> None:
+        self._bucket_edges = np.asarray(bucket_edges, dtype=np.float64)
+        self._histograms: Dict[str, _PhaseHistogram] = {}
+        self._episode_histograms: Dict[str, _PhaseHistogram] = {}
+        # Observations of multiple agents are transformed in parallel threads:
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """
+        Measures the duration of the wrapped block as a sample of a phase.
+
+        Parameters
+        ----------
+        phase : str
+            Name of the phase.
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase=phase, seconds=time.perf_counter() - start)
+
+    def record(self, phase: str, seconds: float) -> None:
+        bucket_index = int(np.searchsorted(self._bucket_edges, seconds))
+        with self._lock:
+            for histograms in (self._histograms, self._episode_histograms):
+                histogram = histograms.get(phase)
+                if histogram is None:
+                    histogram = _PhaseHistogram(bucket_edges=self._bucket_edges)
+                    histograms[phase] = histogram
+                histogram.record(bucket_index=bucket_index, seconds=seconds)
+
+    def start_episode(self) -> None:
+        """Clears the histograms of the current episode."""
+        with self._lock:
+            self._episode_histograms = {}
+
+    def _get_percentile(self, histogram: _PhaseHistogram, quantile: float) -> float:
+        cumulative_counts = np.cumsum(histogram.counts)
+        bucket_index = int(
+            np.searchsorted(cumulative_counts, quantile * histogram.count)
+        )
+        if bucket_index >= len(self._bucket_edges):
+            return histogram.max_seconds
+
+        return min(float(self._bucket_edges[bucket_index]), histogram.max_seconds)
+
+    def get_summary(self, episode: bool = False) -> Dict[str, PhaseLatencySummary]:
+        """
+        Summarizes the recorded latencies of each of the phases.
+
+        Parameters
+        ----------
+        episode : bool, optional
+            Summarizes only the current episode instead of the lifetime
+            of the environment, by default False
+
+        Returns
+        -------
+        Dict[str, PhaseLatencySummary]
+            Returns the summaries keyed by the phase names.
+        """
+
+        with self._lock:
+            histograms = self._episode_histograms if episode else self._histograms
+
+            summary = {}
+            for phase, histogram in histograms.items():
+                summary[phase] = PhaseLatencySummary(
+                    phase=phase,
+                    count=histogram.count,
+                    total_seconds=histogram.total_seconds,
+                    mean_seconds=histogram.total_seconds / histogram.count,
+                    max_seconds=histogram.max_seconds,
+                    p50_seconds=self._get_percentile(histogram, 0.5),
+                    p90_seconds=self._get_percentile(histogram, 0.9),
+                    p99_seconds=self._get_percentile(histogram, 0.99),
+                    bucket_edges_seconds=self._bucket_edges.tolist(),
+                    bucket_counts=histogram.counts.tolist(),
+                )
+
+        return summary
+
+    def write_json(self, output_filepath: Path) -> Path:
+        """
+        Writes the lifetime summaries of the phases to a JSON file.
+
+        Parameters
+        ----------
+        output_filepath : Path
+            Path of the JSON file.
+
+        Returns
+        -------
+        Path
+            Returns the path of the written file.
+        """
+
+        summary = {
+            phase: asdict(phase_summary)
+            for phase, phase_summary in self.get_summary().items()
+        }
+        output_filepath.parent.mkdir(parents=True, exist_ok=True)
+        with output_filepath.open("w") as out_f:
+            json.dump(summary, out_f, indent=2)
+
+        return output_filepath
@@ -0,0 +1,460 @@
+import logging
+import multiprocessing
+import random
+import traceback
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+from pysc2_evolved.env import environment
+
+from sc2_combat_simulator.env.env_factory import make_combat_env
+from sc2_combat_simulator.env.sc2_combat_env import CombatSC2Env
+from sc2_combat_simulator.function_results.combat_scenario import CombatScenario
+from sc2_combat_simulator.scenario_loader import (
+    list_combat_files,
+    load_combat_scenarios,
+)
+from sc2_combat_simulator.scenario_store import StoreScenarioSampler
+from sc2_combat_simulator.settings import REPLAY_DIR
+
+
+def stack_observations(
+    observations: Sequence[Mapping[str, Any]],
+) -> Dict[str, np.ndarray | List[np.ndarray]]:
+    """
+    Stacks the observations of multiple environments along a new first axis.
+
+    Parameters
+    ----------
+    observations : Sequence[Mapping[str, Any]]
+        Observations of the agents, one per environment.
+
+    Returns
+    -------
+    Dict[str, np.ndarray | List[np.ndarray]]
+        Returns a dictionary with the stacked fields. Fields with a variable length,
+        such as the raw units, cannot be stacked and are kept as a list of arrays.
+    """
+
+    stacked_observations = {}
+    for key in observations[0].keys():
+        values = [np.asarray(observation[key]) for observation in observations]
+        if all(value.shape == values[0].shape for value in values):
+            stacked_observations[key] = np.stack(values)
+        else:
+            stacked_observations[key] = values
+
+    return stacked_observations
+
+
+def stack_timesteps(timesteps: Sequence[environment.TimeStep]) -> environment.TimeStep:
+    """
+    Stacks the timesteps of multiple environments into a single batched timestep.
+
+    Parameters
+    ----------
+    timesteps : Sequence[environment.TimeStep]
+        Timesteps of the agents, one per environment.
+
+    Returns
+    -------
+    environment.TimeStep
+        Returns a timestep with arrays of the step types, rewards, discounts,
+        and the stacked observations.
+    """
+
+    return environment.TimeStep(
+        step_type=np.array([timestep.step_type for timestep in timesteps]),
+        reward=np.array([timestep.reward for timestep in timesteps]),
+        discount=np.array([timestep.discount for timestep in timesteps]),
+        observation=stack_observations(
+            observations=[timestep.observation for timestep in timesteps]
+        ),
+    )
+
+
+class _ScenarioSampler:
+    """
+    Draws the scenarios of a randomly chosen combat file in a random order.
+    All of the scenarios of a file share the map and game version,
+    so the environment can be reused until the file is exhausted.
+    """
+
+    def __init__(self, combat_files: List[Path], seed: int | None) -> None:
+        self._combat_files = combat_files
+        self._random = random.Random(seed)
+        self._pending_scenarios: List[CombatScenario] = []
+        self._empty_files = set()
+
+    def next_scenario(self) -> CombatScenario:
+        while not self._pending_scenarios:
+            if len(self._empty_files) == len(self._combat_files):
+                raise ValueError("None of the combat files contain any scenarios!")
+
+            combat_interval_file = self._random.choice(self._combat_files)
+            self._pending_scenarios = load_combat_scenarios(
+                combat_interval_file=combat_interval_file
+            )
+            if not self._pending_scenarios:
+                self._empty_files.add(combat_interval_file)
+            self._random.shuffle(self._pending_scenarios)
+
+        return self._pending_scenarios.pop()
+
+
+class _CombatEnvWorker:
+    """
+    Holds a single environment in the worker process. The environment is only
+    relaunched when the drawn scenario comes from a different map or game version.
+    """
+
+    def __init__(
+        self,
+        combat_files: List[Path],
+        seed: int | None,
+        replay_dir: Path,
+        raw_unit_array_size: int | None = None,
+        scenario_store_dir: Path | None = None,
+    ) -> None:
+        if scenario_store_dir is not None:
+            self._sampler = StoreScenarioSampler(
+                store_directory=scenario_store_dir,
+                seed=seed,
+            )
+        else:
+            self._sampler = _ScenarioSampler(combat_files=combat_files, seed=seed)
+        self._replay_dir = replay_dir
+        self._raw_unit_array_size = raw_unit_array_size
+        self._env: CombatSC2Env | None = None
+        self._env_key: Tuple[str, str] | None = None
+        self._needs_reset = True
+        # The scenario loaded to launch the environment for the specs
+        # is played in the first episode instead of drawing another:
+        self._scenario_played = True
+
+    def _load_next_scenario(self) -> None:
+        scenario = self._sampler.next_scenario()
+        self._scenario_played = False
+        env_key = (scenario.map_name, scenario.game_version)
+        if self._env is not None and env_key == self._env_key:
+            # The scenario is swapped into the running game by the next reset:
+            self._env.load_scenario(
+                player_units_map_state=scenario.player_units_map_state,
+                respawn=False,
+            )
+            return
+
+        self.close()
+        logging.info(
+            f"Launching environment for map {scenario.map_name}, version {scenario.game_version}"
+        )
+        self._env = make_combat_env(
+            map_name=scenario.map_name,
+            game_version=scenario.game_version,
+            player_units_map_state=scenario.player_units_map_state,
+            replay_dir=self._replay_dir,
+            raw_unit_array_size=self._raw_unit_array_size,
+        )
+        self._env_key = env_key
+
+    def specs(self) -> Tuple[Any, Any]:
+        if self._env is None:
+            self._load_next_scenario()
+
+        return self._env.observation_spec()[0], self._env.action_spec()[0]
+
+    def reset(self) -> environment.TimeStep:
+        if self._scenario_played:
+            self._load_next_scenario()
+        self._scenario_played = True
+        (timestep,) = self._env.reset()
+        self._needs_reset = timestep.last()
+
+        return timestep
+
+    def step(self, actions: Any) -> environment.TimeStep:
+        if self._needs_reset:
+            # The previous step ended the episode, the actions chosen
+            # for its final observation are dropped:
+            return self.reset()
+
+        (timestep,) = self._env.step([actions])
+        self._needs_reset = timestep.last()
+
+        return timestep
+
+    def close(self) -> None:
+        if self._env is not None:
+            self._env.close()
+            self._env = None
+            self._env_key = None
+
+
+def _worker_loop(
+    connection: Connection,
+    combat_files: List[Path],
+    seed: int | None,
+    replay_dir: Path,
+    raw_unit_array_size: int | None,
+    scenario_store_dir: Path | None,
+) -> None:
+    worker = _CombatEnvWorker(
+        combat_files=combat_files,
+        seed=seed,
+        replay_dir=replay_dir,
+        raw_unit_array_size=raw_unit_array_size,
+        scenario_store_dir=scenario_store_dir,
+    )
+    try:
+        while True:
+            command, arguments = connection.recv()
+            if command == "close":
+                break
+
+            try:
+                result = getattr(worker, command)(*arguments)
+                connection.send(("ok", result))
+            except Exception:
+                connection.send(("error", traceback.format_exc()))
+    except (EOFError, KeyboardInterrupt):
+        # The parent process is gone, there is no one to respond to:
+        pass
+    finally:
+        worker.close()
+        connection.close()
+
+
+class VecCombatSC2Env:
+    """
+    Runs multiple CombatSC2Env instances in subprocesses and steps them in lockstep.
+    Each of the workers draws its scenarios from the combat directory on its own.
+
+    Episodes are reset automatically. When a worker returns the last timestep
+    of an episode, the next call to step resets it and returns the first timestep
+    of a new scenario, ignoring the actions passed for that worker.
+    """
+
+    def __init__(
+        self,
+        combat_detection_dir: Path | None,
+        num_envs: int,
+        seed: int | None = None,
+        replay_dir: Path = REPLAY_DIR,
+        start_method: str = "spawn",
+        raw_unit_array_size: int | None = None,
+        scenario_store_dir: Path | None = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        combat_detection_dir : Path | None
+            Directory where the message binary files from the detected combats are stored,
+            not used when the scenarios are drawn from a scenario store.
+        num_envs : int
+            Number of worker processes, each of them runs its own game.
+        seed : int | None, optional
+            Seed for drawing the scenarios, worker i uses seed + i, by default None
+        replay_dir : Path, optional
+            Directory where the agents' replays will be saved, by default REPLAY_DIR
+        start_method : str, optional
+            Multiprocessing start method of the workers, by default "spawn"
+        raw_unit_array_size : int | None, optional
+            Number of unit slots of the raw unit array observations, which can be
+            stacked without padding, None keeps the pysc2 feature observations,
+            by default None
+        scenario_store_dir : Path | None, optional
+            Scenario store built with build_scenario_store, which all of the workers
+            memory-map instead of parsing the combat files, by default None
+
+        Raises
+        ------
+        ValueError
+            Raises an error when no combat files were found
+            or the number of environments is not positive.
+        """
+
+        if num_envs < 1:
+            raise ValueError(f"num_envs must be positive, got {num_envs}")
+
+        combat_files = []
+        if scenario_store_dir is None:
+            if combat_detection_dir is None:
+                raise ValueError(
+                    "Either combat_detection_dir or scenario_store_dir is required!"
+                )
+            combat_files = list_combat_files(combat_detection_dir=combat_detection_dir)
+            if not combat_files:
+                raise ValueError(
+                    f"No combat files found in {str(combat_detection_dir)}"
+                )
+
+        self._closed = False
+        self._waiting = False
+        self._connections: List[Connection] = []
+        self._processes = []
+
+        context = multiprocessing.get_context(start_method)
+        for index in range(num_envs):
+            worker_seed = None if seed is None else seed + index
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(
+                target=_worker_loop,
+                args=(
+                    child_connection,
+                    combat_files,
+                    worker_seed,
+                    replay_dir,
+                    raw_unit_array_size,
+                    scenario_store_dir,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+
+    @property
+    def num_envs(self) -> int:
+        return len(self._connections)
+
+    def _send(self, command: str, arguments_per_env: Sequence[Tuple]) -> None:
+        for connection, arguments in zip(self._connections, arguments_per_env):
+            connection.send((command, arguments))
+
+    def _receive(self) -> List[Any]:
+        results = []
+        errors = []
+        for index, connection in enumerate(self._connections):
+            status, result = connection.recv()
+            if status == "error":
+                errors.append(f"Worker {index} failed:\n{result}")
+                continue
+            results.append(result)
+
+        if errors:
+            raise RuntimeError("\n".join(errors))
+
+        return results
+
+    def observation_spec(self) -> Any:
+        """Observation spec of a single environment, all of the workers share it."""
+        self._connections[0].send(("specs", ()))
+        status, result = self._connections[0].recv()
+        if status == "error":
+            raise RuntimeError(f"Worker 0 failed:\n{result}")
+
+        observation_spec, _ = result
+        return observation_spec
+
+    def action_spec(self) -> Any:
+        """Action spec of a single environment, all of the workers share it."""
+        self._connections[0].send(("specs", ()))
+        status, result = self._connections[0].recv()
+        if status == "error":
+            raise RuntimeError(f"Worker 0 failed:\n{result}")
+
+        _, action_spec = result
+        return action_spec
+
+    def reset(self) -> environment.TimeStep:
+        """
+        Draws a new scenario in each of the workers and starts the episodes.
+
+        Returns
+        -------
+        environment.TimeStep
+            Returns the stacked first timesteps of all of the environments.
+        """
+
+        self._send(command="reset", arguments_per_env=[()] * self.num_envs)
+        return stack_timesteps(timesteps=self._receive())
+
+    def step_async(self, actions: Sequence[Any]) -> None:
+        """
+        Sends the actions to the workers without waiting for the results.
+
+        Parameters
+        ----------
+        actions : Sequence[Any]
+            Actions of the agent for each of the environments.
+
+        Raises
+        ------
+        ValueError
+            Raises an error when the number of actions does not match the number of environments.
+        """
+
+        if len(actions) != self.num_envs:
+            raise ValueError(
+                f"Expected actions for {self.num_envs} environments, got {len(actions)}"
+            )
+
+        self._send(
+            command="step",
+            arguments_per_env=[(env_actions,) for env_actions in actions],
+        )
+        self._waiting = True
+
+    def step_wait(self) -> environment.TimeStep:
+        """
+        Waits for the workers to finish the step sent by step_async.
+
+        Returns
+        -------
+        environment.TimeStep
+            Returns the stacked timesteps of all of the environments.
+        """
+
+        timesteps = self._receive()
+        self._waiting = False
+        return stack_timesteps(timesteps=timesteps)
+
+    def step(self, actions: Sequence[Any]) -> environment.TimeStep:
+        """
+        Steps all of the environments with one list of actions per environment.
+
+        Parameters
+        ----------
+        actions : Sequence[Any]
+            Actions of the agent for each of the environments.
+
+        Returns
+        -------
+        environment.TimeStep
+            Returns the stacked timesteps of all of the environments.
+        """
+
+        self.step_async(actions=actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        if self._waiting:
+            for connection in self._connections:
+                connection.recv()
+
+        for connection in self._connections:
+            try:
+                connection.send(("close", ()))
+            except (BrokenPipeError, EOFError):
+                pass
+
+        for process in self._processes:
+            process.join()
+
+        for connection in self._connections:
+            connection.close()
+
+        self._closed = True
+
+    def __enter__(self) -> "VecCombatSC2Env":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
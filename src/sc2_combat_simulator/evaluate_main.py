@@ -0,0 +1,144 @@
+import logging
+from pathlib import Path
+
+import click
+
+from sc2_combat_simulator.evaluation import run_evaluation
+from sc2_combat_simulator.main import LogLevel
+from sc2_combat_simulator.settings import (
+    COMPILED_SCENARIO_DIR,
+    EVALUATION_CHUNK_SIZE,
+    EVALUATION_MAX_EPISODE_STEPS,
+    EVALUATION_RESULTS_FILEPATH,
+    LOGGING_FORMAT,
+    REPLAY_DIR,
+)
+
+
+@click.command(
+    help="Evaluates an agent on the detected combat scenarios with a pool of worker processes. The outcomes are appended to a SQLite results store, and an interrupted run resumes where it stopped."
+)
+@click.option(
+    "--combat_detection_dir",
+    type=click.Path(
+        dir_okay=True,
+        file_okay=False,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    required=True,
+    help="Directory where the message binary files from the detected combats are stored.",
+)
+@click.option(
+    "--agent_class",
+    type=str,
+    required=True,
+    help="Import path of the evaluated agent class, e.g. pysc2_evolved.agents.random_agent.RandomAgent.",
+)
+@click.option(
+    "--results_file",
+    type=click.Path(
+        dir_okay=False,
+        file_okay=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    default=EVALUATION_RESULTS_FILEPATH,
+    help="SQLite file to which the outcomes of the scenarios are appended.",
+)
+@click.option(
+    "--run_name",
+    type=str,
+    default=None,
+    help="Name of the evaluation run, scenarios with an outcome in the run are skipped. Default is the agent class.",
+)
+@click.option(
+    "--n_processes",
+    type=int,
+    default=1,
+    help="Number of worker processes, each of them runs its own game. Default is 1.",
+)
+@click.option(
+    "--compiled_scenario_dir",
+    type=click.Path(
+        dir_okay=True,
+        file_okay=False,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    default=COMPILED_SCENARIO_DIR,
+    help="Directory where the compact scenario records and their SQLite index are stored.",
+)
+@click.option(
+    "--where",
+    type=str,
+    default=None,
+    help="SQL condition on the scenario index columns selecting the scenarios, e.g. 'unit_count <= 40'. The condition is inserted into the query as it is, it must never come from an untrusted source.",
+)
+@click.option(
+    "--chunk_size",
+    type=int,
+    default=EVALUATION_CHUNK_SIZE,
+    help=f"Maximum number of scenarios played by a worker in one game. Default is {EVALUATION_CHUNK_SIZE}.",
+)
+@click.option(
+    "--max_episode_steps",
+    type=int,
+    default=EVALUATION_MAX_EPISODE_STEPS,
+    help=f"Number of agent steps after which an episode is stopped as a timeout. Default is {EVALUATION_MAX_EPISODE_STEPS}.",
+)
+@click.option(
+    "--retry_errors",
+    is_flag=True,
+    default=False,
+    help="Evaluates the scenarios that failed with an error again.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Compiles all of the combat files again, also the ones that were not modified since their last compilation.",
+)
+@click.option(
+    "--log",
+    type=click.Choice(list(LogLevel), case_sensitive=False),
+    default=LogLevel.WARNING,
+    help="Log level. Default is WARNING.",
+)
+def main(
+    combat_detection_dir: Path,
+    agent_class: str,
+    results_file: Path,
+    run_name: str | None,
+    n_processes: int,
+    compiled_scenario_dir: Path,
+    where: str | None,
+    chunk_size: int,
+    max_episode_steps: int,
+    retry_errors: bool,
+    force: bool,
+    log: LogLevel,
+):
+    numeric_level = getattr(logging, log.upper(), None)
+    if not isinstance(numeric_level, int):
+        raise ValueError(f"Invalid log level: {numeric_level}")
+    logging.basicConfig(level=numeric_level, format=LOGGING_FORMAT)
+
+    run_evaluation(
+        combat_detection_dir=combat_detection_dir,
+        agent_class_path=agent_class,
+        results_filepath=results_file,
+        run_name=run_name,
+        n_processes=n_processes,
+        compiled_scenario_dir=compiled_scenario_dir,
+        replay_dir=REPLAY_DIR,
+        where=where,
+        chunk_size=chunk_size,
+        max_episode_steps=max_episode_steps,
+        retry_errors=retry_errors,
+        force_compile=force,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+import importlib
+import logging
+import multiprocessing
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Set, Tuple
+
+from pysc2_evolved.env import environment
+from pysc2_evolved.lib import units as units_lib
+from s2clientprotocol import data_pb2 as sc_data
+
+from sc2_combat_simulator.env.env_factory import make_combat_env
+from sc2_combat_simulator.env.sc2_combat_env import CombatSC2Env
+from sc2_combat_simulator.evaluation_store import (
+    append_outcomes,
+    connect_evaluation_store,
+    get_evaluated_record_paths,
+)
+from sc2_combat_simulator.function_arguments.evaluation_task_args import (
+    EvaluationTaskArgs,
+)
+from sc2_combat_simulator.function_results.combat_scenario import CombatScenario
+from sc2_combat_simulator.function_results.evaluation_outcome import (
+    EvaluationOutcome,
+)
+from sc2_combat_simulator.preflight import run_preflight
+from sc2_combat_simulator.scenario_compiler import compile_scenarios
+from sc2_combat_simulator.scenario_index import connect_scenario_index, query_scenarios
+from sc2_combat_simulator.scenario_loader import load_compiled_scenario
+from sc2_combat_simulator.scenario_scheduler import group_scenarios
+from sc2_combat_simulator.settings import (
+    COMPILED_SCENARIO_DIR,
+    EVALUATION_CHUNK_SIZE,
+    EVALUATION_MAX_EPISODE_STEPS,
+    EVALUATION_RESULTS_FILEPATH,
+    PREFLIGHT_MANIFEST_FILENAME,
+    REPLAY_DIR,
+)
+
+# Workers are not a part of the army, even if they were spawned for a scenario:
+WORKER_UNIT_TYPES = frozenset(
+    {
+        units_lib.Protoss.Probe,
+        units_lib.Terran.SCV,
+        units_lib.Terran.MULE,
+        units_lib.Zerg.Drone,
+        units_lib.Zerg.DroneBurrowed,
+    }
+)
+
+
+def import_agent_class(agent_class_path: str) -> type:
+    """
+    Imports an agent class by its import path.
+
+    Parameters
+    ----------
+    agent_class_path : str
+        Import path of the class, e.g. "pysc2_evolved.agents.no_op_agent.NoOpAgent".
+
+    Returns
+    -------
+    type
+        Returns the agent class.
+
+    Raises
+    ------
+    ValueError
+        Raises an error when the path does not point to a module attribute.
+    """
+
+    module_name, _, class_name = agent_class_path.rpartition(".")
+    if not module_name:
+        raise ValueError(
+            f"Expected the agent class as module.ClassName, got {agent_class_path}"
+        )
+
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def get_army_values(
+    units: Iterable[Any],
+    unit_stats: Mapping[int, Any],
+) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Sums the resource cost and counts the army units of both players,
+    the structures and workers are skipped.
+
+    Parameters
+    ----------
+    units : Iterable[Any]
+        Surviving units spawned for the scenario, see CombatSC2Env.get_scenario_units.
+    unit_stats : Mapping[int, Any]
+        Unit type data of the game keyed by the unit type ids.
+
+    Returns
+    -------
+    Tuple[Dict[int, int], Dict[int, int]]
+        Returns the army value and the unit count keyed by the player id.
+    """
+
+    army_values = {1: 0, 2: 0}
+    unit_counts = {1: 0, 2: 0}
+    for unit in units:
+        if unit.owner not in army_values or unit.unit_type in WORKER_UNIT_TYPES:
+            continue
+
+        unit_type_data = unit_stats.get(unit.unit_type)
+        if unit_type_data is not None:
+            if sc_data.Attribute.Structure in unit_type_data.attributes:
+                continue
+            army_values[unit.owner] += (
+                unit_type_data.mineral_cost + unit_type_data.vespene_cost
+            )
+        unit_counts[unit.owner] += 1
+
+    return army_values, unit_counts
+
+
+def evaluate_scenario(
+    env: CombatSC2Env,
+    agent: Any,
+    scenario: CombatScenario,
+    task_args: EvaluationTaskArgs,
+    record_path: Path,
+    unit_stats: Mapping[int, Any],
+) -> EvaluationOutcome:
+    """
+    Plays a single episode of a scenario with the agent.
+
+    Parameters
+    ----------
+    env : CombatSC2Env
+        Running environment on the map and game version of the scenario,
+        created with instrument_steps.
+    agent : Any
+        Agent with the pysc2 agent interface, already set up for the environment.
+    scenario : CombatScenario
+        Scenario to be played.
+    task_args : EvaluationTaskArgs
+        Task to which the scenario belongs.
+    record_path : Path
+        Path of the compiled scenario record.
+    unit_stats : Mapping[int, Any]
+        Unit type data of the game keyed by the unit type ids.
+
+    Returns
+    -------
+    EvaluationOutcome
+        Returns the outcome of the episode.
+    """
+
+    start_time = time.perf_counter()
+
+    # The previous episode may have timed out, the reset swaps the scenario in,
+    # so it must not be spawned into the unfinished episode:
+    env.load_scenario(
+        player_units_map_state=scenario.player_units_map_state, respawn=False
+    )
+    agent.reset()
+    timesteps = env.reset()
+    first_game_loop = int(timesteps[0].observation["game_loop"][0])
+
+    agent_steps = 0
+    while (
+        timesteps[0].step_type != environment.StepType.LAST
+        and agent_steps < task_args.max_episode_steps
+    ):
+        timesteps = env.step([agent.step(timesteps[0])])
+        agent_steps += 1
+
+    reward = float(timesteps[0].reward)
+    if timesteps[0].step_type != environment.StepType.LAST:
+        outcome = "timeout"
+    elif reward > 0:
+        outcome = "win"
+    elif reward < 0:
+        outcome = "loss"
+    else:
+        outcome = "tie"
+
+    army_values, unit_counts = get_army_values(
+        units=env.get_scenario_units()[0],
+        unit_stats=unit_stats,
+    )
+
+    step_latency = env.step_latency_summary(episode=True).get("step")
+
+    return EvaluationOutcome(
+        run_name=task_args.run_name,
+        record_path=str(record_path),
+        agent_class_path=task_args.agent_class_path,
+        map_hash=task_args.map_hash,
+        game_version=task_args.game_version,
+        outcome=outcome,
+        reward=reward,
+        player1_army_value=army_values[1],
+        player2_army_value=army_values[2],
+        player1_unit_count=unit_counts[1],
+        player2_unit_count=unit_counts[2],
+        duration_gameloops=int(timesteps[0].observation["game_loop"][0])
+        - first_game_loop,
+        agent_steps=agent_steps,
+        wall_seconds=time.perf_counter() - start_time,
+        mean_step_seconds=step_latency.mean_seconds if step_latency else None,
+        p99_step_seconds=step_latency.p99_seconds if step_latency else None,
+    )
+
+
+def get_error_outcome(
+    task_args: EvaluationTaskArgs,
+    record_path: Path,
+    error: str,
+) -> EvaluationOutcome:
+    return EvaluationOutcome(
+        run_name=task_args.run_name,
+        record_path=str(record_path),
+        agent_class_path=task_args.agent_class_path,
+        map_hash=task_args.map_hash,
+        game_version=task_args.game_version,
+        outcome="error",
+        reward=0.0,
+        player1_army_value=0,
+        player2_army_value=0,
+        player1_unit_count=0,
+        player2_unit_count=0,
+        duration_gameloops=0,
+        agent_steps=0,
+        wall_seconds=0.0,
+        mean_step_seconds=None,
+        p99_step_seconds=None,
+        error=error,
+    )
+
+
+def evaluate_scenario_task(task_args: EvaluationTaskArgs) -> List[EvaluationOutcome]:
+    """
+    Plays all of the scenarios of a task in a single environment. Runs in a
+    worker process, a scenario that fails is recorded as an error and the
+    environment is launched again for the remaining scenarios.
+
+    Parameters
+    ----------
+    task_args : EvaluationTaskArgs
+        Scenarios sharing a game version and map, and the agent to be evaluated.
+
+    Returns
+    -------
+    List[EvaluationOutcome]
+        Returns one outcome per scenario of the task.
+    """
+
+    agent_class = import_agent_class(agent_class_path=task_args.agent_class_path)
+
+    env = None
+    agent = None
+    unit_stats = None
+    outcomes = []
+    try:
+        for record_path in task_args.record_paths:
+            try:
+                scenario = load_compiled_scenario(record_filepath=record_path)
+                if env is None:
+                    env = make_combat_env(
+                        map_name=task_args.map_hash,
+                        game_version=task_args.game_version,
+                        player_units_map_state=scenario.player_units_map_state,
+                        replay_dir=task_args.replay_dir,
+                        instrument_steps=True,
+                    )
+                    agent = agent_class()
+                    agent.setup(env.observation_spec()[0], env.action_spec()[0])
+                    unit_stats = env.static_data().unit_stats
+
+                outcome = evaluate_scenario(
+                    env=env,
+                    agent=agent,
+                    scenario=scenario,
+                    task_args=task_args,
+                    record_path=record_path,
+                    unit_stats=unit_stats,
+                )
+            except Exception:
+                error = traceback.format_exc()
+                logging.error(f"Failed to evaluate {str(record_path)}:\n{error}")
+                outcome = get_error_outcome(
+                    task_args=task_args,
+                    record_path=record_path,
+                    error=error,
+                )
+                # The game may be in an unknown state, it is launched again:
+                if env is not None:
+                    env.close()
+                    env = None
+
+            outcomes.append(outcome)
+    finally:
+        if env is not None:
+            env.close()
+
+    return outcomes
+
+
+def get_evaluation_tasks(
+    scenario_rows: Iterable[Mapping[str, Any]],
+    evaluated_record_paths: Set[str],
+    run_name: str,
+    agent_class_path: str,
+    replay_dir: Path,
+    chunk_size: int = EVALUATION_CHUNK_SIZE,
+    max_episode_steps: int = EVALUATION_MAX_EPISODE_STEPS,
+) -> List[EvaluationTaskArgs]:
+    """
+    Splits the scenarios that were not evaluated yet into tasks. Each task holds
+    scenarios of a single game version and map, so that a worker plays all of
+    them in one game. Large groups are split into chunks to balance the workers.
+
+    Parameters
+    ----------
+    scenario_rows : Iterable[Mapping[str, Any]]
+        Rows of the scenario index, see query_scenarios.
+    evaluated_record_paths : Set[str]
+        Record paths of the scenarios that already have an outcome.
+    run_name : str
+        Name of the evaluation run.
+    agent_class_path : str
+        Import path of the agent class.
+    replay_dir : Path
+        Directory where the agents' replays will be saved.
+    chunk_size : int, optional
+        Maximum number of scenarios in a task, by default EVALUATION_CHUNK_SIZE
+    max_episode_steps : int, optional
+        Number of agent steps after which an episode is stopped as a timeout,
+        by default EVALUATION_MAX_EPISODE_STEPS
+
+    Returns
+    -------
+    List[EvaluationTaskArgs]
+        Returns the tasks ordered by the game version and map.
+    """
+
+    pending_rows = [
+        row for row in scenario_rows if row["record_path"] not in evaluated_record_paths
+    ]
+
+    tasks = []
+    for scenario_group in group_scenarios(scenario_rows=pending_rows):
+        record_paths = scenario_group.record_paths
+        for chunk_start in range(0, len(record_paths), chunk_size):
+            task_args = EvaluationTaskArgs(
+                run_name=run_name,
+                agent_class_path=agent_class_path,
+                game_version=scenario_group.game_version,
+                map_hash=scenario_group.map_hash,
+                record_paths=record_paths[chunk_start : chunk_start + chunk_size],
+                replay_dir=replay_dir,
+                max_episode_steps=max_episode_steps,
+            )
+            tasks.append(task_args)
+
+    return tasks
+
+
+def run_evaluation(
+    combat_detection_dir: Path,
+    agent_class_path: str,
+    results_filepath: Path = EVALUATION_RESULTS_FILEPATH,
+    run_name: str | None = None,
+    n_processes: int = 1,
+    compiled_scenario_dir: Path = COMPILED_SCENARIO_DIR,
+    replay_dir: Path = REPLAY_DIR,
+    where: str | None = None,
+    chunk_size: int = EVALUATION_CHUNK_SIZE,
+    max_episode_steps: int = EVALUATION_MAX_EPISODE_STEPS,
+    retry_errors: bool = False,
+    where_parameters: Iterable[Any] = (),
+    force_compile: bool = False,
+) -> Path:
+    """
+    Evaluates an agent on the detected combat scenarios using a pool of worker
+    processes, each of them running its own game. The outcome of every scenario
+    is appended to a SQLite results store as soon as its task finishes, and the
+    scenarios that already have an outcome in the run are skipped, so an
+    interrupted run resumes where it stopped.
+
+    Parameters
+    ----------
+    combat_detection_dir : Path
+        Directory where the message binary files from the detected combats are stored.
+    agent_class_path : str
+        Import path of the agent class, the class must be importable in the workers.
+    results_filepath : Path, optional
+        Path to the SQLite results store, by default EVALUATION_RESULTS_FILEPATH
+    run_name : str | None, optional
+        Name of the run used to resume it, by default the agent class path
+    n_processes : int, optional
+        Number of worker processes, by default 1
+    compiled_scenario_dir : Path, optional
+        Directory where the compact scenario records and their index are stored,
+        by default COMPILED_SCENARIO_DIR
+    replay_dir : Path, optional
+        Directory where the agents' replays will be saved, by default REPLAY_DIR
+    where : str | None, optional
+        Trusted SQL condition on the scenario index columns selecting
+        the scenarios, see query_scenarios, by default None
+    chunk_size : int, optional
+        Maximum number of scenarios played by a worker in one game,
+        by default EVALUATION_CHUNK_SIZE
+    max_episode_steps : int, optional
+        Number of agent steps after which an episode is stopped as a timeout,
+        by default EVALUATION_MAX_EPISODE_STEPS
+    retry_errors : bool, optional
+        Evaluates the scenarios that failed with an error again, by default False
+    where_parameters : Iterable[Any], optional
+        Parameters bound to the placeholders of the where condition, by default ()
+    force_compile : bool, optional
+        Compiles all of the combat files again, also the ones that were not
+        modified since their last compilation, by default False
+
+    Returns
+    -------
+    Path
+        Returns the path to the results store.
+    """
+
+    if run_name is None:
+        run_name = agent_class_path
+
+    # Fail early if the agent cannot be imported, before any worker is started:
+    import_agent_class(agent_class_path=agent_class_path)
+
+    index_filepath = compile_scenarios(
+        combat_detection_dir=combat_detection_dir,
+        output_directory=compiled_scenario_dir,
+        force=force_compile,
+    )
+    connection = connect_scenario_index(index_filepath=index_filepath)
+    try:
+        scenario_rows = query_scenarios(
+            connection=connection,
+            where=where,
+            parameters=where_parameters,
+        )
+    finally:
+        connection.close()
+
+    scenario_rows, _ = run_preflight(
+        scenario_rows=scenario_rows,
+        manifest_filepath=compiled_scenario_dir / PREFLIGHT_MANIFEST_FILENAME,
+    )
+
+    connection = connect_evaluation_store(results_filepath=results_filepath)
+    try:
+        evaluated_record_paths = get_evaluated_record_paths(
+            connection=connection,
+            run_name=run_name,
+            retry_errors=retry_errors,
+        )
+        tasks = get_evaluation_tasks(
+            scenario_rows=scenario_rows,
+            evaluated_record_paths=evaluated_record_paths,
+            run_name=run_name,
+            agent_class_path=agent_class_path,
+            replay_dir=replay_dir,
+            chunk_size=chunk_size,
+            max_episode_steps=max_episode_steps,
+        )
+        n_scenarios = sum(len(task.record_paths) for task in tasks)
+        logging.info(
+            f"Evaluating {n_scenarios} scenarios in {len(tasks)} tasks, {len(evaluated_record_paths)} already evaluated in run {run_name}"
+        )
+        if not tasks:
+            return results_filepath
+
+        # Each of the workers launches its own game, spawn avoids forking
+        # the state of the parent process:
+        context = multiprocessing.get_context("spawn")
+        n_evaluated = 0
+        with context.Pool(processes=min(n_processes, len(tasks))) as pool:
+            for outcomes in pool.imap_unordered(evaluate_scenario_task, tasks):
+                append_outcomes(connection=connection, outcomes=outcomes)
+                n_evaluated += len(outcomes)
+                logging.info(f"Evaluated {n_evaluated}/{n_scenarios} scenarios")
+    finally:
+        connection.close()
+
+    return results_filepath
@@ -0,0 +1,117 @@
+import dataclasses
+import sqlite3
+from pathlib import Path
+from typing import List, Set
+
+from sc2_combat_simulator.function_results.evaluation_outcome import (
+    EvaluationOutcome,
+)
+
+EVALUATION_RESULT_COLUMNS = {
+    "run_name": "TEXT NOT NULL",
+    "record_path": "TEXT NOT NULL",
+    "agent_class_path": "TEXT NOT NULL",
+    "map_hash": "TEXT NOT NULL",
+    "game_version": "TEXT NOT NULL",
+    "outcome": "TEXT NOT NULL",
+    "reward": "REAL NOT NULL",
+    "player1_army_value": "INTEGER NOT NULL",
+    "player2_army_value": "INTEGER NOT NULL",
+    "player1_unit_count": "INTEGER NOT NULL",
+    "player2_unit_count": "INTEGER NOT NULL",
+    "duration_gameloops": "INTEGER NOT NULL",
+    "agent_steps": "INTEGER NOT NULL",
+    "wall_seconds": "REAL NOT NULL",
+    "mean_step_seconds": "REAL",
+    "p99_step_seconds": "REAL",
+    "error": "TEXT",
+}
+
+
+def connect_evaluation_store(results_filepath: Path) -> sqlite3.Connection:
+    """
+    Opens the evaluation results store, creating the table if it does not exist.
+
+    Parameters
+    ----------
+    results_filepath : Path
+        Path to the SQLite file of the results.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Returns a connection with the rows accessible by the column names.
+    """
+
+    results_filepath.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(results_filepath))
+    connection.row_factory = sqlite3.Row
+
+    column_definitions = ", ".join(
+        f"{name} {definition}" for name, definition in EVALUATION_RESULT_COLUMNS.items()
+    )
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS evaluation_results ({column_definitions}, "
+        "PRIMARY KEY (run_name, record_path))"
+    )
+    connection.commit()
+
+    return connection
+
+
+def append_outcomes(
+    connection: sqlite3.Connection,
+    outcomes: List[EvaluationOutcome],
+) -> None:
+    """
+    Appends the outcomes of the evaluated scenarios in one transaction.
+    Outcomes of scenarios that were already evaluated in the run are replaced.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the results store.
+    outcomes : List[EvaluationOutcome]
+        Outcomes to be stored.
+    """
+
+    column_names = ", ".join(EVALUATION_RESULT_COLUMNS)
+    placeholders = ", ".join(f":{name}" for name in EVALUATION_RESULT_COLUMNS)
+    with connection:
+        connection.executemany(
+            f"INSERT OR REPLACE INTO evaluation_results ({column_names}) VALUES ({placeholders})",
+            [dataclasses.asdict(outcome) for outcome in outcomes],
+        )
+
+
+def get_evaluated_record_paths(
+    connection: sqlite3.Connection,
+    run_name: str,
+    retry_errors: bool = False,
+) -> Set[str]:
+    """
+    Acquires the scenarios that already have an outcome in a run.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the results store.
+    run_name : str
+        Name of the evaluation run.
+    retry_errors : bool, optional
+        Treats the scenarios that failed with an error as not evaluated,
+        by default False
+
+    Returns
+    -------
+    Set[str]
+        Returns the record paths of the evaluated scenarios.
+    """
+
+    query = "SELECT record_path FROM evaluation_results WHERE run_name = ?"
+    if retry_errors:
+        query += " AND outcome != 'error'"
+
+    rows = connection.execute(query, (run_name,)).fetchall()
+
+    return {row["record_path"] for row in rows}
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+
+@dataclass
+class EvaluationTaskArgs:
+    run_name: str
+    # Import path of the agent class, e.g. "pysc2_evolved.agents.random_agent.RandomAgent":
+    agent_class_path: str
+    game_version: str
+    map_hash: str
+    record_paths: List[Path]
+    replay_dir: Path
+    max_episode_steps: int
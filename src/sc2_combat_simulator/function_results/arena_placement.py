@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from typing import Tuple
+
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+
+@dataclass
+class ArenaPlacement:
+    # Bounds of the map region reserved for the arena, (min_x, min_y, max_x, max_y):
+    cell_bounds: Tuple[float, float, float, float]
+    # Translation applied to the positions of the units of the scenario:
+    offset_x: float
+    offset_y: float
+    # Scenario with the translated unit positions:
+    player_units_map_state: PlayerUnitsMapState
+
+    def contains(self, x: float, y: float) -> bool:
+        min_x, min_y, max_x, max_y = self.cell_bounds
+        return min_x <= x < max_x and min_y <= y < max_y
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+
+@dataclass
+class CombatScenario:
+    combat_interval_file: Path
+    map_name: str
+    game_version: str
+    start_time: int
+    end_time: int
+    player_units_map_state: PlayerUnitsMapState
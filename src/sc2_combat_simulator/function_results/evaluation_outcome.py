@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class EvaluationOutcome:
+    run_name: str
+    record_path: str
+    agent_class_path: str
+    map_hash: str
+    game_version: str
+    # One of: "win", "loss", "tie", "timeout" or "error":
+    outcome: str
+    reward: float
+    # Surviving units spawned for the scenario, without structures and workers:
+    player1_army_value: int
+    player2_army_value: int
+    player1_unit_count: int
+    player2_unit_count: int
+    duration_gameloops: int
+    agent_steps: int
+    wall_seconds: float
+    mean_step_seconds: float | None
+    p99_step_seconds: float | None
+    error: str | None = None
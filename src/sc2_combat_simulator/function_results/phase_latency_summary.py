@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class PhaseLatencySummary:
+    phase: str
+    count: int
+    total_seconds: float
+    mean_seconds: float
+    max_seconds: float
+    # Percentiles are estimated as the upper edges of the histogram buckets:
+    p50_seconds: float
+    p90_seconds: float
+    p99_seconds: float
+    # Bucket i counts the durations between edges i - 1 and i, the last
+    # bucket counts the durations above the last edge:
+    bucket_edges_seconds: List[float]
+    bucket_counts: List[int]
@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class PreflightResult:
+    map_hash: str
+    game_version: str
+    map_class_name: str
+    map_path: str | None
+    map_available: bool
+    version_available: bool
+    scenario_count: int
+    error: str | None = None
+
+    @property
+    def is_playable(self) -> bool:
+        return self.map_available and self.version_available
@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+
+@dataclass
+class ScenarioGroup:
+    game_version: str
+    map_hash: str
+    record_paths: List[Path]
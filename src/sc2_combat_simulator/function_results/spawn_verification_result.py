@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class SpawnVerificationResult:
+    matched_units: int
+    missing_units: int
+    unexpected_units: int
+    mismatched_values: int
+    max_position_error: float
+
+    @property
+    def is_exact(self) -> bool:
+        return (
+            self.missing_units == 0
+            and self.unexpected_units == 0
+            and self.mismatched_values == 0
+        )
@@ -4,7 +4,7 @@ from pathlib import Path
 import click
 
 from sc2_combat_simulator.combat_simulator import sc2_combat_simulator
-from sc2_combat_simulator.settings import LOGGING_FORMAT
+from sc2_combat_simulator.settings import COMPILED_SCENARIO_DIR, LOGGING_FORMAT
 
 
 class LogLevel(str, enum.Enum):
@@ -31,6 +31,23 @@ class LogLevel(str, enum.Enum):
     required=True,
     help="",
 )
+@click.option(
+    "--compiled_scenario_dir",
+    type=click.Path(
+        dir_okay=True,
+        file_okay=False,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    default=COMPILED_SCENARIO_DIR,
+    help="Directory where the compact scenario records and their SQLite index are stored. Combat files that were not compiled yet are compiled before the simulation.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Compiles all of the combat files again, also the ones that were not modified since their last compilation.",
+)
 @click.option(
     "--log",
     type=click.Choice(list(LogLevel), case_sensitive=False),
@@ -39,6 +56,8 @@ class LogLevel(str, enum.Enum):
 )
 def main(
     combat_detection_dir: Path,
+    compiled_scenario_dir: Path,
+    force: bool,
     log: LogLevel,
 ):
     numeric_level = getattr(logging, log.upper(), None)
@@ -46,7 +65,11 @@ def main(
         raise ValueError(f"Invalid log level: {numeric_level}")
     logging.basicConfig(level=logging.INFO, format=LOGGING_FORMAT)
 
-    sc2_combat_simulator(combat_detection_dir=combat_detection_dir)
+    sc2_combat_simulator(
+        combat_detection_dir=combat_detection_dir,
+        compiled_scenario_dir=compiled_scenario_dir,
+        force_compile=force,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+import dataclasses
+import json
+import logging
+from multiprocessing.pool import ThreadPool
+from pathlib import Path
+from typing import Any, List, Mapping, Sequence, Tuple
+
+from pysc2_evolved import maps, run_configs
+
+from sc2_combat_simulator.function_results.preflight_result import PreflightResult
+from sc2_combat_simulator.register_custom_map import register_custom_map
+from sc2_combat_simulator.settings import CUSTOM_MAP_DIRECTORY, CUSTOM_MAP_NAME_PREFIX
+
+
+def check_map_version(
+    map_hash: str,
+    game_version: str,
+    map_class_name: str,
+    scenario_count: int,
+) -> PreflightResult:
+    """
+    Checks if the map and the game version are available locally,
+    without launching the game.
+
+    Parameters
+    ----------
+    map_hash : str
+        Map hash of the scenarios.
+    game_version : str
+        Game version of the scenarios.
+    map_class_name : str
+        Name of the registered map class.
+    scenario_count : int
+        Number of the scenarios requiring the map and game version.
+
+    Returns
+    -------
+    PreflightResult
+        Returns the availability of the map and the game version,
+        please refer to the class definition.
+    """
+
+    map_inst = maps.get(map_class_name)
+
+    result = PreflightResult(
+        map_hash=map_hash,
+        game_version=game_version,
+        map_class_name=map_class_name,
+        map_path=None,
+        map_available=False,
+        version_available=False,
+        scenario_count=scenario_count,
+    )
+
+    try:
+        run_config = run_configs.get(version=game_version)
+    except Exception as e:
+        result.error = f"Game version is not available: {e}"
+        return result
+
+    # Same executable directory as the one used when the game is launched:
+    version_directory = (
+        Path(run_config.data_dir)
+        / "Versions"
+        / f"Base{run_config.version.build_version:05d}"
+    )
+    errors = []
+    result.version_available = version_directory.exists()
+    if not result.version_available:
+        errors.append(f"No SC2 binary directory found at: {str(version_directory)}")
+
+    # Same lookup as run_config.map_data, without reading the map:
+    map_directory = Path(run_config.data_dir) / "Maps"
+    map_path = Path(map_inst.path)
+    map_candidates = [
+        map_directory / map_path,
+        map_directory / map_path.parent / f"({map_inst.players}){map_path.name}",
+    ]
+    for map_candidate in map_candidates:
+        if map_candidate.exists():
+            result.map_path = str(map_candidate)
+            result.map_available = True
+            break
+    else:
+        errors.append(f"Map not found at: {str(map_candidates[0])}")
+
+    if errors:
+        result.error = "; ".join(errors)
+
+    return result
+
+
+def write_preflight_manifest(
+    preflight_results: Sequence[PreflightResult],
+    manifest_filepath: Path,
+) -> Path:
+    manifest = {
+        "playable_scenarios": sum(
+            result.scenario_count for result in preflight_results if result.is_playable
+        ),
+        "excluded_scenarios": sum(
+            result.scenario_count
+            for result in preflight_results
+            if not result.is_playable
+        ),
+        "requirements": [
+            {**dataclasses.asdict(result), "is_playable": result.is_playable}
+            for result in preflight_results
+        ],
+    }
+
+    manifest_filepath.parent.mkdir(parents=True, exist_ok=True)
+    with manifest_filepath.open("w") as out_f:
+        json.dump(manifest, out_f, indent=2)
+
+    return manifest_filepath
+
+
+def run_preflight(
+    scenario_rows: Sequence[Mapping[str, Any]],
+    manifest_filepath: Path,
+    n_threads: int = 8,
+) -> Tuple[List[Mapping[str, Any]], List[PreflightResult]]:
+    """
+    Checks the maps and game versions required by the scenarios before
+    any of the environments is launched. Each of the maps is registered once,
+    and the scenarios that cannot be played are excluded.
+
+    Parameters
+    ----------
+    scenario_rows : Sequence[Mapping[str, Any]]
+        Rows of the scenario index, see query_scenarios.
+    manifest_filepath : Path
+        Path to the JSON manifest describing the requirements and their availability.
+    n_threads : int, optional
+        Number of threads checking the requirements, by default 8
+
+    Returns
+    -------
+    Tuple[List[Mapping[str, Any]], List[PreflightResult]]
+        Returns the rows of the playable scenarios, and the results of the checks.
+    """
+
+    scenario_counts = {}
+    for row in scenario_rows:
+        requirement = (row["map_hash"], row["game_version"])
+        scenario_counts[requirement] = scenario_counts.get(requirement, 0) + 1
+
+    # Registering modifies the module globals, it is done before the threads start:
+    check_arguments = []
+    for (map_hash, game_version), scenario_count in scenario_counts.items():
+        map_class_name, _ = register_custom_map(
+            map_name=map_hash,
+            map_name_prefix=CUSTOM_MAP_NAME_PREFIX,
+            directory=CUSTOM_MAP_DIRECTORY,
+        )
+        check_arguments.append((map_hash, game_version, map_class_name, scenario_count))
+
+    preflight_results = []
+    if check_arguments:
+        with ThreadPool(processes=min(n_threads, len(check_arguments))) as thread_pool:
+            preflight_results = thread_pool.starmap(check_map_version, check_arguments)
+
+    write_preflight_manifest(
+        preflight_results=preflight_results,
+        manifest_filepath=manifest_filepath,
+    )
+
+    playable_requirements = set()
+    for result in preflight_results:
+        if result.is_playable:
+            playable_requirements.add((result.map_hash, result.game_version))
+            continue
+
+        logging.warning(
+            f"Excluding {result.scenario_count} scenarios on map {result.map_hash}, version {result.game_version}: {result.error}"
+        )
+
+    playable_rows = [
+        row
+        for row in scenario_rows
+        if (row["map_hash"], row["game_version"]) in playable_requirements
+    ]
+
+    return playable_rows, preflight_results
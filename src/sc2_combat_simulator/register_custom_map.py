@@ -18,6 +18,12 @@ def register_custom_map(
 
     class_name = f"{map_name_prefix}{map_name}"
 
+    # pysc2 refuses to look up maps with duplicate class names,
+    # each of the maps is registered only once:
+    existing_map_cls = globals().get(class_name)
+    if existing_map_cls is not None:
+        return class_name, existing_map_cls
+
     map_cls = type(
         class_name,
         (Map,),
@@ -0,0 +1,228 @@
+import logging
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.decorators import load_observed_replay, write_atomically
+from sc2_combat_simulator.scenario_index import (
+    connect_scenario_index,
+    get_scenario_index_row,
+    is_combat_file_indexed,
+    remove_unlisted_combat_files,
+    replace_combat_file_rows,
+)
+from sc2_combat_simulator.scenario_loader import (
+    get_interval_scenario_units,
+    list_combat_files,
+)
+from sc2_combat_simulator.settings import (
+    COMPILED_SCENARIO_DIR,
+    ENGAGEMENT_RADIUS,
+    SCENARIO_INDEX_FILENAME,
+    SCENARIO_SUFFIX,
+)
+
+
+def compile_interval_record(
+    combat_intervals_observations: obs_collection_pb.GameObservationCollection,
+    observation_interval: obs_collection_pb.ObservationInterval,
+    engagement_radius: float | None = ENGAGEMENT_RADIUS,
+) -> obs_collection_pb.CombatScenarioRecord:
+    """
+    Compiles the first observation of a combat interval into a compact record.
+    Only the units around the engaged units are kept, see crop_to_engagement.
+
+    Parameters
+    ----------
+    combat_intervals_observations : obs_collection_pb.GameObservationCollection
+        Re-observed combat intervals of a single replay.
+    observation_interval : obs_collection_pb.ObservationInterval
+        Interval with at least one observation.
+    engagement_radius : float | None, optional
+        Maximum distance of the kept units from the units engaged in the combat,
+        None keeps all of the units, by default ENGAGEMENT_RADIUS
+
+    Returns
+    -------
+    obs_collection_pb.CombatScenarioRecord
+        Returns the record with the filtered units of both players.
+    """
+
+    first_observation = observation_interval.observations[0]
+    player_units_map_state = get_interval_scenario_units(
+        observation_interval=observation_interval,
+        engagement_radius=engagement_radius,
+    )
+
+    record = obs_collection_pb.CombatScenarioRecord(
+        replay_path=combat_intervals_observations.replay_path,
+        map_hash=combat_intervals_observations.map_hash,
+        game_version=combat_intervals_observations.game_version,
+        start_time=observation_interval.start_time,
+        end_time=observation_interval.end_time,
+    )
+    record.player1_units.extend(player_units_map_state.player1_units)
+    record.player2_units.extend(player_units_map_state.player2_units)
+
+    player1_common = first_observation.player1.observation.player_common
+    if player1_common.HasField("food_used"):
+        record.player1_food_used = player1_common.food_used
+    if first_observation.HasField("player2"):
+        player2_common = first_observation.player2.observation.player_common
+        if player2_common.HasField("food_used"):
+            record.player2_food_used = player2_common.food_used
+
+    return record
+
+
+def compile_combat_file(
+    combat_interval_file: Path,
+    combat_detection_dir: Path,
+    output_directory: Path,
+    engagement_radius: float | None = ENGAGEMENT_RADIUS,
+) -> List[Dict[str, Any]]:
+    """
+    Writes one compact scenario record for each interval of a combat file.
+    The records are written to a directory mirroring the structure
+    of the combat detection directory, one directory per combat file.
+
+    Parameters
+    ----------
+    combat_interval_file : Path
+        File with the re-observed combat intervals of a single replay.
+    combat_detection_dir : Path
+        Directory where the message binary files from the detected combats are stored.
+    output_directory : Path
+        Directory where the compiled records are written.
+    engagement_radius : float | None, optional
+        Maximum distance of the kept units from the units engaged in the combat,
+        None keeps all of the units, by default ENGAGEMENT_RADIUS
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Returns the index rows describing the written records.
+    """
+
+    combat_intervals_observations = load_observed_replay(
+        input_filepath=combat_interval_file,
+    )
+
+    relative_dir_structure = combat_interval_file.relative_to(
+        combat_detection_dir
+    ).parent
+    record_directory = (
+        output_directory / relative_dir_structure / combat_interval_file.stem
+    )
+    # Intervals may have changed since the last compilation, stale records are removed:
+    if record_directory.exists():
+        shutil.rmtree(record_directory)
+    record_directory.mkdir(parents=True)
+
+    rows = []
+    for interval in combat_intervals_observations.observation_intervals:
+        if not interval.observations:
+            continue
+
+        record = compile_interval_record(
+            combat_intervals_observations=combat_intervals_observations,
+            observation_interval=interval,
+            engagement_radius=engagement_radius,
+        )
+        record_filepath = (
+            record_directory
+            / f"{interval.start_time}_{interval.end_time}{SCENARIO_SUFFIX}"
+        )
+        bin_str_record = record.SerializeToString()
+        write_atomically(data=bin_str_record, output_filepath=record_filepath)
+
+        row = get_scenario_index_row(
+            record=record,
+            record_path=record_filepath,
+            combat_file=combat_interval_file,
+            record_size_bytes=len(bin_str_record),
+        )
+        rows.append(row)
+
+    return rows
+
+
+def compile_scenarios(
+    combat_detection_dir: Path,
+    output_directory: Path = COMPILED_SCENARIO_DIR,
+    force: bool = False,
+    engagement_radius: float | None = ENGAGEMENT_RADIUS,
+) -> Path:
+    """
+    Compiles the combat files into compact scenario records and indexes them.
+    Combat files that were not modified since their last compilation with
+    the same engagement radius are skipped, also the ones that did not have
+    any intervals to compile. The index only covers the combat files listed
+    in the combat detection directory, the rows and records of any other
+    combat files, deleted or compiled from another directory, are removed.
+
+    Parameters
+    ----------
+    combat_detection_dir : Path
+        Directory where the message binary files from the detected combats are stored.
+    output_directory : Path, optional
+        Directory where the compiled records and the index are written,
+        by default COMPILED_SCENARIO_DIR
+    force : bool, optional
+        Compiles all of the combat files again, by default False
+    engagement_radius : float | None, optional
+        Maximum distance of the kept units from the units engaged in the combat,
+        None keeps all of the units, by default ENGAGEMENT_RADIUS
+
+    Returns
+    -------
+    Path
+        Returns the path to the SQLite scenario index.
+    """
+
+    output_directory.mkdir(parents=True, exist_ok=True)
+    index_filepath = output_directory / SCENARIO_INDEX_FILENAME
+
+    connection = connect_scenario_index(index_filepath=index_filepath)
+    try:
+        combat_files = list_combat_files(combat_detection_dir=combat_detection_dir)
+        removed_record_paths = remove_unlisted_combat_files(
+            connection=connection,
+            combat_files=combat_files,
+        )
+        for record_path in removed_record_paths:
+            record_path.unlink(missing_ok=True)
+        for record_directory in {path.parent for path in removed_record_paths}:
+            if record_directory.exists() and not any(record_directory.iterdir()):
+                record_directory.rmdir()
+        if removed_record_paths:
+            logging.info(
+                f"Removed {len(removed_record_paths)} scenarios of unlisted combat files"
+            )
+
+        for combat_interval_file in combat_files:
+            if not force and is_combat_file_indexed(
+                connection=connection,
+                combat_file=combat_interval_file,
+                engagement_radius=engagement_radius,
+            ):
+                continue
+
+            logging.info(f"Compiling scenarios from: {str(combat_interval_file)}")
+            rows = compile_combat_file(
+                combat_interval_file=combat_interval_file,
+                combat_detection_dir=combat_detection_dir,
+                output_directory=output_directory,
+                engagement_radius=engagement_radius,
+            )
+            replace_combat_file_rows(
+                connection=connection,
+                combat_file=combat_interval_file,
+                rows=rows,
+                engagement_radius=engagement_radius,
+            )
+    finally:
+        connection.close()
+
+    return index_filepath
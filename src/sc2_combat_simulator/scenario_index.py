@@ -0,0 +1,330 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from pysc2_evolved.lib import units as units_lib
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+
+SCENARIO_INDEX_COLUMNS = {
+    "record_path": "TEXT PRIMARY KEY",
+    "combat_file": "TEXT NOT NULL",
+    "combat_file_mtime": "REAL NOT NULL",
+    "replay_path": "TEXT NOT NULL",
+    "map_hash": "TEXT NOT NULL",
+    "game_version": "TEXT NOT NULL",
+    "start_time": "INTEGER NOT NULL",
+    "end_time": "INTEGER NOT NULL",
+    "duration": "INTEGER NOT NULL",
+    "player1_unit_count": "INTEGER NOT NULL",
+    "player2_unit_count": "INTEGER NOT NULL",
+    "unit_count": "INTEGER NOT NULL",
+    "player1_race": "TEXT",
+    "player2_race": "TEXT",
+    "player1_supply": "INTEGER",
+    "player2_supply": "INTEGER",
+    "record_size_bytes": "INTEGER NOT NULL",
+}
+
+# Every compiled combat file has a row here, also the ones without any records,
+# so that these are not compiled again on every run. The engagement radius used
+# to crop the records is kept, NULL when all of the units were kept:
+COMPILED_FILES_COLUMNS = {
+    "combat_file": "TEXT PRIMARY KEY",
+    "combat_file_mtime": "REAL NOT NULL",
+    "engagement_radius": "REAL",
+}
+
+
+def get_units_race(units: Iterable[Any]) -> str | None:
+    """
+    Acquires the race of the units based on their types.
+
+    Parameters
+    ----------
+    units : Iterable[Any]
+        Raw units of a single player.
+
+    Returns
+    -------
+    str | None
+        Returns the name of the race, or None if the units are of none
+        or multiple races.
+    """
+
+    races = set()
+    for unit in units:
+        unit_type = units_lib.get_unit_type(unit.unit_type)
+        if unit_type is None or isinstance(unit_type, units_lib.Neutral):
+            continue
+        races.add(type(unit_type).__name__)
+
+    if len(races) != 1:
+        return None
+
+    return races.pop()
+
+
+def connect_scenario_index(index_filepath: Path) -> sqlite3.Connection:
+    """
+    Opens the scenario index, creating the tables if they do not exist.
+
+    Parameters
+    ----------
+    index_filepath : Path
+        Path to the SQLite file of the index.
+
+    Returns
+    -------
+    sqlite3.Connection
+        Returns a connection with the rows accessible by the column names.
+    """
+
+    connection = sqlite3.connect(str(index_filepath))
+    connection.row_factory = sqlite3.Row
+
+    column_definitions = ", ".join(
+        f"{name} {definition}" for name, definition in SCENARIO_INDEX_COLUMNS.items()
+    )
+    connection.execute(f"CREATE TABLE IF NOT EXISTS scenarios ({column_definitions})")
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS scenarios_version_map "
+        "ON scenarios (game_version, map_hash)"
+    )
+
+    # The table only tracks which of the files were compiled, if its columns
+    # changed it is dropped and all of the files are compiled again:
+    existing_columns = [
+        row["name"]
+        for row in connection.execute("PRAGMA table_info(compiled_files)").fetchall()
+    ]
+    if existing_columns and existing_columns != list(COMPILED_FILES_COLUMNS):
+        connection.execute("DROP TABLE compiled_files")
+    compiled_files_definitions = ", ".join(
+        f"{name} {definition}" for name, definition in COMPILED_FILES_COLUMNS.items()
+    )
+    connection.execute(
+        f"CREATE TABLE IF NOT EXISTS compiled_files ({compiled_files_definitions})"
+    )
+    connection.commit()
+
+    return connection
+
+
+def get_scenario_index_row(
+    record: obs_collection_pb.CombatScenarioRecord,
+    record_path: Path,
+    combat_file: Path,
+    record_size_bytes: int,
+) -> Dict[str, Any]:
+    """
+    Describes a compiled scenario record as a row of the index.
+
+    Parameters
+    ----------
+    record : obs_collection_pb.CombatScenarioRecord
+        Compiled scenario.
+    record_path : Path
+        Path where the record was written.
+    combat_file : Path
+        Combat file from which the record was compiled.
+    record_size_bytes : int
+        Size of the serialized record.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Returns a dictionary with a value for each of the index columns.
+    """
+
+    player1_supply = None
+    if record.HasField("player1_food_used"):
+        player1_supply = record.player1_food_used
+    player2_supply = None
+    if record.HasField("player2_food_used"):
+        player2_supply = record.player2_food_used
+
+    return {
+        "record_path": str(record_path),
+        "combat_file": str(combat_file),
+        "combat_file_mtime": combat_file.stat().st_mtime,
+        "replay_path": record.replay_path,
+        "map_hash": record.map_hash,
+        "game_version": record.game_version,
+        "start_time": record.start_time,
+        "end_time": record.end_time,
+        "duration": record.end_time - record.start_time,
+        "player1_unit_count": len(record.player1_units),
+        "player2_unit_count": len(record.player2_units),
+        "unit_count": len(record.player1_units) + len(record.player2_units),
+        "player1_race": get_units_race(units=record.player1_units),
+        "player2_race": get_units_race(units=record.player2_units),
+        "player1_supply": player1_supply,
+        "player2_supply": player2_supply,
+        "record_size_bytes": record_size_bytes,
+    }
+
+
+def replace_combat_file_rows(
+    connection: sqlite3.Connection,
+    combat_file: Path,
+    rows: List[Dict[str, Any]],
+    engagement_radius: float | None,
+) -> None:
+    """
+    Replaces all of the index rows compiled from a combat file in one transaction,
+    and marks the current version of the file as compiled, also if it has no rows.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the scenario index.
+    combat_file : Path
+        Combat file from which the rows were compiled.
+    rows : List[Dict[str, Any]]
+        Rows describing the records, see get_scenario_index_row.
+    engagement_radius : float | None
+        Engagement radius with which the records were compiled.
+    """
+
+    column_names = ", ".join(SCENARIO_INDEX_COLUMNS)
+    placeholders = ", ".join(f":{name}" for name in SCENARIO_INDEX_COLUMNS)
+    with connection:
+        connection.execute(
+            "DELETE FROM scenarios WHERE combat_file = ?",
+            (str(combat_file),),
+        )
+        connection.executemany(
+            f"INSERT OR REPLACE INTO scenarios ({column_names}) VALUES ({placeholders})",
+            rows,
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO compiled_files "
+            "(combat_file, combat_file_mtime, engagement_radius) VALUES (?, ?, ?)",
+            (str(combat_file), combat_file.stat().st_mtime, engagement_radius),
+        )
+
+
+def remove_unlisted_combat_files(
+    connection: sqlite3.Connection,
+    combat_files: Iterable[Path],
+) -> List[Path]:
+    """
+    Removes the index rows of the combat files that are not listed, either
+    because they were deleted or because they are in another directory.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the scenario index.
+    combat_files : Iterable[Path]
+        Combat files whose rows are kept.
+
+    Returns
+    -------
+    List[Path]
+        Returns the paths of the records of the removed rows.
+    """
+
+    listed_files = {str(combat_file) for combat_file in combat_files}
+    indexed_files = {
+        row["combat_file"]
+        for row in connection.execute(
+            "SELECT combat_file FROM compiled_files "
+            "UNION SELECT combat_file FROM scenarios"
+        )
+    }
+    unlisted_files = [
+        (combat_file,) for combat_file in sorted(indexed_files - listed_files)
+    ]
+    record_paths = [
+        Path(row["record_path"])
+        for row in connection.execute("SELECT combat_file, record_path FROM scenarios")
+        if row["combat_file"] not in listed_files
+    ]
+    with connection:
+        connection.executemany(
+            "DELETE FROM scenarios WHERE combat_file = ?", unlisted_files
+        )
+        connection.executemany(
+            "DELETE FROM compiled_files WHERE combat_file = ?", unlisted_files
+        )
+
+    return record_paths
+
+
+def is_combat_file_indexed(
+    connection: sqlite3.Connection,
+    combat_file: Path,
+    engagement_radius: float | None,
+) -> bool:
+    """
+    Checks if the current version of a combat file was compiled into the index
+    with the same engagement radius.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the scenario index.
+    combat_file : Path
+        Combat file to be checked.
+    engagement_radius : float | None
+        Engagement radius with which the records are to be compiled.
+
+    Returns
+    -------
+    bool
+        Returns True if the combat file was compiled after its last modification,
+        with the same engagement radius.
+    """
+
+    row = connection.execute(
+        "SELECT combat_file_mtime, engagement_radius FROM compiled_files "
+        "WHERE combat_file = ?",
+        (str(combat_file),),
+    ).fetchone()
+    if row is None:
+        return False
+
+    return (
+        row["combat_file_mtime"] == combat_file.stat().st_mtime
+        and row["engagement_radius"] == engagement_radius
+    )
+
+
+def query_scenarios(
+    connection: sqlite3.Connection,
+    where: str | None = None,
+    parameters: Iterable[Any] = (),
+) -> List[sqlite3.Row]:
+    """
+    Selects the scenarios from the index, grouped by the game version and map.
+
+    The condition is inserted into the query as it is, it must come from
+    a trusted source such as the command line of the user owning the index.
+    Values coming from anywhere else must be passed as the parameters bound
+    to the "?" placeholders of the condition.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Connection to the scenario index.
+    where : str | None, optional
+        Trusted SQL condition on the index columns, e.g. "unit_count <= ?",
+        by default None
+    parameters : Iterable[Any], optional
+        Parameters bound to the placeholders of the condition, by default ()
+
+    Returns
+    -------
+    List[sqlite3.Row]
+        Returns the matching rows, sorted so that the scenarios
+        sharing a game version and map are next to each other.
+    """
+
+    query = "SELECT * FROM scenarios"
+    if where:
+        query += f" WHERE {where}"
+    query += " ORDER BY game_version, map_hash, record_path"
+
+    return connection.execute(query, tuple(parameters)).fetchall()
@@ -0,0 +1,280 @@
+from pathlib import Path
+from typing import List, Set
+
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.decorators import load_observed_replay
+from sc2_combat_detector.settings import SUFFIX
+from sc2_combat_simulator.engagement_extractor import crop_to_engagement
+from sc2_combat_simulator.function_results.combat_scenario import CombatScenario
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+from sc2_combat_simulator.settings import ENGAGEMENT_RADIUS
+
+
+def filter_units(
+    units: List[sc2proto_raw_pb.Unit],
+    unit_types_to_ignore: Set[int] = {},
+    alliance: int = sc2proto_raw_pb.Alliance.Self,
+) -> List[sc2proto_raw_pb.Unit]:
+    """
+    Filters the units based on several criteria required to recreate the combat scenarios.
+
+    Parameters
+    ----------
+    units : List[sc2proto_raw_pb.Unit]
+        List of all of the observed units.
+    unit_types_to_ignore : Set[int], optional
+        Types of units that should be ignored, by default {}
+    alliance : int, optional
+        Alliance relative to the observing player of the units that should be kept,
+        by default sc2proto_raw_pb.Alliance.Self
+
+    Returns
+    -------
+    List[sc2proto_raw_pb.Unit]
+        Returns a list of filtered units that are supposed to be placed on the map.
+    """
+
+    units_to_keep = []
+    for unit in units:
+        # Filter out units that are currently being built:
+        if not unit.is_active:
+            continue
+
+        # Filter out units that are harvesters (probe, scv, drone):
+        # Unit has no attribute "type"
+        # if unit.type in unit_types_to_ignore:
+        #     continue
+
+        # Get only units that are marked with the requested alliance:
+        if unit.alliance != alliance:
+            continue
+
+        units_to_keep.append(unit)
+
+    return units_to_keep
+
+
+def get_observation_units(
+    observation: obs_collection_pb.Observation,
+) -> PlayerUnitsMapState:
+    """
+    Acquires the units to re-create combat environment from a single observation.
+
+    Parameters
+    ----------
+    observation : obs_collection_pb.Observation
+        Observation of the combat.
+
+    Returns
+    -------
+    PlayerUnitsMapState
+        Returns the filtered units and the map state of both players.
+    """
+
+    player1_response_obs = observation.player1
+    player1_obs = player1_response_obs.observation
+    player1_raw_obs = player1_obs.raw_data
+
+    player1_units = player1_raw_obs.units
+    player1_map_state = player1_raw_obs.map_state
+
+    player1_filtered_units = filter_units(units=player1_units)
+
+    if observation.HasField("player2"):
+        player2_response_obs = observation.player2
+        player2_obs = player2_response_obs.observation
+        player2_raw_obs = player2_obs.raw_data
+
+        player2_units = player2_raw_obs.units
+        player2_map_state = player2_raw_obs.map_state
+
+        player2_filtered_units = filter_units(units=player2_units)
+    else:
+        # Observed from a single perspective with the fog of war disabled,
+        # the units of the second player are the enemies of the first one:
+        player2_map_state = player1_map_state
+        player2_filtered_units = filter_units(
+            units=player1_units,
+            alliance=sc2proto_raw_pb.Alliance.Enemy,
+        )
+
+    player_units_map_state = PlayerUnitsMapState(
+        player1_units=player1_filtered_units,
+        player2_units=player2_filtered_units,
+        player1_map_state=player1_map_state,
+        player2_map_state=player2_map_state,
+    )
+
+    return player_units_map_state
+
+
+def get_interval_scenario_units(
+    observation_interval: obs_collection_pb.ObservationInterval,
+    engagement_radius: float | None = ENGAGEMENT_RADIUS,
+) -> PlayerUnitsMapState:
+    """
+    Acquires the units of the scenario starting at the first observation of an
+    interval, cropped to the region of the map where the combat took place.
+
+    Parameters
+    ----------
+    observation_interval : obs_collection_pb.ObservationInterval
+        Interval with at least one observation.
+    engagement_radius : float | None, optional
+        Maximum distance of the kept units from the units engaged in the combat,
+        None keeps all of the units, by default ENGAGEMENT_RADIUS
+
+    Returns
+    -------
+    PlayerUnitsMapState
+        Returns the units and the map state of both players.
+    """
+
+    player_units_map_state = get_observation_units(
+        observation=observation_interval.observations[0]
+    )
+    if engagement_radius is None:
+        return player_units_map_state
+
+    return crop_to_engagement(
+        player_units_map_state=player_units_map_state,
+        observation_interval=observation_interval,
+        engagement_radius=engagement_radius,
+    )
+
+
+def get_all_units(
+    observation_interval: obs_collection_pb.ObservationInterval,
+) -> List[PlayerUnitsMapState]:
+    """
+    Acquires the units to re-create combat environment from observation interval.
+
+    Parameters
+    ----------
+    observation_interval : obs_collection_pb.ObservationInterval
+        Observation interval containing the observations of the combat.
+
+    Returns
+    -------
+    List[PlayerUnitsMapState]
+        Returns a list of PlayerUnitsMapState objects for each observation in the interval.
+    """
+
+    units_in_observations = [
+        get_observation_units(observation=observation)
+        for observation in observation_interval.observations
+    ]
+
+    return units_in_observations
+
+
+def list_combat_files(combat_detection_dir: Path) -> List[Path]:
+    """
+    Lists the files with the re-observed combat intervals.
+
+    Parameters
+    ----------
+    combat_detection_dir : Path
+        Directory where the message binary files from the detected combats are stored.
+
+    Returns
+    -------
+    List[Path]
+        Returns a sorted list of the combat files.
+    """
+
+    return sorted(combat_detection_dir.rglob(f"*{SUFFIX}"))
+
+
+def load_combat_scenarios(combat_interval_file: Path) -> List[CombatScenario]:
+    """
+    Loads the scenarios that can be reproduced from a single combat file.
+    Each of the scenarios starts from the first observation of a combat interval.
+
+    Parameters
+    ----------
+    combat_interval_file : Path
+        File with the re-observed combat intervals of a single replay.
+
+    Returns
+    -------
+    List[CombatScenario]
+        Returns a list of scenarios, intervals without observations are skipped.
+    """
+
+    combat_intervals_observations = load_observed_replay(
+        input_filepath=combat_interval_file,
+    )
+
+    scenarios = []
+    for interval in combat_intervals_observations.observation_intervals:
+        if not interval.observations:
+            continue
+
+        player_units_map_state = get_interval_scenario_units(
+            observation_interval=interval
+        )
+
+        scenario = CombatScenario(
+            combat_interval_file=combat_interval_file,
+            map_name=combat_intervals_observations.map_hash,
+            game_version=combat_intervals_observations.game_version,
+            start_time=interval.start_time,
+            end_time=interval.end_time,
+            player_units_map_state=player_units_map_state,
+        )
+        scenarios.append(scenario)
+
+    return scenarios
+
+
+def load_scenario_record(
+    record_filepath: Path,
+) -> obs_collection_pb.CombatScenarioRecord:
+    record = obs_collection_pb.CombatScenarioRecord()
+    with record_filepath.open("rb") as in_f:
+        raw_data = in_f.read()
+        record.ParseFromString(raw_data)
+
+    return record
+
+
+def load_compiled_scenario(record_filepath: Path) -> CombatScenario:
+    """
+    Loads a scenario from a compact record written by the scenario compiler.
+
+    Parameters
+    ----------
+    record_filepath : Path
+        Path to the compiled scenario record.
+
+    Returns
+    -------
+    CombatScenario
+        Returns the scenario, the records do not keep the map states,
+        they are left empty.
+    """
+
+    record = load_scenario_record(record_filepath=record_filepath)
+
+    player_units_map_state = PlayerUnitsMapState(
+        player1_units=list(record.player1_units),
+        player2_units=list(record.player2_units),
+        player1_map_state=sc2proto_raw_pb.MapState(),
+        player2_map_state=sc2proto_raw_pb.MapState(),
+    )
+
+    scenario = CombatScenario(
+        combat_interval_file=record_filepath,
+        map_name=record.map_hash,
+        game_version=record.game_version,
+        start_time=record.start_time,
+        end_time=record.end_time,
+        player_units_map_state=player_units_map_state,
+    )
+
+    return scenario
@@ -0,0 +1,96 @@
+import itertools
+from multiprocessing.pool import ThreadPool
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Mapping, Tuple
+
+from sc2_combat_simulator.function_results.combat_scenario import CombatScenario
+from sc2_combat_simulator.function_results.scenario_group import ScenarioGroup
+from sc2_combat_simulator.scenario_loader import load_compiled_scenario
+
+
+def group_scenarios(scenario_rows: Iterable[Mapping[str, Any]]) -> List[ScenarioGroup]:
+    """
+    Groups the pending scenarios by the game version and map. The groups are
+    ordered by the game version first, switching the game binary is the most
+    expensive part of an engine restart.
+
+    Parameters
+    ----------
+    scenario_rows : Iterable[Mapping[str, Any]]
+        Rows of the scenario index, see query_scenarios.
+
+    Returns
+    -------
+    List[ScenarioGroup]
+        Returns a list of groups, each of them holding all of the scenarios
+        that can be played in a single environment.
+    """
+
+    def get_group_key(row: Mapping[str, Any]) -> Tuple[str, str]:
+        return row["game_version"], row["map_hash"]
+
+    sorted_rows = sorted(
+        scenario_rows,
+        key=lambda row: (*get_group_key(row), row["record_path"]),
+    )
+
+    scenario_groups = []
+    for (game_version, map_hash), rows in itertools.groupby(
+        sorted_rows,
+        key=get_group_key,
+    ):
+        scenario_group = ScenarioGroup(
+            game_version=game_version,
+            map_hash=map_hash,
+            record_paths=[Path(row["record_path"]) for row in rows],
+        )
+        scenario_groups.append(scenario_group)
+
+    return scenario_groups
+
+
+def load_group_scenarios(scenario_group: ScenarioGroup) -> List[CombatScenario]:
+    return [
+        load_compiled_scenario(record_filepath=record_path)
+        for record_path in scenario_group.record_paths
+    ]
+
+
+def schedule_scenarios(
+    scenario_rows: Iterable[Mapping[str, Any]],
+) -> Iterator[Tuple[ScenarioGroup, List[CombatScenario]]]:
+    """
+    Yields the groups of scenarios one by one. While a group is being played,
+    the scenarios of the next group are loaded on a background thread.
+
+    Parameters
+    ----------
+    scenario_rows : Iterable[Mapping[str, Any]]
+        Rows of the scenario index, see query_scenarios.
+
+    Yields
+    ------
+    Iterator[Tuple[ScenarioGroup, List[CombatScenario]]]
+        Yields the group and all of its loaded scenarios.
+    """
+
+    scenario_groups = group_scenarios(scenario_rows=scenario_rows)
+    if not scenario_groups:
+        return
+
+    with ThreadPool(processes=1) as thread_pool:
+        pending_result = thread_pool.apply_async(
+            load_group_scenarios,
+            (scenario_groups[0],),
+        )
+        for index, scenario_group in enumerate(scenario_groups):
+            scenarios = pending_result.get()
+
+            # Prefetch the next group while the current one is played:
+            if index + 1 < len(scenario_groups):
+                pending_result = thread_pool.apply_async(
+                    load_group_scenarios,
+                    (scenario_groups[index + 1],),
+                )
+
+            yield scenario_group, scenarios
@@ -0,0 +1,400 @@
+import json
+import logging
+import os
+import random
+import shutil
+from pathlib import Path
+from typing import Any, Iterable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+
+from sc2_combat_simulator.function_results.combat_scenario import CombatScenario
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+from sc2_combat_simulator.scenario_loader import load_scenario_record
+
+# Fields of the units required to spawn the scenarios and to verify the spawn:
+STORE_UNIT_DTYPE = np.dtype(
+    [
+        ("tag", np.uint64),
+        ("unit_type", np.uint32),
+        ("owner", np.int32),
+        ("x", np.float32),
+        ("y", np.float32),
+        ("z", np.float32),
+        ("facing", np.float32),
+        ("health", np.float32),
+        ("health_max", np.float32),
+        ("shield", np.float32),
+        ("shield_max", np.float32),
+        ("energy", np.float32),
+        ("energy_max", np.float32),
+        ("is_flying", np.bool_),
+    ]
+)
+
+# Scenarios are sorted by the game version and map, the units of a scenario are
+# stored in a contiguous range starting with the units of the first player:
+STORE_SCENARIO_DTYPE = np.dtype(
+    [
+        ("units_start", np.int64),
+        ("player1_unit_count", np.int32),
+        ("player2_unit_count", np.int32),
+        ("start_time", np.int32),
+        ("end_time", np.int32),
+        ("group_index", np.int32),
+    ]
+)
+
+# Contiguous ranges of the scenarios sharing a game version and map:
+STORE_GROUP_DTYPE = np.dtype(
+    [
+        ("scenarios_start", np.int64),
+        ("scenario_count", np.int64),
+    ]
+)
+
+STORE_METADATA_FILENAME = "metadata.json"
+
+
+def _fill_unit_rows(
+    unit_rows: np.ndarray,
+    units: Sequence[sc2proto_raw_pb.Unit],
+) -> None:
+    for index, unit in enumerate(units):
+        unit_rows[index] = (
+            unit.tag,
+            unit.unit_type,
+            unit.owner,
+            unit.pos.x,
+            unit.pos.y,
+            unit.pos.z,
+            unit.facing,
+            unit.health,
+            unit.health_max,
+            unit.shield,
+            unit.shield_max,
+            unit.energy,
+            unit.energy_max,
+            unit.is_flying,
+        )
+
+
+def _get_unit_protos(unit_rows: np.ndarray) -> List[sc2proto_raw_pb.Unit]:
+    units = []
+    for row in unit_rows.tolist():
+        (
+            tag,
+            unit_type,
+            owner,
+            x,
+            y,
+            z,
+            facing,
+            health,
+            health_max,
+            shield,
+            shield_max,
+            energy,
+            energy_max,
+            is_flying,
+        ) = row
+        unit = sc2proto_raw_pb.Unit(
+            tag=tag,
+            unit_type=unit_type,
+            owner=owner,
+            facing=facing,
+            health=health,
+            health_max=health_max,
+            shield=shield,
+            shield_max=shield_max,
+            energy=energy,
+            energy_max=energy_max,
+            is_flying=is_flying,
+            is_active=True,
+        )
+        unit.pos.x = x
+        unit.pos.y = y
+        unit.pos.z = z
+        units.append(unit)
+
+    return units
+
+
+def build_scenario_store(
+    scenario_rows: Iterable[Mapping[str, Any]],
+    output_directory: Path,
+) -> Path:
+    """
+    Packs the compiled scenarios into a read-only store of flat NumPy arrays,
+    which the worker processes memory-map instead of parsing the records.
+    The store is written to a temporary directory and moved into place,
+    so the workers never attach to a partially written store.
+
+    Parameters
+    ----------
+    scenario_rows : Iterable[Mapping[str, Any]]
+        Rows of the scenario index, see query_scenarios.
+    output_directory : Path
+        Directory of the store, replaced if it exists.
+
+    Returns
+    -------
+    Path
+        Returns the directory of the store.
+    """
+
+    def get_group_key(row: Mapping[str, Any]) -> Tuple[str, str]:
+        return row["game_version"], row["map_hash"]
+
+    sorted_rows = sorted(
+        scenario_rows,
+        key=lambda row: (*get_group_key(row), row["record_path"]),
+    )
+    n_units = sum(row["unit_count"] for row in sorted_rows)
+
+    temporary_directory = output_directory.with_name(output_directory.name + ".tmp")
+    if temporary_directory.exists():
+        shutil.rmtree(temporary_directory)
+    temporary_directory.mkdir(parents=True)
+
+    # The sizes are known from the index, the arrays are written in place:
+    units = np.lib.format.open_memmap(
+        temporary_directory / "units.npy",
+        mode="w+",
+        dtype=STORE_UNIT_DTYPE,
+        shape=(n_units,),
+    )
+    scenarios = np.lib.format.open_memmap(
+        temporary_directory / "scenarios.npy",
+        mode="w+",
+        dtype=STORE_SCENARIO_DTYPE,
+        shape=(len(sorted_rows),),
+    )
+
+    group_keys: List[Tuple[str, str]] = []
+    group_ranges = []
+    units_start = 0
+    for scenario_index, row in enumerate(sorted_rows):
+        group_key = get_group_key(row)
+        if not group_keys or group_keys[-1] != group_key:
+            group_keys.append(group_key)
+            group_ranges.append((scenario_index, 0))
+        scenarios_start, scenario_count = group_ranges[-1]
+        group_ranges[-1] = (scenarios_start, scenario_count + 1)
+
+        record = load_scenario_record(record_filepath=Path(row["record_path"]))
+        player1_unit_count = len(record.player1_units)
+        player2_unit_count = len(record.player2_units)
+        _fill_unit_rows(
+            unit_rows=units[units_start : units_start + player1_unit_count],
+            units=record.player1_units,
+        )
+        _fill_unit_rows(
+            unit_rows=units[
+                units_start + player1_unit_count : units_start
+                + player1_unit_count
+                + player2_unit_count
+            ],
+            units=record.player2_units,
+        )
+        scenarios[scenario_index] = (
+            units_start,
+            player1_unit_count,
+            player2_unit_count,
+            record.start_time,
+            record.end_time,
+            len(group_keys) - 1,
+        )
+        units_start += player1_unit_count + player2_unit_count
+
+    if units_start != n_units:
+        raise ValueError(
+            f"The index describes {n_units} units, but the records hold {units_start}, please compile the scenarios again."
+        )
+
+    units.flush()
+    scenarios.flush()
+    del units, scenarios
+
+    groups = np.array(group_ranges, dtype=STORE_GROUP_DTYPE)
+    np.save(temporary_directory / "groups.npy", groups)
+    record_paths = np.array(
+        [str(row["record_path"]).encode() for row in sorted_rows],
+        dtype=bytes,
+    )
+    np.save(temporary_directory / "record_paths.npy", record_paths)
+
+    metadata = {
+        "n_scenarios": len(sorted_rows),
+        "n_units": n_units,
+        "groups": [
+            {"game_version": game_version, "map_hash": map_hash}
+            for game_version, map_hash in group_keys
+        ],
+    }
+    with (temporary_directory / STORE_METADATA_FILENAME).open("w") as out_f:
+        json.dump(metadata, out_f, indent=2)
+
+    if output_directory.exists():
+        shutil.rmtree(output_directory)
+    os.replace(temporary_directory, output_directory)
+
+    logging.info(
+        f"Packed {len(sorted_rows)} scenarios with {n_units} units in {len(group_keys)} groups into {str(output_directory)}"
+    )
+
+    return output_directory
+
+
+class ScenarioStore:
+    """
+    Read-only view of a store written by build_scenario_store. The arrays are
+    memory-mapped, all of the processes attached to the same store share the
+    pages of the operating system cache, and a scenario is converted to unit
+    messages only when it is requested.
+
+    Parameters
+    ----------
+    store_directory : Path
+        Directory of the store.
+    """
+
+    def __init__(self, store_directory: Path) -> None:
+        with (store_directory / STORE_METADATA_FILENAME).open("r") as in_f:
+            metadata = json.load(in_f)
+
+        self._group_keys = [
+            (group["game_version"], group["map_hash"]) for group in metadata["groups"]
+        ]
+        self._units = np.load(store_directory / "units.npy", mmap_mode="r")
+        self._scenarios = np.load(store_directory / "scenarios.npy", mmap_mode="r")
+        self._groups = np.load(store_directory / "groups.npy", mmap_mode="r")
+        self._record_paths = np.load(
+            store_directory / "record_paths.npy", mmap_mode="r"
+        )
+
+    def __len__(self) -> int:
+        return len(self._scenarios)
+
+    @property
+    def n_groups(self) -> int:
+        return len(self._groups)
+
+    def get_group(self, group_index: int) -> Tuple[str, str, int, int]:
+        """
+        Describes a group of scenarios sharing a game version and map.
+
+        Parameters
+        ----------
+        group_index : int
+            Index of the group.
+
+        Returns
+        -------
+        Tuple[str, str, int, int]
+            Returns the game version, map hash, index of the first scenario,
+            and the number of scenarios in the group.
+        """
+
+        game_version, map_hash = self._group_keys[group_index]
+        group = self._groups[group_index]
+
+        return (
+            game_version,
+            map_hash,
+            int(group["scenarios_start"]),
+            int(group["scenario_count"]),
+        )
+
+    def get_scenario(self, scenario_index: int) -> CombatScenario:
+        """
+        Builds a scenario from the packed units.
+
+        Parameters
+        ----------
+        scenario_index : int
+            Index of the scenario in the store.
+
+        Returns
+        -------
+        CombatScenario
+            Returns the scenario, the map states are left empty
+            as in the compiled records.
+        """
+
+        scenario = self._scenarios[scenario_index]
+        units_start = int(scenario["units_start"])
+        player1_unit_count = int(scenario["player1_unit_count"])
+        player2_unit_count = int(scenario["player2_unit_count"])
+        units_end = units_start + player1_unit_count + player2_unit_count
+        unit_rows = self._units[units_start:units_end]
+
+        game_version, map_hash = self._group_keys[int(scenario["group_index"])]
+        player_units_map_state = PlayerUnitsMapState(
+            player1_units=_get_unit_protos(unit_rows=unit_rows[:player1_unit_count]),
+            player2_units=_get_unit_protos(unit_rows=unit_rows[player1_unit_count:]),
+            player1_map_state=sc2proto_raw_pb.MapState(),
+            player2_map_state=sc2proto_raw_pb.MapState(),
+        )
+
+        return CombatScenario(
+            combat_interval_file=Path(self._record_paths[scenario_index].decode()),
+            map_name=map_hash,
+            game_version=game_version,
+            start_time=int(scenario["start_time"]),
+            end_time=int(scenario["end_time"]),
+            player_units_map_state=player_units_map_state,
+        )
+
+
+class StoreScenarioSampler:
+    """
+    Draws the scenarios from a scenario store. A group of scenarios sharing
+    a game version and map is chosen with the probability proportional to its
+    size, and a batch of its scenarios is drawn without replacement, so the
+    environment can be reused for the whole batch.
+
+    Parameters
+    ----------
+    store_directory : Path
+        Directory of the store.
+    seed : int | None
+        Seed for drawing the scenarios.
+    scenarios_per_group : int, optional
+        Maximum number of scenarios drawn from a group at once, by default 32
+    """
+
+    def __init__(
+        self,
+        store_directory: Path,
+        seed: int | None,
+        scenarios_per_group: int = 32,
+    ) -> None:
+        self._store = ScenarioStore(store_directory=store_directory)
+        if not len(self._store):
+            raise ValueError(f"The scenario store {str(store_directory)} is empty!")
+
+        self._random = random.Random(seed)
+        self._scenarios_per_group = scenarios_per_group
+        self._group_weights = [
+            self._store.get_group(group_index)[3]
+            for group_index in range(self._store.n_groups)
+        ]
+        self._pending_indices: List[int] = []
+
+    def next_scenario(self) -> CombatScenario:
+        if not self._pending_indices:
+            (group_index,) = self._random.choices(
+                range(self._store.n_groups),
+                weights=self._group_weights,
+            )
+            _, _, scenarios_start, scenario_count = self._store.get_group(group_index)
+            self._pending_indices = self._random.sample(
+                range(scenarios_start, scenarios_start + scenario_count),
+                min(scenario_count, self._scenarios_per_group),
+            )
+
+        return self._store.get_scenario(scenario_index=self._pending_indices.pop())
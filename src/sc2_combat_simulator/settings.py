@@ -6,3 +6,40 @@ LOGGING_FORMAT = "[%(asctime)s][%(process)d/%(thread)d][%(levelname)s][%(filenam
 REPLAY_DIR = Path("./data/agent_replays").resolve()
 if not REPLAY_DIR.exists():
     REPLAY_DIR.mkdir(parents=True, exist_ok=True)
+
+# Maps of the combat scenarios are registered as <prefix><map hash>,
+# and are read from the Maps/<directory> of the game installation:
+CUSTOM_MAP_NAME_PREFIX = "Map"
+CUSTOM_MAP_DIRECTORY = "CombatSimulator"
+
+# Scenarios end as a tie when no damage was dealt for 30 seconds (22.4 gameloops per second):
+STALEMATE_TIMEOUT_GAMELOOPS = 672
+
+# Scenarios are spawned into the running game between the episodes, the built-in
+# bot keeps playing meanwhile. The game is restarted after 10 minutes of game time,
+# before the bot gathers an army that could walk into the scenarios:
+MAX_IN_PLACE_GAMELOOPS = 13440
+
+# Compact scenario records compiled from the combat files, and their index:
+COMPILED_SCENARIO_DIR = Path("./data/compiled_scenarios").resolve()
+SCENARIO_SUFFIX = ".scenariopb"
+SCENARIO_INDEX_FILENAME = "scenario_index.sqlite"
+PREFLIGHT_MANIFEST_FILENAME = "preflight_manifest.json"
+
+# Game info and static data responses cached per game version and map:
+STATIC_DATA_CACHE_DIR = Path("./data/static_data_cache").resolve()
+
+# Outcomes of the evaluated agents, and the evaluation defaults:
+EVALUATION_RESULTS_FILEPATH = Path("./data/evaluation_results.sqlite").resolve()
+EVALUATION_CHUNK_SIZE = 50
+EVALUATION_MAX_EPISODE_STEPS = 10000
+
+# Offline transition datasets built from the combat observations:
+TRANSITION_DATASET_DIR = Path("./data/transition_dataset").resolve()
+TRANSITION_SHARD_SIZE = 4096
+MAX_TRANSITION_ACTIONS = 8
+SCENARIO_STORE_DIRNAME = "scenario_store"
+
+# Units further than this from any unit engaged in the combat are not spawned,
+# None keeps all of the units:
+ENGAGEMENT_RADIUS = 16.0
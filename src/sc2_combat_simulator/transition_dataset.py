@@ -0,0 +1,446 @@
+import bisect
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Sequence, Tuple
+
+import numpy as np
+from s2clientprotocol import sc2api_pb2 as sc_pb
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.decorators import load_observed_replay
+from sc2_combat_simulator.env.raw_unit_features import (
+    MAX_RAW_UNITS,
+    RAW_UNIT_FIELDS,
+    RawUnitArrayTransform,
+)
+from sc2_combat_simulator.scenario_loader import list_combat_files
+from sc2_combat_simulator.settings import (
+    MAX_TRANSITION_ACTIONS,
+    TRANSITION_SHARD_SIZE,
+)
+
+# Columns of the "actions" array, in order. The target type is 0 for no target,
+# 1 for a point and 2 for a unit, the target unit is given as its row in the
+# units of the observation, -1 if it was not observed:
+ACTION_FIELDS = (
+    "ability_id",
+    "target_type",
+    "target_x",
+    "target_y",
+    "target_unit_index",
+    "queue_command",
+)
+TARGET_NONE = 0
+TARGET_POINT = 1
+TARGET_UNIT = 2
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def get_transition_arrays_spec(
+    max_units: int,
+    max_actions: int,
+) -> Dict[str, Tuple[Tuple[int, ...], str]]:
+    """
+    Describes the arrays stored for each of the transitions.
+
+    Parameters
+    ----------
+    max_units : int
+        Number of unit slots of the observations.
+    max_actions : int
+        Number of action slots of a transition.
+
+    Returns
+    -------
+    Dict[str, Tuple[Tuple[int, ...], str]]
+        Returns the shape of a single transition and the dtype of each array.
+    """
+
+    n_unit_fields = len(RAW_UNIT_FIELDS)
+    return {
+        "units": ((max_units, n_unit_fields), "float32"),
+        "unit_mask": ((max_units,), "bool"),
+        "next_units": ((max_units, n_unit_fields), "float32"),
+        "next_unit_mask": ((max_units,), "bool"),
+        "actions": ((max_actions, len(ACTION_FIELDS)), "float32"),
+        "action_mask": ((max_actions,), "bool"),
+        # Units of the observation that were selected by each of the actions:
+        "action_unit_mask": ((max_actions, max_units), "bool"),
+        "delay": ((), "int32"),
+        "game_loop": ((), "int32"),
+    }
+
+
+def encode_actions(
+    request_action: sc_pb.RequestAction,
+    unit_indices: Mapping[int, int],
+    actions: np.ndarray,
+    action_mask: np.ndarray,
+    action_unit_mask: np.ndarray,
+) -> None:
+    """
+    Writes the raw unit commands of the recorded actions into the action arrays
+    of a single transition. Other actions, such as camera moves, are skipped.
+
+    Parameters
+    ----------
+    request_action : sc_pb.RequestAction
+        Actions recorded after the observation.
+    unit_indices : Mapping[int, int]
+        Rows of the observed units keyed by their tags.
+    actions : np.ndarray
+        Zeroed array of shape (max_actions, len(ACTION_FIELDS)).
+    action_mask : np.ndarray
+        Zeroed array of shape (max_actions,).
+    action_unit_mask : np.ndarray
+        Zeroed array of shape (max_actions, max_units).
+    """
+
+    max_actions = action_mask.shape[0]
+    action_index = 0
+    for action in request_action.actions:
+        if action_index >= max_actions:
+            break
+        if not action.action_raw.HasField("unit_command"):
+            continue
+
+        unit_command = action.action_raw.unit_command
+        target_type = TARGET_NONE
+        target_x = 0.0
+        target_y = 0.0
+        target_unit_index = -1
+        if unit_command.HasField("target_world_space_pos"):
+            target_type = TARGET_POINT
+            target_x = unit_command.target_world_space_pos.x
+            target_y = unit_command.target_world_space_pos.y
+        elif unit_command.HasField("target_unit_tag"):
+            target_type = TARGET_UNIT
+            target_unit_index = unit_indices.get(unit_command.target_unit_tag, -1)
+
+        actions[action_index] = (
+            unit_command.ability_id,
+            target_type,
+            target_x,
+            target_y,
+            target_unit_index,
+            unit_command.queue_command,
+        )
+        action_mask[action_index] = True
+        for unit_tag in unit_command.unit_tags:
+            unit_index = unit_indices.get(unit_tag)
+            if unit_index is not None:
+                action_unit_mask[action_index, unit_index] = True
+
+        action_index += 1
+
+
+class _ShardWriter:
+    """
+    Buffers the transitions in preallocated arrays and writes them to .npy
+    shards, which can be memory-mapped by the loader.
+    """
+
+    def __init__(
+        self,
+        output_directory: Path,
+        max_units: int,
+        max_actions: int,
+        shard_size: int,
+    ) -> None:
+        self._output_directory = output_directory
+        self._shard_size = shard_size
+        self._arrays_spec = get_transition_arrays_spec(
+            max_units=max_units,
+            max_actions=max_actions,
+        )
+        self._buffers = {
+            name: np.zeros((shard_size, *shape), dtype=dtype)
+            for name, (shape, dtype) in self._arrays_spec.items()
+        }
+        self._n_buffered = 0
+        self.shards: List[Dict[str, int | str]] = []
+
+    def next_slot(self) -> Dict[str, np.ndarray]:
+        """Returns the zeroed arrays of the next transition, flushing a full shard."""
+        if self._n_buffered == self._shard_size:
+            self.flush()
+
+        # Indexing with the ellipsis returns views, also of the scalar fields:
+        slot = {
+            name: buffer[self._n_buffered, ...]
+            for name, buffer in self._buffers.items()
+        }
+        self._n_buffered += 1
+
+        return slot
+
+    def flush(self) -> None:
+        if not self._n_buffered:
+            return
+
+        shard_name = f"shard_{len(self.shards):05d}"
+        shard_directory = self._output_directory / shard_name
+        shard_directory.mkdir(parents=True, exist_ok=True)
+        for name, buffer in self._buffers.items():
+            # Written under a temporary name, a shard is complete only when listed
+            # in the manifest:
+            temporary_filepath = shard_directory / f"{name}.tmp.npy"
+            np.save(temporary_filepath, buffer[: self._n_buffered])
+            os.replace(temporary_filepath, shard_directory / f"{name}.npy")
+            buffer[: self._n_buffered] = 0
+
+        self.shards.append({"name": shard_name, "size": self._n_buffered})
+        self._n_buffered = 0
+
+
+def iter_interval_transitions(
+    observation_interval: obs_collection_pb.ObservationInterval,
+) -> Iterator[Tuple[obs_collection_pb.Observation, obs_collection_pb.Observation]]:
+    """
+    Yields the pairs of consecutive observations of an interval. The last
+    observation of the interval has no next observation and is skipped.
+    """
+
+    observations = observation_interval.observations
+    for index in range(len(observations) - 1):
+        yield observations[index], observations[index + 1]
+
+
+def build_transition_dataset(
+    combat_detection_dir: Path,
+    output_directory: Path,
+    max_units: int = MAX_RAW_UNITS,
+    max_actions: int = MAX_TRANSITION_ACTIONS,
+    shard_size: int = TRANSITION_SHARD_SIZE,
+) -> Path:
+    """
+    Converts the observations of the first player in the combat intervals into
+    (observation, action, next observation, delay) transitions. The units are
+    encoded with RawUnitArrayTransform, and the recorded raw unit commands refer
+    to the selected and targeted units by their rows in the observation.
+    The transitions are written to sharded .npy files described by a manifest.
+
+    Parameters
+    ----------
+    combat_detection_dir : Path
+        Directory where the message binary files from the detected combats are stored.
+    output_directory : Path
+        Directory where the shards and the manifest are written.
+    max_units : int, optional
+        Number of unit slots of the observations, by default MAX_RAW_UNITS
+    max_actions : int, optional
+        Number of action slots of a transition, by default MAX_TRANSITION_ACTIONS
+    shard_size : int, optional
+        Number of transitions in a shard, by default TRANSITION_SHARD_SIZE
+
+    Returns
+    -------
+    Path
+        Returns the path to the manifest of the dataset.
+    """
+
+    output_directory.mkdir(parents=True, exist_ok=True)
+
+    transform = RawUnitArrayTransform(max_units=max_units)
+    shard_writer = _ShardWriter(
+        output_directory=output_directory,
+        max_units=max_units,
+        max_actions=max_actions,
+        shard_size=shard_size,
+    )
+
+    n_transitions = 0
+    for combat_interval_file in list_combat_files(
+        combat_detection_dir=combat_detection_dir
+    ):
+        logging.info(f"Building transitions from: {str(combat_interval_file)}")
+        combat_intervals_observations = load_observed_replay(
+            input_filepath=combat_interval_file,
+        )
+        for interval in combat_intervals_observations.observation_intervals:
+            for observation, next_observation in iter_interval_transitions(
+                observation_interval=interval
+            ):
+                slot = shard_writer.next_slot()
+
+                # The transform reuses its buffers, they are copied into the slot:
+                encoded = transform.transform_obs(obs=observation.player1)
+                slot["units"][:] = encoded["raw_units"]
+                slot["unit_mask"][:] = encoded["unit_mask"]
+                unit_count = int(encoded["unit_mask"].sum())
+                unit_indices = {
+                    int(tag): index
+                    for index, tag in enumerate(encoded["unit_tags"][:unit_count])
+                }
+
+                encoded = transform.transform_obs(obs=next_observation.player1)
+                slot["next_units"][:] = encoded["raw_units"]
+                slot["next_unit_mask"][:] = encoded["unit_mask"]
+
+                encode_actions(
+                    request_action=observation.force_action,
+                    unit_indices=unit_indices,
+                    actions=slot["actions"],
+                    action_mask=slot["action_mask"],
+                    action_unit_mask=slot["action_unit_mask"],
+                )
+                slot["delay"][...] = observation.force_action_delay
+                slot["game_loop"][...] = observation.game_loop
+
+                n_transitions += 1
+
+    shard_writer.flush()
+
+    manifest = {
+        "n_transitions": n_transitions,
+        "max_units": max_units,
+        "max_actions": max_actions,
+        "unit_fields": list(RAW_UNIT_FIELDS),
+        "action_fields": list(ACTION_FIELDS),
+        "shards": shard_writer.shards,
+    }
+    manifest_filepath = output_directory / MANIFEST_FILENAME
+    with manifest_filepath.open("w") as out_f:
+        json.dump(manifest, out_f, indent=2)
+
+    logging.info(
+        f"Wrote {n_transitions} transitions in {len(shard_writer.shards)} shards to {str(output_directory)}"
+    )
+
+    return manifest_filepath
+
+
+class TransitionDataset:
+    """
+    Random access to the transitions written by build_transition_dataset.
+    The shards are memory-mapped, reading a minibatch only touches the pages
+    of the selected transitions and does not parse any protobuf messages.
+
+    Parameters
+    ----------
+    dataset_directory : Path
+        Directory with the shards and the manifest.
+    """
+
+    def __init__(self, dataset_directory: Path) -> None:
+        self._dataset_directory = dataset_directory
+        with (dataset_directory / MANIFEST_FILENAME).open("r") as in_f:
+            self.manifest = json.load(in_f)
+
+        self.array_names = list(
+            get_transition_arrays_spec(
+                max_units=self.manifest["max_units"],
+                max_actions=self.manifest["max_actions"],
+            )
+        )
+        self._shards: List[Dict[str, np.ndarray]] = []
+        self._shard_starts: List[int] = []
+        n_transitions = 0
+        for shard in self.manifest["shards"]:
+            shard_directory = dataset_directory / shard["name"]
+            self._shards.append(
+                {
+                    name: np.load(shard_directory / f"{name}.npy", mmap_mode="r")
+                    for name in self.array_names
+                }
+            )
+            self._shard_starts.append(n_transitions)
+            n_transitions += shard["size"]
+
+        self._n_transitions = n_transitions
+
+    def __len__(self) -> int:
+        return self._n_transitions
+
+    def _check_not_empty(self) -> None:
+        if not self._n_transitions:
+            raise ValueError(
+                f"The transition dataset {str(self._dataset_directory)} is empty!"
+            )
+
+    def get_batch(self, indices: Sequence[int]) -> Dict[str, np.ndarray]:
+        """
+        Gathers the transitions at the given indices.
+
+        Parameters
+        ----------
+        indices : Sequence[int]
+            Indices of the transitions across all of the shards.
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            Returns the arrays of the transitions stacked along the first axis,
+            in the order of the indices.
+
+        Raises
+        ------
+        ValueError
+            Raises an error when the dataset has no transitions.
+        IndexError
+            Raises an error when any of the indices is negative or not lower
+            than the number of the transitions.
+        """
+
+        self._check_not_empty()
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        invalid_indices = indices[(indices < 0) | (indices >= self._n_transitions)]
+        if invalid_indices.size:
+            raise IndexError(
+                f"Transition indices {invalid_indices.tolist()} are out of range for a dataset of {self._n_transitions} transitions"
+            )
+        shard_indices = np.array(
+            [bisect.bisect_right(self._shard_starts, index) - 1 for index in indices],
+            dtype=np.int64,
+        )
+
+        batch = {}
+        for name in self.array_names:
+            first_array = self._shards[0][name]
+            batch[name] = np.empty(
+                (len(indices), *first_array.shape[1:]),
+                dtype=first_array.dtype,
+            )
+
+        for shard_index in np.unique(shard_indices):
+            positions = np.flatnonzero(shard_indices == shard_index)
+            # Sorted reads of a memory map are sequential on disk:
+            local_indices = indices[positions] - self._shard_starts[shard_index]
+            order = np.argsort(local_indices)
+            for name, array in self._shards[shard_index].items():
+                batch[name][positions[order]] = array[local_indices[order]]
+
+        return batch
+
+    def sample_batch(
+        self,
+        batch_size: int,
+        rng: np.random.Generator,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Samples a minibatch of transitions uniformly with replacement.
+
+        Parameters
+        ----------
+        batch_size : int
+            Number of the sampled transitions.
+        rng : np.random.Generator
+            Generator used to draw the indices.
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            Returns the arrays of the sampled transitions, see get_batch.
+
+        Raises
+        ------
+        ValueError
+            Raises an error when the dataset has no transitions.
+        """
+
+        self._check_not_empty()
+        indices = rng.integers(0, self._n_transitions, size=batch_size)
+        return self.get_batch(indices=indices)
@@ -0,0 +1,89 @@
+import logging
+from pathlib import Path
+
+import click
+
+from sc2_combat_simulator.env.raw_unit_features import MAX_RAW_UNITS
+from sc2_combat_simulator.main import LogLevel
+from sc2_combat_simulator.settings import (
+    LOGGING_FORMAT,
+    MAX_TRANSITION_ACTIONS,
+    TRANSITION_DATASET_DIR,
+    TRANSITION_SHARD_SIZE,
+)
+from sc2_combat_simulator.transition_dataset import build_transition_dataset
+
+
+@click.command(
+    help="Builds a sharded, memory-mapped dataset of (observation, action, next observation, delay) transitions from the detected combats for offline training."
+)
+@click.option(
+    "--combat_detection_dir",
+    type=click.Path(
+        dir_okay=True,
+        file_okay=False,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    required=True,
+    help="Directory where the message binary files from the detected combats are stored.",
+)
+@click.option(
+    "--output_dir",
+    type=click.Path(
+        dir_okay=True,
+        file_okay=False,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    default=TRANSITION_DATASET_DIR,
+    help="Directory where the shards and the manifest of the dataset are written.",
+)
+@click.option(
+    "--max_units",
+    type=int,
+    default=MAX_RAW_UNITS,
+    help=f"Number of unit slots of the observations. Default is {MAX_RAW_UNITS}.",
+)
+@click.option(
+    "--max_actions",
+    type=int,
+    default=MAX_TRANSITION_ACTIONS,
+    help=f"Number of action slots of a transition. Default is {MAX_TRANSITION_ACTIONS}.",
+)
+@click.option(
+    "--shard_size",
+    type=int,
+    default=TRANSITION_SHARD_SIZE,
+    help=f"Number of transitions in a shard. Default is {TRANSITION_SHARD_SIZE}.",
+)
+@click.option(
+    "--log",
+    type=click.Choice(list(LogLevel), case_sensitive=False),
+    default=LogLevel.WARNING,
+    help="Log level. Default is WARNING.",
+)
+def main(
+    combat_detection_dir: Path,
+    output_dir: Path,
+    max_units: int,
+    max_actions: int,
+    shard_size: int,
+    log: LogLevel,
+):
+    numeric_level = getattr(logging, log.upper(), None)
+    if not isinstance(numeric_level, int):
+        raise ValueError(f"Invalid log level: {numeric_level}")
+    logging.basicConfig(level=numeric_level, format=LOGGING_FORMAT)
+
+    build_transition_dataset(
+        combat_detection_dir=combat_detection_dir,
+        output_directory=output_dir,
+        max_units=max_units,
+        max_actions=max_actions,
+        shard_size=shard_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from sc2_combat_detector.detector.detect_combat import (
+    detect_combat_intervals,
+    get_game_features,
+    get_opponent_features,
+    get_relevant_features,
+)
+from sc2_combat_detector.function_arguments.observe_replay_args import ObserveReplayArgs
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
+from sc2_combat_detector.replay_processing.observe_replays import observe_replay
+
+SYNTHETIC_STREAM_ARGS = SyntheticStreamArgs(game_length=4000, n_units=4, n_fights=2)
+
+
+def observe_score(single_perspective: bool):
+    return observe_replay(
+        observe_replay_args=ObserveReplayArgs.get_initial_processing_args(
+            replay_path=Path("synthetic.SC2Replay"),
+            synthetic_stream_args=SYNTHETIC_STREAM_ARGS,
+            single_perspective=single_perspective,
+        )
+    )
+
+
+def test_opponent_features_match_the_opponent_perspective():
+    observation = observe_score(single_perspective=False).observation_intervals[0]
+    observation = observation.observations[-1]
+
+    opponent_features = get_opponent_features(
+        player_obs=observation.player1.observation
+    )
+    player2_features = get_relevant_features(player_obs=observation.player2.observation)
+
+    assert opponent_features.gameloop == player2_features.gameloop
+    assert opponent_features.killed_minerals_army == pytest.approx(
+        player2_features.killed_minerals_army
+    )
+    assert opponent_features.killed_vespene_army == pytest.approx(
+        player2_features.killed_vespene_army
+    )
+    assert opponent_features.total_damage_dealt == pytest.approx(
+        player2_features.total_damage_dealt
+    )
+    assert opponent_features.total_damage_dealt > 0
+
+
+def test_single_perspective_detects_the_same_intervals():
+    dual_collection = observe_score(single_perspective=False)
+    single_collection = observe_score(single_perspective=True)
+    assert not any(
+        observation.HasField("player2")
+        for interval in single_collection.observation_intervals
+        for observation in interval.observations
+    )
+
+    dual_features = get_game_features(proto_obs=dual_collection)
+    single_features = get_game_features(proto_obs=single_collection)
+    dual_intervals = detect_combat_intervals(
+        game_feature_dict=dual_features, plot=False
+    )
+    single_intervals = detect_combat_intervals(
+        game_feature_dict=single_features, plot=False
+    )
+
+    assert single_features.keys() == dual_features.keys()
+    for gameloop, features in dual_features.items():
+        assert single_features[gameloop] == pytest.approx(features)
+    assert dual_intervals
+    assert single_intervals == dual_intervals
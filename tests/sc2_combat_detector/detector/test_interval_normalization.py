@@ -0,0 +1,71 @@
+from sc2_combat_detector.detector.interval_normalization import normalize_intervals
+from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
+
+
+def make_interval(start_time: int, end_time: int):
+    return obs_collection_pb.ObservationInterval(
+        start_time=start_time,
+        end_time=end_time,
+    )
+
+
+def as_tuples(intervals):
+    return [(interval.start_time, interval.end_time) for interval in intervals]
+
+
+def test_overlapping_intervals_are_merged():
+    intervals = [make_interval(500, 900), make_interval(100, 600)]
+
+    assert as_tuples(normalize_intervals(intervals=intervals)) == [(100, 900)]
+
+
+def test_contained_interval_is_merged():
+    intervals = [make_interval(100, 900), make_interval(200, 300)]
+
+    assert as_tuples(normalize_intervals(intervals=intervals)) == [(100, 900)]
+
+
+def test_gap_within_merge_distance_is_merged():
+    intervals = [make_interval(100, 200), make_interval(250, 300)]
+
+    assert as_tuples(normalize_intervals(intervals=intervals, merge_distance=50)) == [
+        (100, 300)
+    ]
+
+
+def test_gap_over_merge_distance_is_kept():
+    intervals = [make_interval(100, 200), make_interval(251, 300)]
+
+    assert as_tuples(normalize_intervals(intervals=intervals, merge_distance=50)) == [
+        (100, 200),
+        (251, 300),
+    ]
+
+
+def test_padding_is_clamped_to_the_game():
+    intervals = [make_interval(20, 100), make_interval(900, 980)]
+
+    normalized_intervals = normalize_intervals(
+        intervals=intervals,
+        pre_padding=50,
+        post_padding=50,
+        max_gameloop=1000,
+    )
+
+    assert as_tuples(normalized_intervals) == [(0, 150), (850, 1000)]
+
+
+def test_padding_merges_neighbouring_intervals():
+    intervals = [make_interval(100, 200), make_interval(300, 400)]
+
+    normalized_intervals = normalize_intervals(
+        intervals=intervals,
+        pre_padding=50,
+        post_padding=50,
+    )
+
+    assert as_tuples(normalized_intervals) == [(50, 450)]
+
+
+def test_no_intervals():
+    assert normalize_intervals(intervals=[]) == []
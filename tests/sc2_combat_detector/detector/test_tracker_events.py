@@ -0,0 +1,81 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from sc2reader.events.tracker import PlayerStatsEvent, UnitDiedEvent
+
+from sc2_combat_detector.detector.tracker_events import (
+    get_tracker_event_features,
+    multithreading_detect_combat_from_tracker_events,
+)
+
+
+def make_player_stats_event(frame: int, pid: int, minerals: int, vespene: int):
+    event = object.__new__(PlayerStatsEvent)
+    event.frame = frame
+    event.pid = pid
+    event.minerals_killed_army = minerals
+    event.vespene_killed_army = vespene
+    return event
+
+
+def make_unit_died_event(frame: int, killing_player_id: int, owner_id: int):
+    event = object.__new__(UnitDiedEvent)
+    event.frame = frame
+    event.killing_player_id = killing_player_id
+    event.unit = SimpleNamespace(
+        owner=SimpleNamespace(pid=owner_id),
+        minerals=50,
+        vespene=25,
+    )
+    return event
+
+
+def make_replay(tracker_events, frames: int = 480):
+    return SimpleNamespace(
+        players=[SimpleNamespace(pid=1), SimpleNamespace(pid=2)],
+        tracker_events=tracker_events,
+        frames=frames,
+    )
+
+
+def test_killed_army_is_interpolated_between_the_reports():
+    replay = make_replay(
+        tracker_events=[
+            make_player_stats_event(frame=160, pid=1, minerals=0, vespene=0),
+            make_player_stats_event(frame=320, pid=1, minerals=1600, vespene=320),
+        ]
+    )
+
+    dataframe = get_tracker_event_features(replay=replay).set_index("gameloop")
+
+    assert dataframe.loc[160, "player1_killed_minerals_army"] == 0
+    assert dataframe.loc[240, "player1_killed_minerals_army"] == 800
+    assert dataframe.loc[240, "player1_killed_vespene_army"] == 160
+    assert dataframe.loc[480, "player1_killed_minerals_army"] == 1600
+    assert (dataframe["player2_killed_minerals_army"] == 0).all()
+
+
+def test_killed_unit_resources_are_exact():
+    replay = make_replay(
+        tracker_events=[
+            make_unit_died_event(frame=100, killing_player_id=2, owner_id=1),
+            make_unit_died_event(frame=200, killing_player_id=2, owner_id=1),
+            # Units killed by their own player are skipped:
+            make_unit_died_event(frame=300, killing_player_id=1, owner_id=1),
+        ]
+    )
+
+    dataframe = get_tracker_event_features(replay=replay).set_index("gameloop")
+
+    assert dataframe.loc[99, "player2_total_damage_dealt"] == 0
+    assert dataframe.loc[100, "player2_total_damage_dealt"] == 75
+    assert dataframe.loc[199, "player2_total_damage_dealt"] == 75
+    assert dataframe.loc[480, "player2_total_damage_dealt"] == 150
+    assert (dataframe["player1_total_damage_dealt"] == 0).all()
+
+
+def test_no_replays_return_empty_list(tmp_path: Path):
+    assert (
+        multithreading_detect_combat_from_tracker_events(replaypack_directory=tmp_path)
+        == []
+    )
@@ -0,0 +1,153 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sc2_combat_detector.replay_processing import concurrency_controller
+from sc2_combat_detector.replay_processing.concurrency_controller import (
+    GIGABYTE,
+    AdaptiveConcurrencyController,
+    map_with_concurrency_controller,
+)
+
+
+class FakeChildProcess:
+    def __init__(self, name: str, rss: int) -> None:
+        self._name = name
+        self._rss = rss
+
+    def name(self) -> str:
+        return self._name
+
+    def memory_info(self) -> SimpleNamespace:
+        return SimpleNamespace(rss=self._rss)
+
+
+class FakeProcess:
+    def __init__(self, children) -> None:
+        self._children = children
+
+    def children(self, recursive: bool = False) -> list:
+        return list(self._children)
+
+
+@pytest.fixture(autouse=True)
+def available_memory(monkeypatch):
+    memory = SimpleNamespace(available=64 * GIGABYTE)
+    monkeypatch.setattr(concurrency_controller.psutil, "virtual_memory", lambda: memory)
+    return memory
+
+
+def make_controller(engine_rss=(), worker_rss=(), **kwargs):
+    controller = AdaptiveConcurrencyController(
+        memory_budget_bytes=kwargs.pop("memory_budget_bytes", 8 * GIGABYTE),
+        poll_interval=0.01,
+        **kwargs,
+    )
+    controller._process = FakeProcess(
+        children=[FakeChildProcess(name="SC2_x64", rss=rss) for rss in engine_rss]
+        + [FakeChildProcess(name="python", rss=rss) for rss in worker_rss]
+    )
+    return controller
+
+
+def test_engines_memory_skips_python_workers():
+    controller = make_controller(
+        max_workers=4,
+        engine_rss=[2 * GIGABYTE, GIGABYTE],
+        worker_rss=[GIGABYTE] * 4,
+    )
+
+    assert controller._get_engines_memory() == 3 * GIGABYTE
+
+
+def test_task_is_not_admitted_over_memory_budget():
+    controller = make_controller(
+        max_workers=4,
+        memory_budget_bytes=5 * GIGABYTE,
+        engine_rss=[3 * GIGABYTE],
+    )
+    controller.limit = 4
+    controller.running = 1
+
+    assert not controller._check_memory()
+    assert controller.task_memory_estimate == 3 * GIGABYTE
+
+
+def test_memory_pressure_halves_limit_once():
+    controller = make_controller(
+        max_workers=8,
+        memory_budget_bytes=3 * GIGABYTE,
+        engine_rss=[GIGABYTE] * 4,
+    )
+    controller.limit = 4
+    controller.running = 4
+
+    assert not controller._check_memory()
+    assert controller.limit == 2
+    assert not controller._check_memory()
+    assert controller.limit == 2
+
+
+def test_low_available_memory_halves_limit(available_memory):
+    controller = make_controller(max_workers=8)
+    controller.limit = 4
+    controller.running = 4
+    available_memory.available = GIGABYTE // 2
+
+    assert not controller._check_memory()
+    assert controller.limit == 2
+
+
+def test_limit_grows_by_one_per_window_and_halves_on_throughput_drop():
+    controller = make_controller(max_workers=4)
+    assert controller.limit == 1
+
+    controller.release(start_time=controller.acquire())
+    assert controller.limit == 2
+
+    controller._last_throughput = float("inf")
+    start_times = [controller.acquire(), controller.acquire()]
+    for start_time in start_times:
+        controller.release(start_time=start_time)
+    assert controller.limit == 1
+
+
+def test_tasks_started_before_limit_change_are_not_counted():
+    controller = make_controller(max_workers=4)
+    old_start_time = controller.acquire()
+    controller._set_limit(limit=2, reason="test")
+
+    controller.release(start_time=old_start_time)
+
+    assert controller._window_completed == 0
+    assert controller.limit == 2
+
+
+def test_map_keeps_the_order_of_the_arguments():
+    controller = make_controller(max_workers=3)
+
+    results = map_with_concurrency_controller(
+        function=lambda value: value * 2,
+        arguments=range(10),
+        controller=controller,
+    )
+
+    assert results == [value * 2 for value in range(10)]
+    assert controller.running == 0
+
+
+def test_map_releases_slots_of_failed_tasks():
+    controller = make_controller(max_workers=2)
+
+    def fail_on_three(value: int) -> int:
+        if value == 3:
+            raise RuntimeError("failed")
+        return value
+
+    with pytest.raises(RuntimeError):
+        map_with_concurrency_controller(
+            function=fail_on_three,
+            arguments=range(6),
+            controller=controller,
+        )
+    assert controller.running == 0
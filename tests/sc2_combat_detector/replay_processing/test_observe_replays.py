@@ -0,0 +1,143 @@
+from pathlib import Path
+
+from sc2_combat_detector.function_arguments.observe_replay_args import ObserveReplayArgs
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
+from sc2_combat_detector.function_results.file_detect_combat_result import (
+    FileDetectCombatResult,
+)
+from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.replay_processing import observe_replays
+from sc2_combat_detector.replay_processing.observe_replays import observe_replay
+from sc2_combat_detector.replay_processing.stream_observations import (
+    run_observation_stream,
+)
+
+REPLAY_PATH = Path("synthetic.SC2Replay")
+COMBAT_INTERVALS = [(40, 60), (120, 140), (200, 220)]
+
+
+class EngineCrash(Exception):
+    pass
+
+
+def make_observe_replay_args(checkpoint_directory: Path | None) -> ObserveReplayArgs:
+    combats_to_observe = FileDetectCombatResult(
+        replay_filepath=REPLAY_PATH,
+        combat_intervals=[
+            obs_collection_pb.ObservationInterval(start_time=start, end_time=end)
+            for start, end in COMBAT_INTERVALS
+        ],
+    )
+    observe_replay_args = ObserveReplayArgs.get_combat_processing_args(
+        replay_path=REPLAY_PATH,
+        combats_to_observe=combats_to_observe,
+        synthetic_stream_args=SyntheticStreamArgs(
+            game_length=300,
+            n_units=2,
+            fight_intervals=COMBAT_INTERVALS,
+        ),
+    )
+    observe_replay_args.checkpoint_directory = checkpoint_directory
+    return observe_replay_args
+
+
+def clear_gap_actions(
+    collection: obs_collection_pb.GameObservationCollection,
+) -> obs_collection_pb.GameObservationCollection:
+    # The first response of an interval reports all of the actions since the
+    # previous observation of the stream, these depend on the observed intervals:
+    for interval in collection.observation_intervals:
+        first_observation = interval.observations[0]
+        first_observation.player1.ClearField("actions")
+        first_observation.player2.ClearField("actions")
+    return collection
+
+
+def record_observation_streams(monkeypatch, crash_after_game_loop: int | None):
+    requested_gameloops = []
+
+    def recording_run_observation_stream(gameloops_to_observe, **kwargs):
+        requested_gameloops.append(list(gameloops_to_observe))
+        for observation in run_observation_stream(
+            gameloops_to_observe=gameloops_to_observe, **kwargs
+        ):
+            yield observation
+            if (
+                crash_after_game_loop is not None
+                and observation.game_loop >= crash_after_game_loop
+            ):
+                raise EngineCrash("The game engine stopped responding")
+
+    monkeypatch.setattr(
+        observe_replays, "run_observation_stream", recording_run_observation_stream
+    )
+    return requested_gameloops
+
+
+def test_resumed_replay_observes_only_the_missing_intervals(
+    tmp_path: Path, monkeypatch
+):
+    expected_collection = observe_replay(
+        observe_replay_args=make_observe_replay_args(checkpoint_directory=None)
+    )
+    checkpoint_directory = tmp_path / "synthetic.checkpoint"
+
+    # The engine crashes during the second interval:
+    record_observation_streams(monkeypatch=monkeypatch, crash_after_game_loop=130)
+    crashed_collection = observe_replay(
+        observe_replay_args=make_observe_replay_args(
+            checkpoint_directory=checkpoint_directory
+        )
+    )
+    assert crashed_collection is None
+    assert [path.name for path in checkpoint_directory.iterdir()] == ["40_60.binpb"]
+
+    requested_gameloops = record_observation_streams(
+        monkeypatch=monkeypatch, crash_after_game_loop=None
+    )
+    resumed_collection = observe_replay(
+        observe_replay_args=make_observe_replay_args(
+            checkpoint_directory=checkpoint_directory
+        )
+    )
+
+    assert requested_gameloops == [
+        list(range(120, 141)) + list(range(200, 221)),
+    ]
+    assert [
+        [observation.game_loop for observation in interval.observations]
+        for interval in resumed_collection.observation_intervals
+    ] == [list(range(start, end + 1)) for start, end in COMBAT_INTERVALS]
+    assert [
+        [observation.force_action_delay for observation in interval.observations]
+        for interval in resumed_collection.observation_intervals
+    ] == [
+        [observation.force_action_delay for observation in interval.observations]
+        for interval in expected_collection.observation_intervals
+    ]
+    assert clear_gap_actions(resumed_collection) == clear_gap_actions(
+        expected_collection
+    )
+
+
+def test_fully_checkpointed_replay_is_not_observed(tmp_path: Path, monkeypatch):
+    checkpoint_directory = tmp_path / "synthetic.checkpoint"
+    expected_collection = observe_replay(
+        observe_replay_args=make_observe_replay_args(
+            checkpoint_directory=checkpoint_directory
+        )
+    )
+
+    requested_gameloops = record_observation_streams(
+        monkeypatch=monkeypatch, crash_after_game_loop=None
+    )
+    restored_collection = observe_replay(
+        observe_replay_args=make_observe_replay_args(
+            checkpoint_directory=checkpoint_directory
+        )
+    )
+
+    assert requested_gameloops == []
+    assert restored_collection == expected_collection
@@ -0,0 +1,269 @@
+import numpy as np
+import pytest
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+from s2clientprotocol import data_pb2 as sc_data
+
+from sc2_combat_simulator.env.arena_packing import (
+    ARENA_MARGIN,
+    combine_placements,
+    get_arena_margin,
+    get_arena_unit_tags,
+    get_scenario_bounds,
+    is_placement_pathable,
+    pack_scenarios,
+    split_units_by_arena,
+    translate_units,
+)
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+
+STALKER_UNIT_TYPE = 74
+SIEGE_TANK_SIEGED_UNIT_TYPE = 32
+
+
+def make_unit(
+    tag: int,
+    x: float,
+    y: float,
+    owner: int = 1,
+    is_flying: bool = False,
+    unit_type: int = STALKER_UNIT_TYPE,
+) -> sc2proto_raw_pb.Unit:
+    unit = sc2proto_raw_pb.Unit(
+        tag=tag, owner=owner, unit_type=unit_type, is_flying=is_flying
+    )
+    unit.pos.x = x
+    unit.pos.y = y
+    return unit
+
+
+def make_state(player1_units, player2_units) -> PlayerUnitsMapState:
+    return PlayerUnitsMapState(
+        player1_units=player1_units,
+        player2_units=player2_units,
+        player1_map_state=sc2proto_raw_pb.MapState(),
+        player2_map_state=sc2proto_raw_pb.MapState(),
+    )
+
+
+def test_scenario_bounds():
+    state = make_state(
+        player1_units=[make_unit(tag=1, x=10.0, y=20.0)],
+        player2_units=[make_unit(tag=2, x=15.0, y=12.0, owner=2)],
+    )
+
+    assert get_scenario_bounds(player_units_map_state=state) == (10.0, 12.0, 15.0, 20.0)
+
+
+def test_scenario_bounds_without_units():
+    with pytest.raises(ValueError):
+        get_scenario_bounds(player_units_map_state=make_state([], []))
+
+
+def test_translate_units_copies_the_units():
+    unit = make_unit(tag=1, x=10.0, y=20.0)
+
+    (translated_unit,) = translate_units(units=[unit], offset_x=5.0, offset_y=-5.0)
+
+    assert (translated_unit.pos.x, translated_unit.pos.y) == (15.0, 15.0)
+    assert (unit.pos.x, unit.pos.y) == (10.0, 20.0)
+
+
+def test_placement_pathable_skips_flying_units():
+    pathing_grid = np.zeros((8, 8), dtype=np.uint8)
+    pathing_grid[2, 3] = 1
+    ground_state = make_state([make_unit(tag=1, x=3.5, y=2.5)], [])
+    blocked_state = make_state([make_unit(tag=1, x=2.5, y=3.5)], [])
+    flying_state = make_state([make_unit(tag=1, x=2.5, y=3.5, is_flying=True)], [])
+    outside_state = make_state([make_unit(tag=1, x=9.0, y=1.0)], [])
+
+    assert is_placement_pathable(ground_state, pathing_grid=pathing_grid)
+    assert not is_placement_pathable(blocked_state, pathing_grid=pathing_grid)
+    assert is_placement_pathable(flying_state, pathing_grid=pathing_grid)
+    assert not is_placement_pathable(outside_state, pathing_grid=pathing_grid)
+
+
+def test_pack_scenarios_centers_scenarios_in_grid_cells():
+    states = [
+        make_state(
+            player1_units=[make_unit(tag=index, x=50.0, y=50.0)],
+            player2_units=[make_unit(tag=10 + index, x=54.0, y=50.0, owner=2)],
+        )
+        for index in range(3)
+    ]
+
+    placements = pack_scenarios(
+        player_units_map_states=states, playable_area=(0.0, 0.0, 100.0, 100.0)
+    )
+
+    # Three arenas are placed in a 2x2 grid, filled row by row:
+    assert [placement.cell_bounds for placement in placements] == [
+        (0.0, 0.0, 50.0, 50.0),
+        (50.0, 0.0, 100.0, 50.0),
+        (0.0, 50.0, 50.0, 100.0),
+    ]
+    for placement in placements:
+        min_x, min_y, max_x, max_y = get_scenario_bounds(
+            placement.player_units_map_state
+        )
+        cell_min_x, cell_min_y, cell_max_x, cell_max_y = placement.cell_bounds
+        assert (min_x + max_x) / 2 == pytest.approx((cell_min_x + cell_max_x) / 2)
+        assert (min_y + max_y) / 2 == pytest.approx((cell_min_y + cell_max_y) / 2)
+
+
+def test_pack_scenarios_rejects_scenarios_larger_than_cell():
+    state = make_state(
+        player1_units=[make_unit(tag=1, x=0.0, y=0.0)],
+        player2_units=[make_unit(tag=2, x=40.0, y=0.0, owner=2)],
+    )
+
+    with pytest.raises(ValueError):
+        pack_scenarios(
+            player_units_map_states=[state, state],
+            playable_area=(0.0, 0.0, 100.0, 100.0),
+        )
+
+
+def test_pack_scenarios_rejects_unpathable_placement():
+    state = make_state([make_unit(tag=1, x=5.0, y=5.0)], [])
+    pathing_grid = np.zeros((100, 100), dtype=np.uint8)
+
+    with pytest.raises(ValueError):
+        pack_scenarios(
+            player_units_map_states=[state],
+            playable_area=(0.0, 0.0, 100.0, 100.0),
+            pathing_grid=pathing_grid,
+        )
+
+
+def test_arena_margin_covers_the_largest_range():
+    unit_type_data = {
+        STALKER_UNIT_TYPE: sc_data.UnitTypeData(
+            unit_id=STALKER_UNIT_TYPE,
+            sight_range=10.0,
+            weapons=[sc_data.Weapon(range=6.0)],
+        ),
+        SIEGE_TANK_SIEGED_UNIT_TYPE: sc_data.UnitTypeData(
+            unit_id=SIEGE_TANK_SIEGED_UNIT_TYPE,
+            sight_range=11.0,
+            weapons=[sc_data.Weapon(range=13.0)],
+        ),
+    }
+    stalkers = make_state([make_unit(tag=1, x=10.0, y=10.0)], [])
+    tanks = make_state(
+        [],
+        [make_unit(tag=2, x=10.0, y=10.0, unit_type=SIEGE_TANK_SIEGED_UNIT_TYPE)],
+    )
+    unknown = make_state([make_unit(tag=3, x=10.0, y=10.0, unit_type=9999)], [])
+
+    def get_margin(states):
+        return get_arena_margin(
+            player_units_map_states=states, unit_type_data=unit_type_data
+        )
+
+    assert get_margin([stalkers]) == ARENA_MARGIN + 5.0
+    # The units of two arenas are two margins apart, out of the tank range:
+    assert get_margin([stalkers, tanks]) == ARENA_MARGIN + 6.5
+    assert 2 * get_margin([stalkers, tanks]) > 13.0
+    assert get_margin([unknown]) == ARENA_MARGIN
+
+
+def test_pack_scenarios_skips_cells_of_start_locations():
+    states = [
+        make_state([make_unit(tag=index, x=50.0, y=50.0)], []) for index in range(2)
+    ]
+
+    placements = pack_scenarios(
+        player_units_map_states=states,
+        playable_area=(0.0, 0.0, 100.0, 100.0),
+        excluded_locations=[(10.0, 10.0), (90.0, 90.0)],
+    )
+
+    # The bottom left and top right cells of the 2x2 grid hold the bases:
+    assert [placement.cell_bounds for placement in placements] == [
+        (50.0, 0.0, 100.0, 50.0),
+        (0.0, 50.0, 50.0, 100.0),
+    ]
+
+
+def test_pack_scenarios_skips_cells_near_start_locations():
+    states = [
+        make_state([make_unit(tag=index, x=50.0, y=50.0)], []) for index in range(2)
+    ]
+
+    # The base is within the margin of the bottom right cell:
+    placements = pack_scenarios(
+        player_units_map_states=states,
+        playable_area=(0.0, 0.0, 100.0, 100.0),
+        excluded_locations=[(45.0, 10.0)],
+    )
+
+    assert [placement.cell_bounds for placement in placements] == [
+        (0.0, 50.0, 50.0, 100.0),
+        (50.0, 50.0, 100.0, 100.0),
+    ]
+
+
+def test_pack_scenarios_rejects_map_without_free_cells():
+    state = make_state([make_unit(tag=1, x=50.0, y=50.0)], [])
+
+    with pytest.raises(ValueError):
+        pack_scenarios(
+            player_units_map_states=[state],
+            playable_area=(0.0, 0.0, 100.0, 100.0),
+            margin=30.0,
+            excluded_locations=[(50.0, 50.0)],
+        )
+
+
+def test_combine_and_split_round_trip():
+    states = [
+        make_state([make_unit(tag=1, x=10.0, y=10.0)], []),
+        make_state([], [make_unit(tag=2, x=10.0, y=10.0, owner=2)]),
+    ]
+    placements = pack_scenarios(
+        player_units_map_states=states, playable_area=(0.0, 0.0, 100.0, 100.0)
+    )
+
+    combined_state = combine_placements(placements=placements)
+    units = list(combined_state.player1_units) + list(combined_state.player2_units)
+    arena_units = split_units_by_arena(units=units, placements=placements)
+
+    assert [[unit.tag for unit in units] for units in arena_units] == [[1], [2]]
+
+
+def test_split_units_drops_units_outside_arenas():
+    states = [make_state([make_unit(tag=1, x=10.0, y=10.0)], [])]
+    placements = pack_scenarios(
+        player_units_map_states=states, playable_area=(20.0, 20.0, 60.0, 60.0)
+    )
+    base_unit = make_unit(tag=2, x=5.0, y=5.0)
+    arena_unit = make_unit(tag=3, x=30.0, y=30.0)
+
+    arena_units = split_units_by_arena(
+        units=[base_unit, arena_unit], placements=placements
+    )
+
+    assert [[unit.tag for unit in units] for units in arena_units] == [[3]]
+
+
+def test_arena_unit_tags_follow_the_matched_source_units():
+    states = [
+        make_state([make_unit(tag=1, x=10.0, y=10.0)], []),
+        make_state([make_unit(tag=2, x=10.0, y=10.0)], []),
+    ]
+    placements = pack_scenarios(
+        player_units_map_states=states, playable_area=(0.0, 0.0, 100.0, 100.0)
+    )
+    source_units = combine_placements(placements=placements).player1_units
+    # The spawned units may have already left their cell:
+    matched_units = [
+        (source_units[0], make_unit(tag=100, x=99.0, y=99.0)),
+        (source_units[1], make_unit(tag=200, x=1.0, y=1.0)),
+    ]
+
+    arena_tags = get_arena_unit_tags(matched_units=matched_units, placements=placements)
+
+    assert arena_tags == [{100}, {200}]
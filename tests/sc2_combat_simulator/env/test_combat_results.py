@@ -0,0 +1,257 @@
+from types import SimpleNamespace
+
+import pytest
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+from pysc2_evolved.env import environment
+
+from sc2_combat_simulator.env.sc2_combat_env import CombatSC2Env
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+STRUCTURE_UNIT_TYPE = 59
+STALKER_UNIT_TYPE = 74
+PROBE_UNIT_TYPE = 84
+
+
+def make_unit(
+    tag: int,
+    owner: int,
+    unit_type: int = STALKER_UNIT_TYPE,
+    health: float = 80.0,
+    shield: float = 80.0,
+) -> sc2proto_raw_pb.Unit:
+    unit = sc2proto_raw_pb.Unit(
+        tag=tag,
+        owner=owner,
+        unit_type=unit_type,
+        health=health,
+        shield=shield,
+    )
+    unit.pos.x = 10.0
+    unit.pos.y = 10.0
+    return unit
+
+
+def make_env(
+    terminate_when_resolved: bool = True,
+    stalemate_timeout_gameloops: int = 0,
+) -> CombatSC2Env:
+    # The game is never launched, only the state read by the results is set:
+    env = object.__new__(CombatSC2Env)
+    env._terminate_when_resolved = terminate_when_resolved
+    env._stalemate_timeout_gameloops = stalemate_timeout_gameloops
+    env._arena_placements = None
+    env._structure_unit_types = {STRUCTURE_UNIT_TYPE}
+    env._scenario_tags = [set()]
+    env._state = environment.StepType.MID
+    env._reset_arena_results()
+    return env
+
+
+def set_observed_units(env: CombatSC2Env, units, game_loop: int = 100) -> None:
+    observation = SimpleNamespace(
+        raw_data=SimpleNamespace(units=units),
+        game_loop=game_loop,
+    )
+    env._obs = [SimpleNamespace(observation=observation)]
+
+
+def test_arena_result_ongoing_when_both_players_have_units():
+    env = make_env()
+    units = [make_unit(tag=1, owner=1), make_unit(tag=2, owner=2)]
+
+    assert env._get_arena_result(index=0, units=units, game_loop=10) is None
+
+
+@pytest.mark.parametrize(
+    "owners, expected_result",
+    [
+        ([1, 1], 1),
+        ([2], 2),
+        ([], 0),
+    ],
+)
+def test_arena_result_resolved(owners, expected_result):
+    env = make_env()
+    units = [make_unit(tag=tag, owner=owner) for tag, owner in enumerate(owners)]
+
+    assert env._get_arena_result(index=0, units=units, game_loop=10) == expected_result
+
+
+def test_arena_result_not_resolved_without_terminate_when_resolved():
+    env = make_env(terminate_when_resolved=False)
+
+    assert env._get_arena_result(index=0, units=[], game_loop=10) is None
+
+
+def test_arena_result_ignores_units_of_other_owners():
+    env = make_env()
+    units = [make_unit(tag=1, owner=1), make_unit(tag=2, owner=16)]
+
+    assert env._get_arena_result(index=0, units=units, game_loop=10) == 1
+
+
+def test_arena_result_stalemate_after_timeout_without_damage():
+    env = make_env(terminate_when_resolved=False, stalemate_timeout_gameloops=50)
+    units = [make_unit(tag=1, owner=1), make_unit(tag=2, owner=2)]
+
+    assert env._get_arena_result(index=0, units=units, game_loop=0) is None
+    assert env._get_arena_result(index=0, units=units, game_loop=49) is None
+    assert env._get_arena_result(index=0, units=units, game_loop=50) == 0
+
+
+def test_arena_result_damage_postpones_stalemate():
+    env = make_env(terminate_when_resolved=False, stalemate_timeout_gameloops=50)
+    units = [make_unit(tag=1, owner=1), make_unit(tag=2, owner=2)]
+    damaged_units = [make_unit(tag=1, owner=1, shield=40.0), make_unit(tag=2, owner=2)]
+
+    assert env._get_arena_result(index=0, units=units, game_loop=0) is None
+    assert env._get_arena_result(index=0, units=damaged_units, game_loop=40) is None
+    assert env._get_arena_result(index=0, units=damaged_units, game_loop=80) is None
+    assert env._get_arena_result(index=0, units=damaged_units, game_loop=90) == 0
+
+
+def test_combat_results_count_only_spawned_scenario_units():
+    env = make_env()
+    env._scenario_tags = [{1, 2}]
+    # The starting workers, bases and the units of the bot are never removed,
+    # the combat is over once the tracked enemy unit is dead:
+    map_units = [
+        make_unit(tag=10, owner=1, unit_type=PROBE_UNIT_TYPE),
+        make_unit(tag=11, owner=2, unit_type=PROBE_UNIT_TYPE),
+        make_unit(tag=12, owner=2, unit_type=STRUCTURE_UNIT_TYPE),
+        make_unit(tag=13, owner=2),
+    ]
+
+    set_observed_units(
+        env, [make_unit(tag=1, owner=1), make_unit(tag=2, owner=2)] + map_units
+    )
+    assert env._get_combat_results() == [None]
+
+    set_observed_units(env, [make_unit(tag=1, owner=1)] + map_units)
+    assert env._get_combat_results() == [1]
+
+
+def test_combat_results_ignore_spawned_structures():
+    env = make_env()
+    env._scenario_tags = [{1, 2}]
+    set_observed_units(
+        env,
+        [
+            make_unit(tag=1, owner=1),
+            make_unit(tag=2, owner=2, unit_type=STRUCTURE_UNIT_TYPE),
+        ],
+    )
+
+    assert env._get_combat_results() == [1]
+
+
+def test_combat_results_keep_resolved_result():
+    env = make_env()
+    env._scenario_tags = [{1}]
+    set_observed_units(env, [make_unit(tag=1, owner=1)])
+    assert env._get_combat_results() == [1]
+
+    set_observed_units(env, [])
+    assert env._get_combat_results() == [1]
+
+
+def test_combat_results_untracked_without_raw_interface():
+    env = make_env()
+    env._scenario_tags = None
+    set_observed_units(env, [])
+
+    assert env._get_combat_results() == [None]
+
+
+def test_combat_results_not_checked_on_first_step():
+    env = make_env()
+    env._state = environment.StepType.FIRST
+    set_observed_units(env, [])
+
+    assert env._get_combat_results() == [None]
+
+
+class FakeController:
+    def __init__(self, observed_units_sequence) -> None:
+        self._observed_units_sequence = list(observed_units_sequence)
+        self.debug_requests = []
+
+    def debug(self, debug_commands) -> None:
+        self.debug_requests.append(debug_commands)
+
+    def step(self, count: int) -> None:
+        pass
+
+    def quit(self) -> None:
+        pass
+
+    def observe(self):
+        units = self._observed_units_sequence.pop(0)
+        return SimpleNamespace(
+            observation=SimpleNamespace(raw_data=SimpleNamespace(units=units))
+        )
+
+
+class FakeParallel:
+    def run(self, calls) -> list:
+        return [function(*args) for function, *args in calls]
+
+    def shutdown(self) -> None:
+        pass
+
+
+def test_spawn_tracks_only_matched_units_created_by_the_spawn():
+    starting_worker = make_unit(tag=10, owner=1, unit_type=PROBE_UNIT_TYPE)
+    spawned_worker = make_unit(tag=20, owner=1, unit_type=PROBE_UNIT_TYPE)
+    spawned_stalker = make_unit(tag=21, owner=2)
+    observed_after_spawn = [starting_worker, spawned_worker, spawned_stalker]
+
+    env = make_env()
+    env._interface_options = [SimpleNamespace(raw=True)]
+    env._controllers = [
+        FakeController(
+            observed_units_sequence=[
+                [starting_worker],
+                observed_after_spawn,
+                observed_after_spawn,
+            ]
+        )
+    ]
+    env._parallel = FakeParallel()
+    env._player_units_map_state = PlayerUnitsMapState(
+        player1_units=[make_unit(tag=1, owner=1, unit_type=PROBE_UNIT_TYPE)],
+        player2_units=[make_unit(tag=2, owner=2)],
+        player1_map_state=sc2proto_raw_pb.MapState(),
+        player2_map_state=sc2proto_raw_pb.MapState(),
+    )
+
+    env._spawn_player_units()
+
+    assert env._scenario_tags == [{20, 21}]
+    assert env.spawn_verification.unexpected_units == 0
+
+
+def test_combat_results_per_arena_tracked_tags():
+    env = make_env()
+    env._arena_placements = [None, None]
+    env._reset_arena_results()
+    env._scenario_tags = [{1, 2}, {3, 4}]
+    # The units of the first arena chased each other out of its cell, and the
+    # units of the bases belong to no arena:
+    set_observed_units(
+        env,
+        [
+            make_unit(tag=1, owner=1),
+            make_unit(tag=3, owner=1),
+            make_unit(tag=4, owner=2),
+            make_unit(tag=10, owner=2, unit_type=PROBE_UNIT_TYPE),
+        ],
+    )
+
+    assert env._get_combat_results() == [1, None]
+    assert [[unit.tag for unit in units] for units in env.get_scenario_units()] == [
+        [1],
+        [3, 4],
+    ]
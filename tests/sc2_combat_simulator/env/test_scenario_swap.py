@@ -0,0 +1,279 @@
+from types import SimpleNamespace
+
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+from pysc2_evolved.env import environment
+
+from sc2_combat_simulator.env.sc2_combat_env import CombatSC2Env
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+NEXUS_UNIT_TYPE = 59
+STALKER_UNIT_TYPE = 74
+PROBE_UNIT_TYPE = 84
+
+
+def make_unit(
+    tag: int,
+    owner: int,
+    unit_type: int = STALKER_UNIT_TYPE,
+    x: float = 10.0,
+) -> sc2proto_raw_pb.Unit:
+    unit = sc2proto_raw_pb.Unit(
+        tag=tag,
+        owner=owner,
+        unit_type=unit_type,
+        health=80.0,
+        shield=80.0,
+    )
+    unit.pos.x = x
+    unit.pos.y = 10.0
+    return unit
+
+
+def make_state(player1_units, player2_units) -> PlayerUnitsMapState:
+    return PlayerUnitsMapState(
+        player1_units=player1_units,
+        player2_units=player2_units,
+        player1_map_state=sc2proto_raw_pb.MapState(),
+        player2_map_state=sc2proto_raw_pb.MapState(),
+    )
+
+
+class FakeController:
+    """Kills and creates the units of the debug requests on the next step."""
+
+    def __init__(self, units) -> None:
+        self.units = list(units)
+        self.status_ended = False
+        self.debug_requests = []
+        self._pending_commands = []
+        self._next_tag = 100
+
+    def debug(self, debug_commands) -> None:
+        if not isinstance(debug_commands, list):
+            debug_commands = [debug_commands]
+        self.debug_requests.append(debug_commands)
+        self._pending_commands.extend(debug_commands)
+
+    def step(self, count: int) -> None:
+        for command in self._pending_commands:
+            if command.HasField("kill_unit"):
+                killed_tags = set(command.kill_unit.tag)
+                self.units = [
+                    unit for unit in self.units if unit.tag not in killed_tags
+                ]
+            elif command.HasField("create_unit"):
+                for _ in range(command.create_unit.quantity):
+                    self.units.append(
+                        make_unit(
+                            tag=self._next_tag,
+                            owner=command.create_unit.owner,
+                            unit_type=command.create_unit.unit_type,
+                            x=command.create_unit.pos.x,
+                        )
+                    )
+                    self._next_tag += 1
+        self._pending_commands = []
+
+    def observe(self):
+        return SimpleNamespace(
+            observation=SimpleNamespace(raw_data=SimpleNamespace(units=self.units))
+        )
+
+    def quit(self) -> None:
+        pass
+
+    @property
+    def killed_tags(self):
+        return [
+            list(command.kill_unit.tag)
+            for commands in self.debug_requests
+            for command in commands
+            if command.HasField("kill_unit")
+        ]
+
+
+class FakeParallel:
+    def run(self, calls) -> list:
+        return [function(*args) for function, *args in calls]
+
+    def shutdown(self) -> None:
+        pass
+
+
+def make_running_env(base_units, scenario_units, scenario_tags) -> CombatSC2Env:
+    # The game is never launched, the episode of a scenario is in progress:
+    env = object.__new__(CombatSC2Env)
+    env._interface_options = [SimpleNamespace(raw=True)]
+    env._controllers = [FakeController(units=base_units + scenario_units)]
+    env._parallel = FakeParallel()
+    env._arena_placements = None
+    env._reset_arena_results()
+    env._scenario_tags = scenario_tags
+    env._episode_count = 1
+    env._state = environment.StepType.MID
+    return env
+
+
+def make_finished_env(
+    base_units, scenario_units, scenario_tags, episode_steps: int
+) -> CombatSC2Env:
+    # The episode of a scenario has just ended, the next one is loaded:
+    env = make_running_env(
+        base_units=base_units,
+        scenario_units=scenario_units,
+        scenario_tags=scenario_tags,
+    )
+    env._state = environment.StepType.LAST
+    env._episode_steps = episode_steps
+    env._max_in_place_game_loop = 1000
+    env._delayed_actions = [[("delayed", "action")]]
+    env._requested_races = {}
+    env._map_name = "map"
+    env._metrics = SimpleNamespace(increment_episode=lambda: None, close=lambda: None)
+    env._num_agents = 1
+    env._step_instrumentation = None
+    env._realtime = False
+    env._observe = lambda target_game_loop: ()
+    env.restart_count = 0
+
+    def restart() -> None:
+        env.restart_count += 1
+        env._controllers[0].units = list(base_units)
+
+    env._restart = restart
+    env.load_scenario(
+        player_units_map_state=make_state(
+            player1_units=[make_unit(tag=1, owner=1, x=20.0)],
+            player2_units=[make_unit(tag=2, owner=2, x=30.0)],
+        ),
+        respawn=False,
+    )
+    return env
+
+
+def test_load_scenario_kills_only_the_scenario_units():
+    base_units = [
+        make_unit(tag=1, owner=1, unit_type=NEXUS_UNIT_TYPE),
+        make_unit(tag=2, owner=1, unit_type=PROBE_UNIT_TYPE),
+        make_unit(tag=3, owner=2, unit_type=NEXUS_UNIT_TYPE),
+        make_unit(tag=4, owner=2, unit_type=PROBE_UNIT_TYPE),
+    ]
+    # The stalker 12 was killed during the episode:
+    scenario_units = [make_unit(tag=10, owner=1), make_unit(tag=11, owner=2)]
+    env = make_running_env(
+        base_units=base_units,
+        scenario_units=scenario_units,
+        scenario_tags=[{10, 11, 12}],
+    )
+
+    env.load_scenario(
+        player_units_map_state=make_state(
+            player1_units=[make_unit(tag=1, owner=1, x=20.0)],
+            player2_units=[make_unit(tag=2, owner=2, x=30.0)],
+        )
+    )
+
+    controller = env._controllers[0]
+    assert controller.killed_tags == [[10, 11]]
+    assert {unit.tag for unit in controller.units} == {1, 2, 3, 4, 100, 101}
+    # The base units existing before the spawn are never tracked:
+    assert env._scenario_tags == [{100, 101}]
+    assert env.spawn_verification.is_exact
+
+
+def test_load_scenario_between_episodes_does_not_kill():
+    env = make_running_env(
+        base_units=[make_unit(tag=1, owner=1, unit_type=NEXUS_UNIT_TYPE)],
+        scenario_units=[make_unit(tag=10, owner=1)],
+        scenario_tags=[{10}],
+    )
+    env._state = environment.StepType.LAST
+
+    env.load_scenario(
+        player_units_map_state=make_state(
+            player1_units=[make_unit(tag=1, owner=1)],
+            player2_units=[],
+        )
+    )
+
+    assert env._controllers[0].debug_requests == []
+    assert env._scenario_tags is None
+
+
+def test_load_scenario_without_respawn_waits_for_the_reset():
+    env = make_running_env(
+        base_units=[make_unit(tag=1, owner=1, unit_type=NEXUS_UNIT_TYPE)],
+        scenario_units=[make_unit(tag=10, owner=1)],
+        scenario_tags=[{10}],
+    )
+
+    env.load_scenario(
+        player_units_map_state=make_state(
+            player1_units=[make_unit(tag=1, owner=1)],
+            player2_units=[],
+        ),
+        respawn=False,
+    )
+
+    assert env._controllers[0].debug_requests == []
+    assert env._scenario_tags == [{10}]
+
+
+BASE_UNITS = [
+    make_unit(tag=1, owner=1, unit_type=NEXUS_UNIT_TYPE),
+    make_unit(tag=3, owner=2, unit_type=NEXUS_UNIT_TYPE),
+]
+
+
+def test_reset_swaps_the_scenario_into_the_running_game():
+    env = make_finished_env(
+        base_units=BASE_UNITS,
+        scenario_units=[make_unit(tag=10, owner=1)],
+        scenario_tags=[{10, 11}],
+        episode_steps=500,
+    )
+
+    env.reset()
+
+    controller = env._controllers[0]
+    assert env.restart_count == 0
+    assert controller.killed_tags == [[10]]
+    assert {unit.tag for unit in controller.units} == {1, 3, 100, 101}
+    assert env._scenario_tags == [{100, 101}]
+    assert env._delayed_actions == [[]]
+    # The episode length is counted from the end of the previous episode:
+    assert env._episode_start_game_loop == 500
+    assert env._state == environment.StepType.FIRST
+
+
+def test_reset_restarts_an_ended_game():
+    env = make_finished_env(
+        base_units=BASE_UNITS,
+        scenario_units=[make_unit(tag=10, owner=1)],
+        scenario_tags=[{10}],
+        episode_steps=500,
+    )
+    env._controllers[0].status_ended = True
+
+    env.reset()
+
+    assert env.restart_count == 1
+    assert env._controllers[0].killed_tags == []
+    assert env._episode_start_game_loop == 0
+
+
+def test_reset_restarts_a_long_running_game():
+    env = make_finished_env(
+        base_units=BASE_UNITS,
+        scenario_units=[make_unit(tag=10, owner=1)],
+        scenario_tags=[{10}],
+        episode_steps=1000,
+    )
+
+    env.reset()
+
+    assert env.restart_count == 1
+    assert env._controllers[0].killed_tags == []
+    assert {unit.tag for unit in env._controllers[0].units} == {1, 3, 100, 101}
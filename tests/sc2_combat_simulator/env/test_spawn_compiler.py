@@ -0,0 +1,200 @@
+import pytest
+import s2clientprotocol.debug_pb2 as d_pb
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+
+from sc2_combat_simulator.env.spawn_compiler import (
+    PLAYER1_OWNER,
+    PLAYER2_OWNER,
+    compile_spawn_commands,
+    compile_unit_value_commands,
+    match_spawned_units,
+    verify_spawned_units,
+)
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+MARINE = 48
+STALKER = 74
+
+
+def make_unit(
+    tag: int,
+    x: float,
+    y: float,
+    unit_type: int = MARINE,
+    owner: int = PLAYER1_OWNER,
+    health: float = 45.0,
+    shield: float = 0.0,
+    shield_max: float = 0.0,
+    energy: float = 0.0,
+    energy_max: float = 0.0,
+) -> sc2proto_raw_pb.Unit:
+    unit = sc2proto_raw_pb.Unit(
+        tag=tag,
+        unit_type=unit_type,
+        owner=owner,
+        health=health,
+        shield=shield,
+        shield_max=shield_max,
+        energy=energy,
+        energy_max=energy_max,
+    )
+    unit.pos.x = x
+    unit.pos.y = y
+    return unit
+
+
+def make_state(player1_units, player2_units) -> PlayerUnitsMapState:
+    return PlayerUnitsMapState(
+        player1_units=player1_units,
+        player2_units=player2_units,
+        player1_map_state=sc2proto_raw_pb.MapState(),
+        player2_map_state=sc2proto_raw_pb.MapState(),
+    )
+
+
+def test_units_on_the_same_position_are_grouped():
+    state = make_state(
+        player1_units=[
+            make_unit(tag=1, x=10, y=10),
+            make_unit(tag=2, x=10, y=10),
+            make_unit(tag=3, x=12, y=10),
+        ],
+        player2_units=[
+            make_unit(tag=4, x=10, y=10, unit_type=STALKER, owner=0),
+        ],
+    )
+
+    commands = compile_spawn_commands(player_units_map_state=state)
+
+    create_units = [
+        (
+            command.create_unit.unit_type,
+            command.create_unit.owner,
+            command.create_unit.pos.x,
+            command.create_unit.quantity,
+        )
+        for command in commands
+    ]
+    assert create_units == [
+        (MARINE, PLAYER1_OWNER, 10, 2),
+        (MARINE, PLAYER1_OWNER, 12, 1),
+        (STALKER, PLAYER2_OWNER, 10, 1),
+    ]
+
+
+def test_spawned_units_are_matched_by_distance():
+    state = make_state(
+        player1_units=[
+            make_unit(tag=1, x=10, y=10),
+            make_unit(tag=2, x=20, y=10),
+        ],
+        player2_units=[make_unit(tag=3, x=10, y=10, unit_type=STALKER)],
+    )
+    observed_units = [
+        make_unit(tag=101, x=19.5, y=10),
+        make_unit(tag=102, x=10.5, y=10),
+        make_unit(tag=103, x=10, y=10, unit_type=STALKER, owner=PLAYER2_OWNER),
+    ]
+
+    matched_units, missing_units, unexpected_units = match_spawned_units(
+        player_units_map_state=state,
+        observed_units=observed_units,
+    )
+
+    assert [(source.tag, spawned.tag) for source, spawned in matched_units] == [
+        (1, 102),
+        (2, 101),
+        (3, 103),
+    ]
+    assert missing_units == 0
+    assert unexpected_units == 0
+
+
+def test_matching_skips_ignored_and_neutral_units():
+    state = make_state(
+        player1_units=[make_unit(tag=1, x=10, y=10)],
+        player2_units=[make_unit(tag=2, x=30, y=30, unit_type=STALKER)],
+    )
+    observed_units = [
+        # Unit of the previous episode standing on the spawn position:
+        make_unit(tag=100, x=10, y=10),
+        make_unit(tag=101, x=11, y=10),
+        make_unit(tag=102, x=10, y=10, owner=16),
+        make_unit(tag=103, x=40, y=40),
+    ]
+
+    matched_units, missing_units, unexpected_units = match_spawned_units(
+        player_units_map_state=state,
+        observed_units=observed_units,
+        ignored_tags={100},
+    )
+
+    assert [(source.tag, spawned.tag) for source, spawned in matched_units] == [
+        (1, 101)
+    ]
+    assert missing_units == 1
+    assert unexpected_units == 1
+
+
+def test_unit_value_commands_restore_differing_values():
+    source_unit = make_unit(
+        tag=1,
+        x=10,
+        y=10,
+        unit_type=STALKER,
+        health=40,
+        shield=20.2,
+        energy=50,
+    )
+    spawned_unit = make_unit(
+        tag=101,
+        x=10,
+        y=10,
+        unit_type=STALKER,
+        health=80,
+        shield=20,
+        shield_max=80,
+        energy=0,
+    )
+
+    commands = compile_unit_value_commands(matched_units=[(source_unit, spawned_unit)])
+
+    unit_values = [
+        (
+            command.unit_value.unit_value,
+            command.unit_value.value,
+            command.unit_value.unit_tag,
+        )
+        for command in commands
+    ]
+    # Shields within the tolerance are kept, the energy is not set
+    # on a unit without energy:
+    assert unit_values == [(d_pb.DebugSetUnitValue.Life, 40, 101)]
+
+
+def test_verification_reports_the_differences():
+    state = make_state(
+        player1_units=[
+            make_unit(tag=1, x=10, y=10),
+            make_unit(tag=2, x=20, y=10, health=20),
+        ],
+        player2_units=[],
+    )
+    observed_units = [
+        make_unit(tag=101, x=10, y=13),
+        make_unit(tag=102, x=20, y=10),
+    ]
+
+    verification = verify_spawned_units(
+        player_units_map_state=state,
+        observed_units=observed_units,
+    )
+
+    assert verification.matched_units == 2
+    assert verification.missing_units == 0
+    assert verification.unexpected_units == 0
+    assert verification.mismatched_values == 1
+    assert verification.max_position_error == pytest.approx(3.0)
+    assert not verification.is_exact
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from s2clientprotocol import sc2api_pb2 as sc_pb
+
+from sc2_combat_simulator.env import static_data_cache
+
+
+def make_game_info(start_location_x: float) -> sc_pb.ResponseGameInfo:
+    game_info = sc_pb.ResponseGameInfo(map_name="Combat")
+    game_info.start_raw.map_size.x = 64
+    game_info.start_raw.map_size.y = 64
+    game_info.start_raw.start_locations.add(x=start_location_x, y=10)
+    return game_info
+
+
+def get_game_info(cache_dir: Path, request_fn):
+    return static_data_cache.get_game_info(
+        cache_dir=cache_dir,
+        game_version="5.0.14",
+        map_hash="map",
+        join_request=sc_pb.RequestJoinGame(),
+        player_setup=[],
+        request_fn=request_fn,
+    )
+
+
+def test_requested_game_info_has_no_start_locations(tmp_path: Path):
+    game_info = get_game_info(
+        cache_dir=tmp_path,
+        request_fn=lambda: make_game_info(start_location_x=10),
+    )
+
+    assert game_info.map_name == "Combat"
+    assert game_info.start_raw.map_size.x == 64
+    assert len(game_info.start_raw.start_locations) == 0
+
+
+def test_cached_game_info_is_requested_once(tmp_path: Path, monkeypatch):
+    requests = []
+
+    def request_fn():
+        requests.append(None)
+        return make_game_info(start_location_x=10 * len(requests))
+
+    get_game_info(cache_dir=tmp_path, request_fn=request_fn)
+    # Another process reads the file cached on the disk:
+    monkeypatch.setattr(static_data_cache, "_RESPONSE_MEMORY", {})
+    game_info = get_game_info(cache_dir=tmp_path, request_fn=request_fn)
+
+    assert len(requests) == 1
+    assert len(game_info.start_raw.start_locations) == 0
+
+
+def test_start_locations_are_stripped_from_old_cache_files(tmp_path: Path):
+    cache_filepath = static_data_cache.get_cache_directory(
+        cache_dir=tmp_path,
+        game_version="5.0.14",
+        map_hash="map",
+    ) / static_data_cache.get_game_info_filename(
+        join_request=sc_pb.RequestJoinGame(),
+        player_setup=[],
+    )
+    cache_filepath.parent.mkdir(parents=True)
+    cache_filepath.write_bytes(make_game_info(start_location_x=10).SerializeToString())
+
+    game_info = get_game_info(
+        cache_dir=tmp_path,
+        request_fn=lambda: make_game_info(start_location_x=20),
+    )
+
+    assert game_info.map_name == "Combat"
+    assert len(game_info.start_raw.start_locations) == 0
@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from sc2_combat_simulator.env.step_instrumentation import StepInstrumentation
+
+BUCKET_EDGES = np.array([0.001, 0.01, 0.1, 1.0])
+
+
+def test_summary_of_recorded_phases():
+    instrumentation = StepInstrumentation(bucket_edges=BUCKET_EDGES)
+    for seconds in [0.0005, 0.005, 0.005, 0.05]:
+        instrumentation.record(phase="step", seconds=seconds)
+    instrumentation.record(phase="observe", seconds=2.0)
+
+    summary = instrumentation.get_summary()
+
+    step_summary = summary["step"]
+    assert step_summary.count == 4
+    assert step_summary.total_seconds == pytest.approx(0.0605)
+    assert step_summary.mean_seconds == pytest.approx(0.0605 / 4)
+    assert step_summary.max_seconds == pytest.approx(0.05)
+    assert step_summary.bucket_counts == [1, 2, 1, 0, 0]
+    assert step_summary.p50_seconds == pytest.approx(0.01)
+    # Percentiles never exceed the longest recorded duration:
+    assert step_summary.p99_seconds == pytest.approx(0.05)
+    # Durations above the last edge are counted in the last bucket:
+    assert summary["observe"].bucket_counts == [0, 0, 0, 0, 1]
+    assert summary["observe"].p50_seconds == pytest.approx(2.0)
+
+
+def test_episode_summary_is_cleared():
+    instrumentation = StepInstrumentation(bucket_edges=BUCKET_EDGES)
+    instrumentation.record(phase="step", seconds=0.005)
+    instrumentation.start_episode()
+    instrumentation.record(phase="step", seconds=0.05)
+
+    assert instrumentation.get_summary()["step"].count == 2
+    episode_summary = instrumentation.get_summary(episode=True)["step"]
+    assert episode_summary.count == 1
+    assert episode_summary.max_seconds == pytest.approx(0.05)
+
+
+def test_measure_records_the_block():
+    instrumentation = StepInstrumentation(bucket_edges=BUCKET_EDGES)
+    with pytest.raises(RuntimeError):
+        with instrumentation.measure(phase="step"):
+            raise RuntimeError("step failed")
+
+    assert instrumentation.get_summary()["step"].count == 1
+
+
+def test_write_json(tmp_path: Path):
+    instrumentation = StepInstrumentation(bucket_edges=BUCKET_EDGES)
+    instrumentation.record(phase="step", seconds=0.005)
+
+    output_filepath = instrumentation.write_json(
+        output_filepath=tmp_path / "latency" / "summary.json"
+    )
+
+    summary = json.loads(output_filepath.read_text())
+    assert summary["step"]["count"] == 1
+    assert summary["step"]["bucket_edges_seconds"] == BUCKET_EDGES.tolist()
@@ -0,0 +1,95 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from sc2_combat_simulator.env import vec_combat_env
+from sc2_combat_simulator.env.vec_combat_env import _CombatEnvWorker
+
+
+class FakeSampler:
+    def __init__(self, scenarios):
+        self._scenarios = list(scenarios)
+
+    def next_scenario(self):
+        return self._scenarios.pop(0)
+
+
+class FakeEnv:
+    def __init__(self, player_units_map_state):
+        self.player_units_map_state = player_units_map_state
+        self.closed = False
+
+    def observation_spec(self):
+        return ({"feature_units": (0, 46)},)
+
+    def action_spec(self):
+        return ("action_spec",)
+
+    def load_scenario(self, player_units_map_state, respawn=True):
+        assert not respawn
+        self.player_units_map_state = player_units_map_state
+
+    def reset(self):
+        return (
+            SimpleNamespace(
+                player_units_map_state=self.player_units_map_state,
+                last=lambda: False,
+            ),
+        )
+
+    def close(self):
+        self.closed = True
+
+
+def make_scenario(name: str, map_name: str = "map"):
+    return SimpleNamespace(
+        map_name=map_name,
+        game_version="5.0.14",
+        player_units_map_state=name,
+    )
+
+
+def make_worker(monkeypatch, scenarios):
+    launched_envs = []
+
+    def make_combat_env(player_units_map_state, **kwargs):
+        env = FakeEnv(player_units_map_state=player_units_map_state)
+        launched_envs.append(env)
+        return env
+
+    monkeypatch.setattr(vec_combat_env, "make_combat_env", make_combat_env)
+    worker = _CombatEnvWorker(combat_files=[], seed=0, replay_dir=Path("replays"))
+    worker._sampler = FakeSampler(scenarios=scenarios)
+    return worker, launched_envs
+
+
+def test_first_episode_plays_the_specs_scenario(monkeypatch):
+    worker, launched_envs = make_worker(
+        monkeypatch=monkeypatch,
+        scenarios=[make_scenario("first"), make_scenario("second")],
+    )
+
+    observation_spec, action_spec = worker.specs()
+    first_timestep = worker.reset()
+    second_timestep = worker.reset()
+
+    assert observation_spec == {"feature_units": (0, 46)}
+    assert action_spec == "action_spec"
+    assert len(launched_envs) == 1
+    assert first_timestep.player_units_map_state == "first"
+    assert second_timestep.player_units_map_state == "second"
+
+
+def test_reset_without_specs_draws_a_scenario(monkeypatch):
+    worker, launched_envs = make_worker(
+        monkeypatch=monkeypatch,
+        scenarios=[make_scenario("first"), make_scenario("second", map_name="other")],
+    )
+
+    first_timestep = worker.reset()
+    second_timestep = worker.reset()
+
+    assert first_timestep.player_units_map_state == "first"
+    assert second_timestep.player_units_map_state == "second"
+    # The second scenario comes from another map, the environment is relaunched:
+    assert len(launched_envs) == 2
+    assert launched_envs[0].closed
@@ -0,0 +1,121 @@
+import pytest
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+from sc2_combat_simulator.engagement_extractor import (
+    SpatialGrid,
+    crop_to_engagement,
+    get_engaged_positions,
+)
+from sc2_combat_simulator.function_results.player_units_map_state import (
+    PlayerUnitsMapState,
+)
+
+
+def make_unit(
+    tag: int,
+    x: float,
+    y: float,
+    owner: int = 1,
+    health: float = 45.0,
+    weapon_cooldown: float = 0.0,
+) -> sc2proto_raw_pb.Unit:
+    unit = sc2proto_raw_pb.Unit(
+        tag=tag,
+        owner=owner,
+        unit_type=48,
+        health=health,
+        weapon_cooldown=weapon_cooldown,
+    )
+    unit.pos.x = x
+    unit.pos.y = y
+    return unit
+
+
+def make_interval(units_per_observation) -> obs_collection_pb.ObservationInterval:
+    interval = obs_collection_pb.ObservationInterval(start_time=0, end_time=100)
+    for units in units_per_observation:
+        observation = interval.observations.add()
+        observation.player1.observation.raw_data.units.extend(units)
+    return interval
+
+
+def test_spatial_grid_finds_points_in_the_neighbouring_cells():
+    spatial_grid = SpatialGrid(radius=10)
+    spatial_grid.add_point(x=9, y=9)
+
+    assert spatial_grid.n_points == 1
+    assert spatial_grid.has_point_within(x=9, y=9)
+    # Point in the neighbouring cell within the radius:
+    assert spatial_grid.has_point_within(x=15, y=15)
+    # Point in the neighbouring cell outside of the radius:
+    assert not spatial_grid.has_point_within(x=19, y=19)
+    assert not spatial_grid.has_point_within(x=40, y=9)
+
+
+def test_spatial_grid_handles_negative_positions():
+    spatial_grid = SpatialGrid(radius=4)
+    spatial_grid.add_point(x=-1, y=-1)
+
+    assert spatial_grid.has_point_within(x=2, y=1)
+    assert not spatial_grid.has_point_within(x=5, y=5)
+
+
+def test_spatial_grid_requires_positive_radius():
+    with pytest.raises(ValueError):
+        SpatialGrid(radius=0)
+
+
+def test_engaged_positions_of_damaged_attacking_and_killed_units():
+    interval = make_interval(
+        units_per_observation=[
+            [
+                make_unit(tag=1, x=10, y=10),
+                make_unit(tag=2, x=20, y=10),
+                make_unit(tag=3, x=30, y=10),
+                make_unit(tag=4, x=90, y=90),
+            ],
+            [
+                make_unit(tag=1, x=11, y=10, health=30),
+                make_unit(tag=2, x=20, y=10, weapon_cooldown=5),
+                make_unit(tag=4, x=90, y=90),
+            ],
+        ]
+    )
+
+    engaged_positions = get_engaged_positions(observation_interval=interval)
+
+    # Engaged units are also kept at their first positions, the unit 4 that
+    # did not take part in the combat is left out:
+    assert sorted(engaged_positions) == [
+        (10, 10),
+        (11, 10),
+        (20, 10),
+        (20, 10),
+        (30, 10),
+        (30, 10),
+    ]
+
+
+def test_crop_keeps_units_near_the_engagement():
+    interval = make_interval(
+        units_per_observation=[
+            [make_unit(tag=1, x=10, y=10)],
+            [make_unit(tag=1, x=10, y=10, health=30)],
+        ]
+    )
+    state = PlayerUnitsMapState(
+        player1_units=[make_unit(tag=1, x=10, y=10), make_unit(tag=2, x=90, y=90)],
+        player2_units=[make_unit(tag=3, x=14, y=10, owner=2)],
+        player1_map_state=sc2proto_raw_pb.MapState(),
+        player2_map_state=sc2proto_raw_pb.MapState(),
+    )
+
+    cropped_state = crop_to_engagement(
+        player_units_map_state=state,
+        observation_interval=interval,
+        engagement_radius=8,
+    )
+
+    assert [unit.tag for unit in cropped_state.player1_units] == [1]
+    assert [unit.tag for unit in cropped_state.player2_units] == [3]
@@ -0,0 +1,167 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+from pysc2_evolved.env import environment
+from s2clientprotocol import data_pb2 as sc_data
+
+from sc2_combat_simulator.evaluation import evaluate_scenario, get_army_values
+from sc2_combat_simulator.function_arguments.evaluation_task_args import (
+    EvaluationTaskArgs,
+)
+
+STALKER_UNIT_TYPE = 74
+PROBE_UNIT_TYPE = 84
+PYLON_UNIT_TYPE = 60
+
+UNIT_STATS = {
+    STALKER_UNIT_TYPE: sc_data.UnitTypeData(
+        unit_id=STALKER_UNIT_TYPE, mineral_cost=125, vespene_cost=50
+    ),
+    PROBE_UNIT_TYPE: sc_data.UnitTypeData(unit_id=PROBE_UNIT_TYPE, mineral_cost=50),
+    PYLON_UNIT_TYPE: sc_data.UnitTypeData(
+        unit_id=PYLON_UNIT_TYPE,
+        mineral_cost=100,
+        attributes=[sc_data.Attribute.Structure],
+    ),
+}
+
+
+def make_unit(owner: int, unit_type: int) -> sc2proto_raw_pb.Unit:
+    return sc2proto_raw_pb.Unit(owner=owner, unit_type=unit_type)
+
+
+def test_army_values_sum_the_army_units_of_both_players():
+    units = [
+        make_unit(owner=1, unit_type=STALKER_UNIT_TYPE),
+        make_unit(owner=1, unit_type=STALKER_UNIT_TYPE),
+        make_unit(owner=2, unit_type=STALKER_UNIT_TYPE),
+    ]
+
+    army_values, unit_counts = get_army_values(units=units, unit_stats=UNIT_STATS)
+
+    assert army_values == {1: 350, 2: 175}
+    assert unit_counts == {1: 2, 2: 1}
+
+
+def test_army_values_skip_structures_workers_and_other_owners():
+    units = [
+        make_unit(owner=1, unit_type=PROBE_UNIT_TYPE),
+        make_unit(owner=2, unit_type=PYLON_UNIT_TYPE),
+        make_unit(owner=16, unit_type=STALKER_UNIT_TYPE),
+    ]
+
+    army_values, unit_counts = get_army_values(units=units, unit_stats=UNIT_STATS)
+
+    assert army_values == {1: 0, 2: 0}
+    assert unit_counts == {1: 0, 2: 0}
+
+
+def test_army_values_count_units_without_type_data():
+    units = [make_unit(owner=2, unit_type=9999)]
+
+    army_values, unit_counts = get_army_values(units=units, unit_stats=UNIT_STATS)
+
+    assert army_values == {1: 0, 2: 0}
+    assert unit_counts == {1: 0, 2: 1}
+
+
+class FakeEnv:
+    """Spawns the loaded scenario on reset, or in place during an episode."""
+
+    def __init__(self, scenario_units, episode_lengths) -> None:
+        self._scenario_units = scenario_units
+        self._episode_lengths = episode_lengths
+        self._loaded = None
+        self._running = False
+        self._steps = 0
+        self._game_loop = 0
+        self.spawned = []
+
+    def load_scenario(self, player_units_map_state, respawn=True) -> None:
+        self._loaded = player_units_map_state
+        if respawn and self._running:
+            self._spawn()
+
+    def _spawn(self) -> None:
+        self.spawned.append(self._loaded)
+        self._game_loop += 2
+
+    def _timestep(self, step_type, reward=0):
+        return (
+            SimpleNamespace(
+                step_type=step_type,
+                reward=reward,
+                observation={"game_loop": [self._game_loop]},
+            ),
+        )
+
+    def reset(self):
+        self._spawn()
+        self._running = True
+        self._steps = 0
+        return self._timestep(step_type=environment.StepType.FIRST)
+
+    def step(self, actions):
+        self._game_loop += 8
+        self._steps += 1
+        if self._steps == self._episode_lengths.get(self.spawned[-1]):
+            self._running = False
+            return self._timestep(step_type=environment.StepType.LAST, reward=1)
+        return self._timestep(step_type=environment.StepType.MID)
+
+    def get_scenario_units(self):
+        return [self._scenario_units[self.spawned[-1]]]
+
+    def step_latency_summary(self, episode):
+        return {}
+
+
+class FakeAgent:
+    def reset(self) -> None:
+        pass
+
+    def step(self, timestep):
+        return "no_op"
+
+
+def test_timeout_does_not_affect_the_next_scenario():
+    env = FakeEnv(
+        scenario_units={
+            "first": [make_unit(owner=1, unit_type=STALKER_UNIT_TYPE)] * 2,
+            "second": [make_unit(owner=2, unit_type=STALKER_UNIT_TYPE)],
+        },
+        # The first scenario never ends:
+        episode_lengths={"second": 2},
+    )
+    task_args = EvaluationTaskArgs(
+        run_name="run",
+        agent_class_path="agent",
+        game_version="5.0.14",
+        map_hash="map",
+        record_paths=[Path("first"), Path("second")],
+        replay_dir=Path("replays"),
+        max_episode_steps=3,
+    )
+
+    outcomes = [
+        evaluate_scenario(
+            env=env,
+            agent=FakeAgent(),
+            scenario=SimpleNamespace(player_units_map_state=name),
+            task_args=task_args,
+            record_path=Path(name),
+            unit_stats=UNIT_STATS,
+        )
+        for name in ["first", "second"]
+    ]
+
+    # Each scenario is spawned once, by its own reset:
+    assert env.spawned == ["first", "second"]
+    assert outcomes[0].outcome == "timeout"
+    assert outcomes[0].agent_steps == 3
+    assert outcomes[0].player1_unit_count == 2
+    assert outcomes[1].outcome == "win"
+    assert outcomes[1].agent_steps == 2
+    assert outcomes[1].duration_gameloops == 16
+    assert (outcomes[1].player1_unit_count, outcomes[1].player2_unit_count) == (0, 1)
@@ -0,0 +1,221 @@
+import os
+from pathlib import Path
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+from sc2_combat_simulator import scenario_compiler
+from sc2_combat_simulator.scenario_compiler import compile_scenarios
+from sc2_combat_simulator.scenario_index import (
+    connect_scenario_index,
+    query_scenarios,
+    replace_combat_file_rows,
+)
+from sc2_combat_simulator.settings import ENGAGEMENT_RADIUS, SCENARIO_INDEX_FILENAME
+
+
+def write_combat_file(filepath: Path) -> Path:
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    observations = obs_collection_pb.GameObservationCollection(
+        replay_path="replay.SC2Replay",
+        map_hash="map",
+        game_version="5.0.14",
+    )
+    filepath.write_bytes(observations.SerializeToString())
+    return filepath
+
+
+def make_row(record_path: str, combat_file: Path, unit_count: int):
+    return {
+        "record_path": record_path,
+        "combat_file": str(combat_file),
+        "combat_file_mtime": combat_file.stat().st_mtime,
+        "replay_path": "replay.SC2Replay",
+        "map_hash": "map",
+        "game_version": "5.0.14",
+        "start_time": 0,
+        "end_time": 100,
+        "duration": 100,
+        "player1_unit_count": unit_count,
+        "player2_unit_count": 0,
+        "unit_count": unit_count,
+        "player1_race": None,
+        "player2_race": None,
+        "player1_supply": None,
+        "player2_supply": None,
+        "record_size_bytes": 0,
+    }
+
+
+def count_compilations(monkeypatch):
+    compiled_files = []
+    compile_combat_file = scenario_compiler.compile_combat_file
+
+    def counting_compile_combat_file(combat_interval_file, **kwargs):
+        compiled_files.append(combat_interval_file)
+        return compile_combat_file(combat_interval_file=combat_interval_file, **kwargs)
+
+    monkeypatch.setattr(
+        scenario_compiler, "compile_combat_file", counting_compile_combat_file
+    )
+    return compiled_files
+
+
+def test_empty_combat_file_is_compiled_once(tmp_path: Path, monkeypatch):
+    combat_detection_dir = tmp_path / "combats"
+    combat_file = write_combat_file(combat_detection_dir / "pack" / "empty.binpb")
+    compiled_files = count_compilations(monkeypatch=monkeypatch)
+
+    for _ in range(2):
+        compile_scenarios(
+            combat_detection_dir=combat_detection_dir,
+            output_directory=tmp_path / "compiled",
+        )
+
+    assert compiled_files == [combat_file]
+
+
+def test_force_compiles_again(tmp_path: Path, monkeypatch):
+    combat_detection_dir = tmp_path / "combats"
+    combat_file = write_combat_file(combat_detection_dir / "empty.binpb")
+    compiled_files = count_compilations(monkeypatch=monkeypatch)
+
+    for _ in range(2):
+        compile_scenarios(
+            combat_detection_dir=combat_detection_dir,
+            output_directory=tmp_path / "compiled",
+            force=True,
+        )
+
+    assert compiled_files == [combat_file, combat_file]
+
+
+def test_modified_combat_file_is_compiled_again(tmp_path: Path, monkeypatch):
+    combat_detection_dir = tmp_path / "combats"
+    combat_file = write_combat_file(combat_detection_dir / "empty.binpb")
+    compiled_files = count_compilations(monkeypatch=monkeypatch)
+
+    compile_scenarios(
+        combat_detection_dir=combat_detection_dir,
+        output_directory=tmp_path / "compiled",
+    )
+    modified_time = combat_file.stat().st_mtime + 10
+    os.utime(combat_file, (modified_time, modified_time))
+    compile_scenarios(
+        combat_detection_dir=combat_detection_dir,
+        output_directory=tmp_path / "compiled",
+    )
+
+    assert compiled_files == [combat_file, combat_file]
+
+
+def test_changed_engagement_radius_compiles_again(tmp_path: Path, monkeypatch):
+    combat_detection_dir = tmp_path / "combats"
+    combat_file = write_combat_file(combat_detection_dir / "empty.binpb")
+    compiled_files = count_compilations(monkeypatch=monkeypatch)
+
+    for engagement_radius in [16.0, 16.0, None, None, 8.0]:
+        compile_scenarios(
+            combat_detection_dir=combat_detection_dir,
+            output_directory=tmp_path / "compiled",
+            engagement_radius=engagement_radius,
+        )
+
+    assert compiled_files == [combat_file, combat_file, combat_file]
+
+
+def test_query_scenarios_binds_parameters(tmp_path: Path):
+    combat_file = write_combat_file(tmp_path / "combat.binpb")
+    connection = connect_scenario_index(index_filepath=tmp_path / "index.sqlite")
+    try:
+        replace_combat_file_rows(
+            connection=connection,
+            combat_file=combat_file,
+            rows=[
+                make_row(record_path="small", combat_file=combat_file, unit_count=4),
+                make_row(record_path="large", combat_file=combat_file, unit_count=80),
+            ],
+            engagement_radius=None,
+        )
+
+        rows = query_scenarios(
+            connection=connection,
+            where="unit_count <= ?",
+            parameters=(40,),
+        )
+    finally:
+        connection.close()
+
+    assert [row["record_path"] for row in rows] == ["small"]
+
+
+def index_record(tmp_path: Path, combat_file: Path, record_name: str) -> Path:
+    record_path = tmp_path / "compiled" / combat_file.stem / record_name
+    record_path.parent.mkdir(parents=True, exist_ok=True)
+    record_path.write_bytes(b"")
+    connection = connect_scenario_index(
+        index_filepath=tmp_path / "compiled" / SCENARIO_INDEX_FILENAME
+    )
+    try:
+        replace_combat_file_rows(
+            connection=connection,
+            combat_file=combat_file,
+            rows=[
+                make_row(
+                    record_path=str(record_path), combat_file=combat_file, unit_count=4
+                )
+            ],
+            engagement_radius=ENGAGEMENT_RADIUS,
+        )
+    finally:
+        connection.close()
+    return record_path
+
+
+def get_indexed_records(index_filepath: Path):
+    connection = connect_scenario_index(index_filepath=index_filepath)
+    try:
+        return [row["record_path"] for row in query_scenarios(connection=connection)]
+    finally:
+        connection.close()
+
+
+def test_deleted_combat_file_is_removed_from_index(tmp_path: Path):
+    combat_detection_dir = tmp_path / "combats"
+    kept_file = write_combat_file(combat_detection_dir / "kept.binpb")
+    deleted_file = write_combat_file(combat_detection_dir / "deleted.binpb")
+    kept_record = index_record(
+        tmp_path=tmp_path, combat_file=kept_file, record_name="0_100.binpb"
+    )
+    deleted_record = index_record(
+        tmp_path=tmp_path, combat_file=deleted_file, record_name="0_100.binpb"
+    )
+    deleted_file.unlink()
+
+    index_filepath = compile_scenarios(
+        combat_detection_dir=combat_detection_dir,
+        output_directory=tmp_path / "compiled",
+    )
+
+    assert get_indexed_records(index_filepath=index_filepath) == [str(kept_record)]
+    assert kept_record.exists()
+    assert not deleted_record.parent.exists()
+
+
+def test_combat_files_of_other_directories_are_removed_from_index(
+    tmp_path: Path, monkeypatch
+):
+    other_file = write_combat_file(tmp_path / "other_combats" / "other.binpb")
+    other_record = index_record(
+        tmp_path=tmp_path, combat_file=other_file, record_name="0_100.binpb"
+    )
+    combat_detection_dir = tmp_path / "combats"
+    combat_file = write_combat_file(combat_detection_dir / "empty.binpb")
+    compiled_files = count_compilations(monkeypatch=monkeypatch)
+
+    index_filepath = compile_scenarios(
+        combat_detection_dir=combat_detection_dir,
+        output_directory=tmp_path / "compiled",
+    )
+
+    assert compiled_files == [combat_file]
+    assert get_indexed_records(index_filepath=index_filepath) == []
+    assert not other_record.exists()
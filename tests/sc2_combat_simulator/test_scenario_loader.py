@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from sc2_combat_detector.function_arguments.observe_replay_args import ObserveReplayArgs
+from sc2_combat_detector.function_arguments.synthetic_stream_args import (
+    SyntheticStreamArgs,
+)
+from sc2_combat_detector.function_results.file_detect_combat_result import (
+    FileDetectCombatResult,
+)
+from sc2_combat_detector.proto import observation_collection_pb2 as obs_collection_pb
+from sc2_combat_detector.replay_processing.observe_replays import observe_replay
+from sc2_combat_simulator.scenario_loader import get_all_units
+
+REPLAY_PATH = Path("synthetic.SC2Replay")
+COMBAT_INTERVALS = [(40, 50), (120, 130)]
+
+
+def observe_combats(single_perspective: bool):
+    return observe_replay(
+        observe_replay_args=ObserveReplayArgs.get_combat_processing_args(
+            replay_path=REPLAY_PATH,
+            combats_to_observe=FileDetectCombatResult(
+                replay_filepath=REPLAY_PATH,
+                combat_intervals=[
+                    obs_collection_pb.ObservationInterval(
+                        start_time=start, end_time=end
+                    )
+                    for start, end in COMBAT_INTERVALS
+                ],
+            ),
+            synthetic_stream_args=SyntheticStreamArgs(
+                game_length=200,
+                n_units=3,
+                fight_intervals=COMBAT_INTERVALS,
+            ),
+            single_perspective=single_perspective,
+        )
+    )
+
+
+def get_unit_tags(units):
+    return sorted(unit.tag for unit in units)
+
+
+def test_single_perspective_yields_the_same_player_units():
+    dual_collection = observe_combats(single_perspective=False)
+    single_collection = observe_combats(single_perspective=True)
+
+    assert [
+        (interval.start_time, interval.end_time)
+        for interval in single_collection.observation_intervals
+    ] == COMBAT_INTERVALS
+    for dual_interval, single_interval in zip(
+        dual_collection.observation_intervals,
+        single_collection.observation_intervals,
+        strict=True,
+    ):
+        dual_units = get_all_units(observation_interval=dual_interval)
+        single_units = get_all_units(observation_interval=single_interval)
+
+        assert len(single_units) == len(dual_units) == 11
+        for dual_state, single_state in zip(dual_units, single_units):
+            assert len(dual_state.player1_units) == 3
+            assert len(dual_state.player2_units) == 3
+            assert get_unit_tags(single_state.player1_units) == get_unit_tags(
+                dual_state.player1_units
+            )
+            assert get_unit_tags(single_state.player2_units) == get_unit_tags(
+                dual_state.player2_units
+            )
+            assert {unit.owner for unit in single_state.player2_units} == {2}
+            assert single_state.player2_map_state == dual_state.player2_map_state
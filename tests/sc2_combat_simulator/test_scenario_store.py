@@ -0,0 +1,196 @@
+from pathlib import Path
+
+import pytest
+import s2clientprotocol.raw_pb2 as sc2proto_raw_pb
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+from sc2_combat_simulator.scenario_index import (
+    connect_scenario_index,
+    get_scenario_index_row,
+    query_scenarios,
+    replace_combat_file_rows,
+)
+from sc2_combat_simulator.scenario_loader import load_compiled_scenario
+from sc2_combat_simulator.scenario_store import (
+    ScenarioStore,
+    StoreScenarioSampler,
+    build_scenario_store,
+)
+
+STALKER_UNIT_TYPE = 74
+OBSERVER_UNIT_TYPE = 82
+
+# (game version, map hash, number of scenarios):
+SCENARIO_GROUPS = [("5.0.14", "map_a", 3), ("5.0.13", "map_b", 2)]
+
+# Fields that are kept by the store:
+STORED_UNIT_FIELDS = (
+    "tag",
+    "unit_type",
+    "owner",
+    "facing",
+    "health",
+    "health_max",
+    "shield",
+    "shield_max",
+    "energy",
+    "energy_max",
+    "is_flying",
+)
+
+
+def make_unit(tag: int, owner: int, x: float, is_flying: bool = False):
+    unit = sc2proto_raw_pb.Unit(
+        tag=tag,
+        unit_type=OBSERVER_UNIT_TYPE if is_flying else STALKER_UNIT_TYPE,
+        owner=owner,
+        facing=1.5,
+        health=40.5,
+        health_max=80.0,
+        shield=20.0,
+        shield_max=80.0,
+        energy=12.25,
+        energy_max=200.0,
+        is_flying=is_flying,
+    )
+    unit.pos.x = x
+    unit.pos.y = 20.5
+    unit.pos.z = 10.0
+    return unit
+
+
+def write_records(tmp_path: Path) -> Path:
+    index_filepath = tmp_path / "scenario_index.sqlite"
+    connection = connect_scenario_index(index_filepath=index_filepath)
+    try:
+        for game_version, map_hash, n_scenarios in SCENARIO_GROUPS:
+            combat_file = tmp_path / "combats" / f"{map_hash}.binpb"
+            combat_file.parent.mkdir(parents=True, exist_ok=True)
+            combat_file.write_bytes(b"")
+            rows = []
+            for scenario_index in range(n_scenarios):
+                tag = 100 * scenario_index
+                record = obs_collection_pb.CombatScenarioRecord(
+                    replay_path="replay.SC2Replay",
+                    map_hash=map_hash,
+                    game_version=game_version,
+                    start_time=100 * scenario_index,
+                    end_time=100 * scenario_index + 50,
+                )
+                # The scenarios have different numbers of units:
+                record.player1_units.extend(
+                    make_unit(tag=tag + index, owner=1, x=10.0 + index)
+                    for index in range(scenario_index + 1)
+                )
+                record.player2_units.extend(
+                    [
+                        make_unit(tag=tag + 50, owner=2, x=30.0),
+                        make_unit(tag=tag + 51, owner=2, x=31.0, is_flying=True),
+                    ]
+                )
+                record_path = (
+                    tmp_path / "compiled" / map_hash / f"{scenario_index}.binpb"
+                )
+                record_path.parent.mkdir(parents=True, exist_ok=True)
+                bin_str_record = record.SerializeToString()
+                record_path.write_bytes(bin_str_record)
+                rows.append(
+                    get_scenario_index_row(
+                        record=record,
+                        record_path=record_path,
+                        combat_file=combat_file,
+                        record_size_bytes=len(bin_str_record),
+                    )
+                )
+            replace_combat_file_rows(
+                connection=connection,
+                combat_file=combat_file,
+                rows=rows,
+                engagement_radius=None,
+            )
+    finally:
+        connection.close()
+
+    return index_filepath
+
+
+@pytest.fixture
+def store_directory(tmp_path: Path) -> Path:
+    index_filepath = write_records(tmp_path=tmp_path)
+    connection = connect_scenario_index(index_filepath=index_filepath)
+    try:
+        scenario_rows = query_scenarios(connection=connection)
+    finally:
+        connection.close()
+
+    return build_scenario_store(
+        scenario_rows=scenario_rows,
+        output_directory=tmp_path / "compiled" / "scenario_store",
+    )
+
+
+def get_unit_fields(units):
+    return [
+        (
+            *(getattr(unit, field) for field in STORED_UNIT_FIELDS),
+            unit.pos.x,
+            unit.pos.y,
+            unit.pos.z,
+        )
+        for unit in units
+    ]
+
+
+def test_store_round_trip(store_directory: Path):
+    store = ScenarioStore(store_directory=store_directory)
+
+    assert len(store) == 5
+    assert store.n_groups == 2
+    # The groups are sorted by the game version:
+    assert store.get_group(0) == ("5.0.13", "map_b", 0, 2)
+    assert store.get_group(1) == ("5.0.14", "map_a", 2, 3)
+
+    record_paths = set()
+    for scenario_index in range(len(store)):
+        scenario = store.get_scenario(scenario_index=scenario_index)
+        record_paths.add(scenario.combat_interval_file)
+        expected_scenario = load_compiled_scenario(
+            record_filepath=scenario.combat_interval_file
+        )
+
+        assert scenario.map_name == expected_scenario.map_name
+        assert scenario.game_version == expected_scenario.game_version
+        assert scenario.start_time == expected_scenario.start_time
+        assert scenario.end_time == expected_scenario.end_time
+        state = scenario.player_units_map_state
+        expected_state = expected_scenario.player_units_map_state
+        assert get_unit_fields(state.player1_units) == get_unit_fields(
+            expected_state.player1_units
+        )
+        assert get_unit_fields(state.player2_units) == get_unit_fields(
+            expected_state.player2_units
+        )
+        assert state.player1_map_state == sc2proto_raw_pb.MapState()
+
+    assert record_paths == set(store_directory.parent.glob("map_*/*.binpb"))
+
+
+def test_sampler_draws_each_batch_within_one_group(store_directory: Path):
+    sampler = StoreScenarioSampler(
+        store_directory=store_directory,
+        seed=0,
+        scenarios_per_group=2,
+    )
+
+    drawn_groups = set()
+    for _ in range(20):
+        batch = [sampler.next_scenario() for _ in range(2)]
+        batch_groups = {
+            (scenario.game_version, scenario.map_name) for scenario in batch
+        }
+        assert len(batch_groups) == 1
+        # The scenarios of a batch are drawn without replacement:
+        assert batch[0].combat_interval_file != batch[1].combat_interval_file
+        drawn_groups |= batch_groups
+
+    assert drawn_groups == {("5.0.13", "map_b"), ("5.0.14", "map_a")}
@@ -0,0 +1,168 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import sc2_combat_detector.proto.observation_collection_pb2 as obs_collection_pb
+from sc2_combat_simulator.transition_dataset import (
+    TARGET_NONE,
+    TARGET_POINT,
+    TARGET_UNIT,
+    TransitionDataset,
+    build_transition_dataset,
+)
+
+STALKER_UNIT_TYPE = 74
+MOVE_ABILITY_ID = 16
+ATTACK_ABILITY_ID = 23
+STOP_ABILITY_ID = 4
+
+
+def add_unit(
+    observation: obs_collection_pb.Observation, tag: int, owner: int, x: float
+):
+    unit = observation.player1.observation.raw_data.units.add(
+        tag=tag,
+        owner=owner,
+        unit_type=STALKER_UNIT_TYPE,
+        health=80.0,
+        shield=80.0,
+    )
+    unit.pos.x = x
+    unit.pos.y = 10.0
+
+
+def add_observation(
+    interval: obs_collection_pb.ObservationInterval,
+    game_loop: int,
+    force_action_delay: int,
+) -> obs_collection_pb.Observation:
+    observation = interval.observations.add(
+        game_loop=game_loop,
+        force_action_delay=force_action_delay,
+    )
+    observation.player1.observation.game_loop = game_loop
+    add_unit(observation=observation, tag=100, owner=1, x=float(game_loop))
+    add_unit(observation=observation, tag=200, owner=2, x=30.0)
+    return observation
+
+
+def write_combat_file(combat_detection_dir: Path) -> None:
+    collection = obs_collection_pb.GameObservationCollection(
+        replay_path="replay.SC2Replay",
+        map_hash="map",
+        game_version="5.0.14",
+    )
+
+    interval = collection.observation_intervals.add(start_time=10, end_time=20)
+    observation = add_observation(interval=interval, game_loop=10, force_action_delay=4)
+    # A camera move, skipped by the encoding:
+    camera_action = observation.force_action.actions.add()
+    camera_action.action_raw.camera_move.center_world_space.x = 1.0
+    move_command = observation.force_action.actions.add().action_raw.unit_command
+    move_command.ability_id = MOVE_ABILITY_ID
+    move_command.unit_tags.append(100)
+    move_command.target_world_space_pos.x = 15.0
+    move_command.target_world_space_pos.y = 16.0
+    attack_command = observation.force_action.actions.add().action_raw.unit_command
+    attack_command.ability_id = ATTACK_ABILITY_ID
+    # The unit 999 was not observed:
+    attack_command.unit_tags.extend([100, 999])
+    attack_command.target_unit_tag = 200
+    attack_command.queue_command = True
+    observation = add_observation(interval=interval, game_loop=14, force_action_delay=6)
+    stop_command = observation.force_action.actions.add().action_raw.unit_command
+    stop_command.ability_id = STOP_ABILITY_ID
+    stop_command.unit_tags.append(200)
+    add_observation(interval=interval, game_loop=20, force_action_delay=1)
+
+    interval = collection.observation_intervals.add(start_time=40, end_time=44)
+    observation = add_observation(interval=interval, game_loop=40, force_action_delay=4)
+    attack_command = observation.force_action.actions.add().action_raw.unit_command
+    attack_command.ability_id = ATTACK_ABILITY_ID
+    attack_command.unit_tags.append(100)
+    attack_command.target_unit_tag = 777
+    add_observation(interval=interval, game_loop=44, force_action_delay=1)
+
+    combat_file = combat_detection_dir / "replay.binpb"
+    combat_file.parent.mkdir(parents=True)
+    combat_file.write_bytes(collection.SerializeToString())
+
+
+@pytest.fixture
+def dataset(tmp_path: Path) -> TransitionDataset:
+    write_combat_file(combat_detection_dir=tmp_path / "combats")
+    build_transition_dataset(
+        combat_detection_dir=tmp_path / "combats",
+        output_directory=tmp_path / "transitions",
+        max_units=4,
+        max_actions=3,
+        shard_size=2,
+    )
+    return TransitionDataset(dataset_directory=tmp_path / "transitions")
+
+
+def test_dataset_round_trip(dataset: TransitionDataset):
+    assert len(dataset) == 3
+    assert [shard["size"] for shard in dataset.manifest["shards"]] == [2, 1]
+
+    batch = dataset.get_batch(indices=[2, 0, 1])
+
+    assert batch["game_loop"].tolist() == [40, 10, 14]
+    assert batch["delay"].tolist() == [4, 4, 6]
+    assert batch["unit_mask"][1].tolist() == [True, True, False, False]
+    assert batch["units"][1, :2, :4].tolist() == [
+        [STALKER_UNIT_TYPE, 1, 10.0, 10.0],
+        [STALKER_UNIT_TYPE, 2, 30.0, 10.0],
+    ]
+    assert batch["next_units"][1, 0, 2] == 14.0
+
+    # The camera move is skipped, the targets refer to the rows of the units:
+    assert batch["action_mask"][1].tolist() == [True, True, False]
+    assert batch["actions"][1, :2].tolist() == [
+        [MOVE_ABILITY_ID, TARGET_POINT, 15.0, 16.0, -1, 0],
+        [ATTACK_ABILITY_ID, TARGET_UNIT, 0.0, 0.0, 1, 1],
+    ]
+    assert batch["action_unit_mask"][1, :2].tolist() == [
+        [True, False, False, False],
+        [True, False, False, False],
+    ]
+    assert batch["actions"][2, 0].tolist() == [
+        STOP_ABILITY_ID,
+        TARGET_NONE,
+        0.0,
+        0.0,
+        -1,
+        0,
+    ]
+    assert batch["action_unit_mask"][2, 0].tolist() == [False, True, False, False]
+    # The target that was not observed:
+    assert batch["actions"][0, 0, 4] == -1
+
+
+def test_sample_batch_draws_existing_transitions(dataset: TransitionDataset):
+    batch = dataset.sample_batch(batch_size=16, rng=np.random.default_rng(seed=0))
+
+    assert batch["game_loop"].shape == (16,)
+    assert set(batch["game_loop"].tolist()) <= {10, 14, 40}
+
+
+@pytest.mark.parametrize("indices", [[-1], [3], [0, 5]])
+def test_get_batch_rejects_invalid_indices(dataset: TransitionDataset, indices):
+    with pytest.raises(IndexError):
+        dataset.get_batch(indices=indices)
+
+
+def test_empty_dataset_raises(tmp_path: Path):
+    (tmp_path / "combats").mkdir()
+    build_transition_dataset(
+        combat_detection_dir=tmp_path / "combats",
+        output_directory=tmp_path / "transitions",
+    )
+    dataset = TransitionDataset(dataset_directory=tmp_path / "transitions")
+
+    assert len(dataset) == 0
+    with pytest.raises(ValueError):
+        dataset.get_batch(indices=[0])
+    with pytest.raises(ValueError):
+        dataset.sample_batch(batch_size=1, rng=np.random.default_rng(seed=0))